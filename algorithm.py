@@ -1,9 +1,73 @@
 import math
 
+import profiling
+from quadtree import QuadTree
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only required by the array backend
+    np = None
+
+
+class CoolingSchedule:
+    """Step size control and convergence test shared by the layouts (adaptive cooling after Yifan Hu).
+
+    ``temperature`` caps how far a node may move in one step, None leaves steps uncapped.
+    When the total energy drops ``patience`` steps in a row the cap grows by ``1 / cooling``,
+    when it rises the cap shrinks by ``cooling``. The layout has converged once no node
+    moved further than ``tolerance`` in a step.
+    """
+
+    def __init__(self, temperature=None, cooling=0.9, tolerance=None, patience=5):
+        if not 0 < cooling <= 1:
+            raise ValueError(f"cooling must be in (0, 1], got {cooling}")
+
+        self.temperature = temperature
+        self.cooling = cooling
+        self.tolerance = tolerance
+        self.patience = patience
+        self.energies = []  # energy (sum of squared forces) of every step
+        self.max_displacements = []  # largest node displacement of every step
+        self.converged = False
+        self._progress = 0
+
+    def update(self, energy, max_displacement):
+        previous = self.energies[-1] if self.energies else None
+        self.energies.append(energy)
+        self.max_displacements.append(max_displacement)
+
+        if self.temperature is not None and previous is not None:
+            if energy < previous:
+                self._progress += 1
+                if self._progress >= self.patience:
+                    self._progress = 0
+                    self.temperature /= self.cooling
+            else:
+                self._progress = 0
+                self.temperature *= self.cooling
+
+        if self.tolerance is not None and max_displacement < self.tolerance:
+            self.converged = True
+
+        return self.converged
+
 
 class ForceDirectGraph:
+    # "exact" is the O(n^2) all-pairs reference, "barnes_hut" the O(n log n) quadtree approximation
+    REPULSION_METHODS = ("exact", "barnes_hut")
+    # "python" works on the positions dict directly, "numpy" runs ArrayForceDirectGraph underneath
+    BACKENDS = ("python", "numpy")
+
     def __init__(self, positions, edges, max_iterations, repulsion_const=5000, damping_const=0.85,
-                 attraction_constant=0.1):
+                 attraction_constant=0.1, repulsion_method="exact", theta=0.5, backend="python", workers=1,
+                 temperature=None, cooling=0.9, tolerance=None):
+        if repulsion_method not in self.REPULSION_METHODS:
+            raise ValueError(f"Unknown repulsion method: {repulsion_method!r}")
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend: {backend!r}")
+        if workers > 1 and backend != "numpy":
+            raise ValueError("Parallel workers need the numpy backend")
+
         self.current_iteration = 0
         self.max_iterations = max_iterations
         self.positions = positions
@@ -11,21 +75,112 @@ class ForceDirectGraph:
         self.repulsion_const = repulsion_const
         self.damping_const = damping_const
         self.attraction_constant = attraction_constant
+        self.repulsion_method = repulsion_method
+        self.theta = theta
+        self.backend = backend
+        self.store = None
+        self.schedule = CoolingSchedule(temperature, cooling, tolerance)
+        self._engine = None
+
+        if backend == "numpy":
+            self._node_ids = list(positions.keys())
+            index = {node_id: i for i, node_id in enumerate(self._node_ids)}
+            self._engine = ArrayForceDirectGraph(
+                positions=[positions[node_id] for node_id in self._node_ids],
+                edges=[(index[node_1], index[node_2]) for node_1, node_2 in edges],
+                max_iterations=max_iterations,
+                repulsion_const=repulsion_const,
+                damping_const=damping_const,
+                attraction_constant=attraction_constant,
+                repulsion_method=repulsion_method,
+                theta=theta,
+                workers=workers
+            )
+            self._engine.schedule = self.schedule
+
+    @classmethod
+    def from_store(cls, store, max_iterations, **kwargs):
+        """Lay out a GraphStore, node ids are store indices and every step is written back to the store."""
+        graph = cls(dict(enumerate(store.position_list())), list(store.edges()), max_iterations, **kwargs)
+        graph.store = store
+        return graph
+
+    @property
+    def energy(self):
+        """Energy of the last step, None before the first one."""
+        return self.schedule.energies[-1] if self.schedule.energies else None
+
+    @property
+    def converged(self):
+        return self.schedule.converged
 
     def __iter__(self):
         return self
 
     def __next__(self):
-        if self.current_iteration < self.max_iterations:
+        if self.current_iteration < self.max_iterations and not self.schedule.converged:
             self.current_iteration += 1
-            forces = self._calculate_forces()
-            return self._update_positions(forces)
+            profiler = profiling.active
+            profiler.count("layout.iterations")
+            if self._engine is not None:
+                positions = self._step_engine()
+            else:
+                forces = self._calculate_forces()
+                with profiler.phase("layout.update"):
+                    positions = self._update_positions(forces)
+
+            if self.store is not None:
+                with profiler.phase("layout.store_write"):
+                    for node_id, (x, y) in positions.items():
+                        self.store.set_position(node_id, x, y)
+
+            return positions
         else:
+            self.close()
             raise StopIteration
 
+    def close(self):
+        """Shut down the numpy engine's worker processes, if any. Safe to call more than once."""
+        if self._engine is not None:
+            self._engine.close()
+
+    def _step_engine(self):
+        self._engine.step()
+
+        for node_id, (x, y) in zip(self._node_ids, self._engine.positions.tolist()):
+            self.positions[node_id] = [x, y]
+
+        return self.positions
+
     def _calculate_forces(self):
         nodes = self.positions.keys()
         forces = {node_id: [0, 0] for node_id in nodes}
+        profiler = profiling.active
+
+        with profiler.phase("layout.repulsion"):
+            if self.repulsion_method == "barnes_hut":
+                self._add_barnes_hut_repulsion(forces)
+            else:
+                self._add_exact_repulsion(forces)
+
+        # attractive forces for connected nodes
+        with profiler.phase("layout.attraction"):
+            for node_1, node_2 in self.edges:
+                x1, y1 = self.positions[node_1]
+                x2, y2 = self.positions[node_2]
+                dx, dy = x2 - x1, y2 - y1
+                distance = math.sqrt(dx ** 2 + dy ** 2) + 0.1
+                force = self.attraction_constant * distance
+                fx, fy = force * dx / distance, force * dy / distance
+                forces[node_1][0] += fx
+                forces[node_1][1] += fy
+                forces[node_2][0] -= fx
+                forces[node_2][1] -= fy
+
+        return forces
+
+    def _add_exact_repulsion(self, forces):
+        nodes = self.positions.keys()
 
         # repulsive forces between all nodes
         for i, node_1 in enumerate(nodes):
@@ -44,27 +199,199 @@ class ForceDirectGraph:
                 forces[node_2][0] += fx
                 forces[node_2][1] += fy
 
-        # attractive forces for connected nodes
-        for node_1, node_2 in self.edges:
-            x1, y1 = self.positions[node_1]
-            x2, y2 = self.positions[node_2]
-            dx, dy = x2 - x1, y2 - y1
-            distance = math.sqrt(dx ** 2 + dy ** 2) + 0.1
-            force = self.attraction_constant * distance
-            fx, fy = force * dx / distance, force * dy / distance
-            forces[node_1][0] += fx
-            forces[node_1][1] += fy
-            forces[node_2][0] -= fx
-            forces[node_2][1] -= fy
+    def _add_barnes_hut_repulsion(self, forces):
+        nodes = list(self.positions.keys())
+        tree = QuadTree([tuple(self.positions[node_id]) for node_id in nodes])
 
-        return forces
+        for index, node_id in enumerate(nodes):
+            fx, fy = tree.repulsion(index, self.repulsion_const, self.theta)
+            forces[node_id][0] += fx
+            forces[node_id][1] += fy
 
     def _update_positions(self, forces):
         nodes = self.positions.keys()
+        limit = self.schedule.temperature
+        energy = 0.0
+        max_displacement = 0.0
 
         for node_id in nodes:
             fx, fy = forces[node_id]
             x, y = self.positions[node_id]
-            self.positions[node_id] = [x + self.damping_const * fx, y + self.damping_const * fy]
+            dx, dy = self.damping_const * fx, self.damping_const * fy
+            displacement = math.sqrt(dx ** 2 + dy ** 2)
+            if limit is not None and displacement > limit:
+                dx, dy = dx * limit / displacement, dy * limit / displacement
+                displacement = limit
+
+            energy += fx ** 2 + fy ** 2
+            max_displacement = max(max_displacement, displacement)
+            self.positions[node_id] = [x + dx, y + dy]
 
+        self.schedule.update(energy, max_displacement)
         return self.positions
+
+
+class ArrayForceDirectGraph:
+    """Array-backed force-directed layout.
+
+    Positions are an (n, 2) float64 array and edges an (m, 2) array of node indices.
+    Uses the same force model as ForceDirectGraph.
+    """
+
+    # Upper bound on the number of pairwise entries held in one repulsion tile
+    TILE_ELEMENTS = 1 << 21
+
+    def __init__(self, positions, edges, max_iterations, repulsion_const=5000, damping_const=0.85,
+                 attraction_constant=0.1, repulsion_method="exact", theta=0.5, workers=1, temperature=None,
+                 cooling=0.9, tolerance=None):
+        if np is None:
+            raise ImportError("ArrayForceDirectGraph requires numpy")
+        if repulsion_method not in ForceDirectGraph.REPULSION_METHODS:
+            raise ValueError(f"Unknown repulsion method: {repulsion_method!r}")
+        if workers > 1 and repulsion_method != "exact":
+            raise ValueError("Parallel workers are only supported with exact repulsion")
+
+        self.current_iteration = 0
+        self.max_iterations = max_iterations
+        # Arrays are used as-is, so the layout can run directly on memory owned by the caller
+        self.positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        self.edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        self.repulsion_const = repulsion_const
+        self.damping_const = damping_const
+        self.attraction_constant = attraction_constant
+        self.repulsion_method = repulsion_method
+        self.theta = theta
+        self.workers = workers
+        self.schedule = CoolingSchedule(temperature, cooling, tolerance)
+        self._pool = None
+        self._target = None  # the caller's positions while the layout runs on the shared copy
+
+        if workers > 1:
+            from parallel_layout import SharedRepulsionPool
+            self._pool = SharedRepulsionPool(len(self.positions), workers, repulsion_const, self.TILE_ELEMENTS)
+            # Steps update the positions in shared memory, the workers read them from there
+            self._pool.positions[:] = self.positions
+            self._target, self.positions = self.positions, self._pool.positions
+
+    @classmethod
+    def from_store(cls, store, max_iterations, **kwargs):
+        """Lay out a GraphStore in place, positions are a view of ``store.positions``."""
+        return cls(store.position_array(), store.edge_array(), max_iterations, **kwargs)
+
+    @property
+    def energy(self):
+        """Energy of the last step, None before the first one."""
+        return self.schedule.energies[-1] if self.schedule.energies else None
+
+    @property
+    def converged(self):
+        return self.schedule.converged
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.current_iteration < self.max_iterations and not self.schedule.converged:
+            self.current_iteration += 1
+            profiling.active.count("layout.iterations")
+            return self.step()
+        else:
+            self.close()
+            raise StopIteration
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Shut down the worker processes, if any, and write the positions back. Safe to call more than once.
+
+        With workers, the positions returned by ``step`` live in shared memory and must not be
+        held on to past this call, copy them to keep them.
+        """
+        if self._pool is not None:
+            self._target[:] = self.positions
+            self.positions, self._target = self._target, None
+            self._pool.close()
+            self._pool = None
+
+    def step(self):
+        forces = self._calculate_forces()
+
+        with profiling.active.phase("layout.update"):
+            displacement = self.damping_const * forces
+            length = np.sqrt((displacement ** 2).sum(axis=1))
+
+            limit = self.schedule.temperature
+            if limit is not None:
+                too_far = length > limit
+                displacement[too_far] *= (limit / length[too_far])[:, np.newaxis]
+                length[too_far] = limit
+
+            self.positions += displacement
+            self.schedule.update(float((forces ** 2).sum()), float(length.max()) if len(length) else 0.0)
+        return self.positions
+
+    def _calculate_forces(self):
+        forces = np.zeros_like(self.positions)
+        profiler = profiling.active
+
+        with profiler.phase("layout.repulsion"):
+            if self.repulsion_method == "barnes_hut":
+                self._add_barnes_hut_repulsion(forces)
+            else:
+                self._add_exact_repulsion(forces)
+
+        with profiler.phase("layout.attraction"):
+            self._add_attraction(forces)
+        return forces
+
+    def _add_exact_repulsion(self, forces):
+        if self._pool is not None:
+            forces += self._pool.repulsion()
+        else:
+            add_repulsion_rows(self.positions, forces, 0, len(self.positions), self.repulsion_const,
+                               self.TILE_ELEMENTS)
+
+    def _add_barnes_hut_repulsion(self, forces):
+        tree = QuadTree([tuple(point) for point in self.positions.tolist()])
+
+        for index in range(len(self.positions)):
+            forces[index] += tree.repulsion(index, self.repulsion_const, self.theta)
+
+    def _add_attraction(self, forces):
+        if len(self.edges) == 0:
+            return
+
+        n = len(self.positions)
+        source = self.edges[:, 0]
+        target = self.edges[:, 1]
+        # attraction_constant * distance along the unit vector reduces to attraction_constant * delta
+        pull = self.attraction_constant * (self.positions[target] - self.positions[source])
+
+        for axis in range(2):
+            forces[:, axis] += np.bincount(source, weights=pull[:, axis], minlength=n)
+            forces[:, axis] -= np.bincount(target, weights=pull[:, axis], minlength=n)
+
+
+def add_repulsion_rows(positions, forces, start, stop, repulsion_const, tile_elements):
+    """Add to ``forces[start:stop]`` the repulsion that every node exerts on nodes ``start..stop-1``."""
+    n = len(positions)
+    if n == 0:
+        return
+
+    x = positions[:, 0]
+    y = positions[:, 1]
+    block = max(1, tile_elements // n)
+
+    # One tile is a block of rows against every node; the diagonal has dx = dy = 0 so it adds nothing
+    for tile_start in range(start, stop, block):
+        tile_stop = min(tile_start + block, stop)
+        dx = x[np.newaxis, :] - x[tile_start:tile_stop, np.newaxis]
+        dy = y[np.newaxis, :] - y[tile_start:tile_stop, np.newaxis]
+        distance = np.sqrt(dx ** 2 + dy ** 2) + 0.1
+        scale = repulsion_const / distance ** 3
+        forces[tile_start:tile_stop, 0] -= (scale * dx).sum(axis=1)
+        forces[tile_start:tile_stop, 1] -= (scale * dy).sum(axis=1)
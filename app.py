@@ -14,12 +14,44 @@ def build_tk():
     row_1 = tk.Frame(main_column)
     row_1.pack(side=tk.TOP, fill=tk.BOTH)
 
-    canvas = Graph(row_1, width=CONST.CANVAS_WIDTH_PX, height=CONST.CANVAS_HEIGHT_PX, bg="#8f8f8f")
+    canvas = Graph(row_1, width=CONST.CANVAS_WIDTH_PX, height=CONST.CANVAS_HEIGHT_PX, bg=CONST.CANVAS_BACKGROUND_COLOR)
     canvas.pack(side=tk.LEFT)
 
     text_input = tk.Text(row_1)
     text_input.pack(side=tk.LEFT, fill=tk.BOTH)
 
+    # Rarely used actions live in the menu bar, the button row only holds editing and analysis
+    menu_bar = tk.Menu(root)
+    root.config(menu=menu_bar)
+
+    file_menu = tk.Menu(menu_bar, tearoff=False)
+    file_menu.add_command(label="Import edges", command=lambda: canvas.import_edges(text_input))
+    file_menu.add_command(label="Import file", command=lambda: canvas.import_edges_file(text_input))
+    file_menu.add_command(label="Export PNG", command=lambda: canvas.export_png(text_input))
+    file_menu.add_separator()
+    file_menu.add_command(label="Close", command=root.quit)
+    menu_bar.add_cascade(label="File", menu=file_menu)
+
+    generate_menu = tk.Menu(menu_bar, tearoff=False)
+    generate_menu.add_command(label="Random graph", command=canvas.generate_random_graph)
+    generate_menu.add_command(label="Planted graph", command=lambda: canvas.generate_planted_graph(text_input))
+    menu_bar.add_cascade(label="Generate", menu=generate_menu)
+
+    stream_menu = tk.Menu(menu_bar, tearoff=False)
+    stream_menu.add_command(label="Stream file", command=lambda: canvas.stream_file(text_input))
+    stream_menu.add_command(label="Stream socket", command=lambda: canvas.stream_socket(text_input))
+    stream_menu.add_command(label="Stop stream", command=canvas.stop_stream)
+    menu_bar.add_cascade(label="Stream", menu=stream_menu)
+
+    view_menu = tk.Menu(menu_bar, tearoff=False)
+    view_menu.add_command(label="Reset view", command=canvas.reset_view)
+    menu_bar.add_cascade(label="View", menu=view_menu)
+
+    profile_menu = tk.Menu(menu_bar, tearoff=False)
+    profile_menu.add_command(label="Profile on/off", command=lambda: canvas.toggle_profiling(text_input))
+    profile_menu.add_command(label="Save profile", command=canvas.save_profile)
+    menu_bar.add_cascade(label="Profile", menu=profile_menu)
+
     row2 = tk.Frame(main_column)
     row2.pack(side=tk.TOP)
 
@@ -29,8 +61,8 @@ def build_tk():
     double_side_edges_btn = tk.Button(row2, text="Double-sided edges", command=canvas.add_double_side_edges)
     double_side_edges_btn.pack(side=tk.LEFT)
 
-    random_graph_btn = tk.Button(row2, text="Random graph", command=canvas.generate_random_graph)
-    random_graph_btn.pack(side=tk.LEFT)
+    remove_edges_btn = tk.Button(row2, text="Remove edges", command=canvas.remove_edges)
+    remove_edges_btn.pack(side=tk.LEFT)
 
     louvain_btn = tk.Button(
         row2,
@@ -39,27 +71,30 @@ def build_tk():
     )
     louvain_btn.pack(side=tk.LEFT)
 
-    louvain_btn = tk.Button(
-        row2,
-        text="Remove edges",
-        command=canvas.remove_edges
-    )
-    louvain_btn.pack(side=tk.LEFT)
-
     force_direct_graph_btn = tk.Button(row2, text="Force-direct graph", command=canvas.force_direct_graph_algorithm)
     force_direct_graph_btn.pack(side=tk.LEFT)
 
-    force_direct_graph_btn = tk.Button(row2, text="Import edges", command=lambda: canvas.import_edges(text_input))
-    force_direct_graph_btn.pack(side=tk.LEFT)
+    pause_layout_btn = tk.Button(row2, text="Pause/resume layout", command=canvas.pause_layout)
+    pause_layout_btn.pack(side=tk.LEFT)
+
+    cancel_layout_btn = tk.Button(row2, text="Cancel layout", command=canvas.cancel_layout)
+    cancel_layout_btn.pack(side=tk.LEFT)
 
     reset_btn = tk.Button(row2, text="Reset", command=canvas.clear_graph)
     reset_btn.pack(side=tk.LEFT)
 
-    quit_btn = tk.Button(row2, text="Close", command=root.quit)
-    quit_btn.pack(side=tk.RIGHT)
-
     canvas.bind("<Button-1>", canvas.on_click)
     canvas.bind("<B1-Motion>", canvas.on_drag)
+    canvas.bind("<Double-Button-1>", canvas.on_expand)
+    canvas.bind("<Control-Button-1>", canvas.on_collapse)
+    canvas.bind("<Shift-ButtonPress-1>", canvas.on_box_start)
+    canvas.bind("<Shift-B1-Motion>", canvas.on_box_drag)
+    canvas.bind("<Shift-ButtonRelease-1>", canvas.on_box_end)
+    canvas.bind("<MouseWheel>", canvas.on_zoom)
+    canvas.bind("<Button-4>", canvas.on_zoom)
+    canvas.bind("<Button-5>", canvas.on_zoom)
+    canvas.bind("<ButtonPress-3>", canvas.on_pan_start)
+    canvas.bind("<B3-Motion>", canvas.on_pan)
 
     return root
 
@@ -0,0 +1,401 @@
+"""Headless benchmarks for layout, modularity, community detection, edge streams and edge-list parsing.
+
+Usage: python -m benchmark -o results.json [--baseline baseline.json] [--quick]
+
+Runs on facebook_combined.txt and seeded synthetic graphs, writes the results as JSON and,
+given a baseline file, reports how every case compares to it.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+
+from algorithm import ForceDirectGraph, ArrayForceDirectGraph, np
+from community import (DynamicCommunities, csr_from_edges, edge_modularity, louvain, modularity,
+                       normalized_mutual_information)
+from const import CONST
+from generators import barabasi_albert, erdos_renyi, random_geometric, stochastic_block_model
+from graph_io import convert_edge_list, load_binary_graph, read_edge_arrays
+from graph_store import GraphStore
+from layout import random_positions
+
+FACEBOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "facebook_combined.txt")
+
+# Above this many nodes the pure Python all-pairs layout takes minutes per step and is skipped
+MAX_PYTHON_EXACT_NODES = 1500
+
+# Keys compared against the baseline, lower is better for all of them
+TIMING_KEYS = ("seconds", "seconds_per_iteration")
+
+
+def synthetic_graphs(sizes, seed):
+    """Yield ``(name, num_nodes, sources, targets, planted)`` for every synthetic model and size.
+
+    ``planted`` is the ground-truth community of every node, or None.
+    """
+    for n in sizes:
+        yield f"er-{n}", n, *erdos_renyi(n, 10 / n, seed=seed), None
+        blocks = 10
+        sources, targets, planted = stochastic_block_model([n // blocks] * blocks, 100 / n, 2 / n, seed=seed)
+        yield f"sbm-{n}", n // blocks * blocks, sources, targets, planted
+        yield f"ba-{n}", n, *barabasi_albert(n, 5, seed=seed), None
+        # Radius for an average degree of about 10
+        sources, targets, _ = random_geometric(n, (10 / (math.pi * n)) ** 0.5, seed=seed)
+        yield f"rgg-{n}", n, sources, targets, None
+
+
+def measure(function, memory=True):
+    """Run ``function`` and return ``(result, seconds, peak_bytes)``.
+
+    Peak memory comes from a second, separate run under tracemalloc, so tracing does not skew the timing.
+    """
+    started = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - started
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            function()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return result, seconds, peak
+
+
+def layout_configs():
+    configs = [("python", "barnes_hut"), ("python", "exact")]
+    if np is not None:
+        configs += [("numpy", "exact"), ("numpy", "barnes_hut")]
+    return configs
+
+
+def bench_layout(name, store, iterations, memory):
+    results = []
+
+    for backend, method in layout_configs():
+        if backend == "python" and method == "exact" and store.num_nodes > MAX_PYTHON_EXACT_NODES:
+            continue
+
+        def run():
+            # Every run starts from the same initial positions
+            layout_store = GraphStore(store.offsets, store.targets, positions=array("d", store.positions))
+            layout_class = ArrayForceDirectGraph if backend == "numpy" else ForceDirectGraph
+            layout = layout_class.from_store(
+                layout_store,
+                max_iterations=iterations,
+                repulsion_const=CONST.FDG_REPULSION_CONSTANT,
+                damping_const=CONST.FDG_DAMPING_CONSTANT,
+                attraction_constant=CONST.FDG_ATTRACTION_CONSTANT,
+                repulsion_method=method,
+                theta=CONST.FDG_THETA
+            )
+            for _ in layout:
+                pass
+
+        _, seconds, peak = measure(run, memory)
+        results.append({
+            "name": f"layout/{backend}-{method}/{name}",
+            "seconds_per_iteration": seconds / iterations,
+            "iterations": iterations,
+            "peak_bytes": peak,
+        })
+
+    return results
+
+
+def bench_parallel_scaling(name, store, iterations, worker_counts, memory):
+    """Exact numpy repulsion with 1..N worker processes, ``speedup`` is relative to the first count."""
+    results = []
+
+    for workers in worker_counts:
+        def run():
+            layout_store = GraphStore(store.offsets, store.targets, positions=array("d", store.positions))
+            with ArrayForceDirectGraph.from_store(
+                    layout_store,
+                    max_iterations=iterations,
+                    repulsion_const=CONST.FDG_REPULSION_CONSTANT,
+                    damping_const=CONST.FDG_DAMPING_CONSTANT,
+                    attraction_constant=CONST.FDG_ATTRACTION_CONSTANT,
+                    workers=workers) as layout:
+                started = time.perf_counter()
+                for _ in layout:
+                    pass
+                # Pool start-up is not part of the per-iteration cost
+                return time.perf_counter() - started
+
+        seconds, _, peak = measure(run, memory)
+        results.append({
+            "name": f"layout/numpy-exact-workers-{workers}/{name}",
+            "seconds_per_iteration": seconds / iterations,
+            "iterations": iterations,
+            "workers": workers,
+            "peak_bytes": peak,
+        })
+
+    for result in results:
+        result["speedup"] = results[0]["seconds_per_iteration"] / result["seconds_per_iteration"]
+
+    return results
+
+
+def bench_communities(name, num_nodes, sources, targets, seed, memory, planted=None):
+    edges = list(zip(sources, targets))
+    csr = csr_from_edges(num_nodes, edges)
+
+    result, seconds, peak = measure(lambda: louvain(num_nodes, edges, seed=seed), memory)
+    results = [{
+        "name": f"louvain/{name}",
+        "seconds": seconds,
+        "peak_bytes": peak,
+        "modularity": result.modularity,
+        "communities": len(set(result.partition)),
+        "levels": len(result.levels),
+    }]
+    if planted is not None:
+        # Agreement with the planted communities, 1.0 means they were recovered exactly
+        results[0]["nmi"] = normalized_mutual_information(result.partition, planted)
+
+    for kind, function in (("csr", lambda: modularity(*csr, result.partition)),
+                           ("edges", lambda: edge_modularity(edges, result.partition))):
+        value, seconds, peak = measure(function, memory)
+        results.append({
+            "name": f"modularity-{kind}/{name}",
+            "seconds": seconds,
+            "peak_bytes": peak,
+            "modularity": value,
+        })
+
+    return results
+
+
+def edge_events(sources, targets, seed, held_out=0.2, removed=0.05):
+    """Split a graph into initial edges and a shuffled event stream.
+
+    The stream adds the ``held_out`` fraction of the edges and removes ``removed`` of the initial ones.
+    """
+    rng = random.Random(seed)
+    edges = list(zip(sources, targets))
+    rng.shuffle(edges)
+    split = len(edges) - int(len(edges) * held_out)
+    initial = edges[:split]
+    events = [("add", a, b) for a, b in edges[split:]]
+    events += [("remove", a, b) for a, b in rng.sample(initial, int(len(initial) * removed))]
+    rng.shuffle(events)
+    return initial, events
+
+
+def bench_streaming(name, sources, targets, seed, memory, batch_size=1000, full_batches=3):
+    """Events per second of incremental community updates, and of a full Louvain run after every batch."""
+    initial, events = edge_events(sources, targets, seed)
+    batches = [events[start:start + batch_size] for start in range(0, len(events), batch_size)]
+
+    def start():
+        communities = DynamicCommunities(seed=seed)
+        for a, b in initial:
+            communities.add_edge(a, b)
+        communities.recompute(seed=seed)
+        return communities
+
+    def incremental():
+        communities = start()
+        started = time.perf_counter()
+        for batch in batches:
+            communities.apply(batch)
+        return communities, time.perf_counter() - started
+
+    (communities, seconds), _, peak = measure(incremental, memory)
+    incremental_rate = len(events) / seconds if seconds else None
+    results = [{
+        "name": f"stream-incremental/{name}",
+        "seconds": seconds,
+        "peak_bytes": peak,
+        "events": len(events),
+        "events_per_second": incremental_rate,
+        "modularity": communities.modularity(),
+        "communities": communities.num_communities,
+    }]
+    # What a full run finds on the final graph, the incremental partition should stay close to it
+    results[0]["modularity_full"] = communities.recompute(seed=seed).modularity
+
+    # Recomputing from scratch is slow, so only the first few batches are timed
+    communities = start()
+    full_events = 0
+    started = time.perf_counter()
+    for batch in batches[:full_batches]:
+        for operation, a, b in batch:
+            if operation == "add":
+                communities.add_edge(a, b)
+            else:
+                communities.remove_edge(a, b)
+        communities.recompute(seed=seed)
+        full_events += len(batch)
+    seconds = time.perf_counter() - started
+    full_rate = full_events / seconds if seconds else None
+    results.append({
+        "name": f"stream-full/{name}",
+        "seconds": seconds,
+        "events": full_events,
+        "events_per_second": full_rate,
+        "modularity": communities.modularity(),
+        "incremental_speedup": incremental_rate / full_rate if incremental_rate and full_rate else None,
+    })
+    return results
+
+
+def bench_parse(name, path, binary_path, memory):
+    (node_ids, sources, _), seconds, peak = measure(lambda: read_edge_arrays(path), memory)
+    results = [{
+        "name": f"parse/{name}",
+        "seconds": seconds,
+        "peak_bytes": peak,
+        "edges_per_second": len(sources) / seconds if seconds else None,
+    }]
+
+    convert_edge_list(path, binary_path)
+    _, seconds, peak = measure(lambda: load_binary_graph(binary_path), memory)
+    results.append({
+        "name": f"load-binary/{name}",
+        "seconds": seconds,
+        "peak_bytes": peak,
+        "edges_per_second": len(sources) / seconds if seconds else None,
+    })
+    return results
+
+
+def run_benchmarks(sizes=(1000, 5000), iterations=3, seed=0, memory=True, facebook=True, worker_counts=(1,),
+                   report=None):
+    graphs = []
+    if facebook and os.path.exists(FACEBOOK_PATH):
+        node_ids, sources, targets = read_edge_arrays(FACEBOOK_PATH)
+        graphs.append(("facebook", len(node_ids), sources, targets, None))
+    graphs.extend(synthetic_graphs(sizes, seed))
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, num_nodes, sources, targets, planted in graphs:
+            if report is not None:
+                report(f"{name}: {num_nodes} nodes, {len(sources)} edges")
+
+            store = GraphStore.from_edges(num_nodes, sources, targets,
+                                          positions=random_positions(num_nodes, seed))
+            graph_results = bench_layout(name, store, iterations, memory)
+            if np is not None and len(worker_counts) > 1:
+                graph_results += bench_parallel_scaling(name, store, iterations, worker_counts, memory)
+            graph_results += bench_communities(name, num_nodes, sources, targets, seed, memory, planted)
+            graph_results += bench_streaming(name, sources, targets, seed, memory)
+
+            path = FACEBOOK_PATH if name == "facebook" else os.path.join(tmp_dir, f"{name}.txt")
+            if name != "facebook":
+                with open(path, "w") as file:
+                    file.writelines(f"{source} {target}\n" for source, target in zip(sources, targets))
+            graph_results += bench_parse(name, path, os.path.join(tmp_dir, f"{name}.graph"), memory)
+
+            for result in graph_results:
+                result.update(graph=name, nodes=num_nodes, edges=len(sources))
+            results += graph_results
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__ if np is not None else None,
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "sizes": list(sizes),
+            "iterations": iterations,
+            "seed": seed,
+            "cpu_count": os.cpu_count(),
+            "worker_counts": list(worker_counts),
+        },
+        "results": results,
+    }
+
+
+def compare(results, baseline, threshold=1.25):
+    """Pair up cases by name. Returns ``(name, key, baseline, current, ratio, regressed)`` rows."""
+    previous = {result["name"]: result for result in baseline["results"]}
+    rows = []
+
+    for result in results["results"]:
+        old = previous.get(result["name"])
+        if old is None:
+            continue
+        for key in TIMING_KEYS:
+            if result.get(key) and old.get(key):
+                ratio = result[key] / old[key]
+                rows.append((result["name"], key, old[key], result[key], ratio, ratio > threshold))
+
+    return rows
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmark", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-o", "--output", required=True, help="where to write the JSON results")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio counted as a regression")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        help="synthetic graph sizes (default: 1000 5000, 200 with --quick)")
+    parser.add_argument("-n", "--iterations", type=int, default=3, help="layout iterations per case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1],
+                        help="worker counts for the parallel repulsion scaling runs, e.g. 1 2 4 8")
+    parser.add_argument("--quick", action="store_true",
+                        help="no facebook_combined.txt and, unless --sizes is given, small graphs only")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak memory runs")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with status 1 on regressions")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    def report(message):
+        print(message, file=sys.stderr)
+
+    results = run_benchmarks(
+        sizes=args.sizes or ([200] if args.quick else [1000, 5000]),
+        iterations=args.iterations,
+        seed=args.seed,
+        memory=not args.no_memory,
+        facebook=not args.quick,
+        worker_counts=sorted(set(args.workers)),
+        report=report
+    )
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    for result in results["results"]:
+        if "speedup" in result:
+            report(f"{result['name']}: {result['seconds_per_iteration']:.4f} s per iteration, "
+                   f"{result['speedup']:.2f}x")
+        if result.get("incremental_speedup"):
+            report(f"{result['name']}: {result['events_per_second']:.0f} events/s, "
+                   f"incremental updates {result['incremental_speedup']:.1f}x faster")
+    report(f"results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+        rows = compare(results, baseline, args.threshold)
+        for name, key, old, new, ratio, regressed in rows:
+            flag = "  REGRESSION" if regressed else ""
+            report(f"{name} {key}: {old:.4g} -> {new:.4g} ({ratio:.2f}x){flag}")
+
+        if args.fail_on_regression and any(row[-1] for row in rows):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""On-disk cache of computed layouts and partitions.
+
+Entries are raw little-endian arrays (one file each, so they can be memory-mapped) and
+``index.json`` records their type, size and last use. Once the total size goes over
+``max_bytes`` the least recently used entries are deleted.
+"""
+import hashlib
+import json
+import mmap
+import os
+import sys
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only required by open_array
+    np = None
+
+
+class ResultCache:
+    INDEX_FILE = "index.json"
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.index = self._load_index()
+
+    @staticmethod
+    def key(graph_hash, kind, params):
+        """Cache key for a result of ``kind`` (e.g. "layout") computed on a graph with ``params``."""
+        payload = json.dumps([graph_hash, kind, params], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.bin")
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.directory, self.INDEX_FILE)) as file:
+                index = json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+        # Forget entries whose data file is gone
+        return {key: entry for key, entry in index.items() if os.path.exists(self._path(key))}
+
+    def _save_index(self):
+        path = os.path.join(self.directory, self.INDEX_FILE)
+        with open(path + ".tmp", "w") as file:
+            json.dump(self.index, file)
+        os.replace(path + ".tmp", path)
+
+    @property
+    def total_bytes(self):
+        return sum(entry["bytes"] for entry in self.index.values())
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def put(self, key, values):
+        """Store an ``array`` (or anything ``array`` accepts with the typecode of ``values``) under ``key``."""
+        if not isinstance(values, array):
+            values = array("d", values)
+
+        data = array(values.typecode, values)
+        if sys.byteorder == "big":
+            data.byteswap()
+
+        path = self._path(key)
+        with open(path + ".tmp", "wb") as file:
+            data.tofile(file)
+        os.replace(path + ".tmp", path)
+
+        self.index[key] = {"typecode": values.typecode, "bytes": len(data) * data.itemsize, "used": self._tick()}
+        self._evict()
+        self._save_index()
+
+    def get(self, key):
+        """The stored ``array``, or None when ``key`` is not cached."""
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+
+        values = array(entry["typecode"])
+        try:
+            with open(self._path(key), "rb") as file:
+                values.frombytes(file.read())
+        except OSError:
+            del self.index[key]
+            self._save_index()
+            return None
+
+        if sys.byteorder == "big":
+            values.byteswap()
+
+        self._touch(key)
+        return values
+
+    def open_array(self, key):
+        """Zero-copy read-only numpy view of an entry through mmap, or None when ``key`` is not cached."""
+        if np is None:
+            raise ImportError("ResultCache.open_array requires numpy")
+
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+
+        with open(self._path(key), "rb") as file:
+            if entry["bytes"] == 0:
+                mapped = b""
+            else:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        dtype = np.dtype(entry["typecode"]).newbyteorder("<")
+        self._touch(key)
+        return np.frombuffer(mapped, dtype=dtype)
+
+    def _tick(self):
+        # Logical clock for the LRU order, wall-clock time is too coarse for back-to-back calls
+        return max((entry["used"] for entry in self.index.values()), default=0) + 1
+
+    def _touch(self, key):
+        self.index[key]["used"] = self._tick()
+        self._save_index()
+
+    def _evict(self):
+        total = self.total_bytes
+        for key in sorted(self.index, key=lambda key: self.index[key]["used"]):
+            if total <= self.max_bytes:
+                break
+            total -= self.index[key]["bytes"]
+            self.remove(key, save=False)
+
+    def remove(self, key, save=True):
+        self.index.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+        if save:
+            self._save_index()
+
+    def clear(self):
+        for key in list(self.index):
+            self.remove(key, save=False)
+        self._save_index()
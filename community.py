@@ -0,0 +1,547 @@
+"""Community detection with the Louvain method.
+
+Graphs are passed around as symmetric CSR adjacency ``(offsets, targets, weights)``:
+the neighbours of node ``i`` are ``targets[offsets[i]:offsets[i + 1]]``. Every undirected
+edge is stored in both rows, a self-loop of weight ``w`` is stored once with weight ``2 * w``,
+so the row sums are the weighted degrees and all weights add up to ``2 * m``.
+DynamicCommunities keeps a partition of a graph that changes one edge at a time.
+"""
+import math
+import random
+from collections import defaultdict, deque, namedtuple
+
+import profiling
+
+LouvainResult = namedtuple("LouvainResult", ["partition", "modularity", "levels"])
+LouvainResult.__doc__ = """Outcome of louvain().
+
+partition  - community index of every node of the input graph
+modularity - modularity of ``partition``
+levels     - one (partition, modularity) pair per aggregation level, partitions are over input nodes
+"""
+
+
+def csr_from_edges(num_nodes, edges, weights=None):
+    """Build symmetric CSR adjacency from ``(i, j)`` index pairs. Parallel edges are merged."""
+    rows = [defaultdict(float) for _ in range(num_nodes)]
+
+    for index, (node_1, node_2) in enumerate(edges):
+        weight = 1.0 if weights is None else weights[index]
+        if node_1 == node_2:
+            rows[node_1][node_1] += 2 * weight
+        else:
+            rows[node_1][node_2] += weight
+            rows[node_2][node_1] += weight
+
+    return _csr_from_rows(rows)
+
+
+def _csr_from_rows(rows):
+    offsets = [0]
+    targets = []
+    weights = []
+
+    for row in rows:
+        targets.extend(row.keys())
+        weights.extend(row.values())
+        offsets.append(len(targets))
+
+    return offsets, targets, weights
+
+
+def modularity(offsets, targets, weights, partition, resolution=1.0):
+    """Modularity of ``partition`` in one pass over the CSR entries."""
+    total_weight = sum(weights)
+    if total_weight == 0:
+        return 0.0
+
+    internal = defaultdict(float)
+    degree = defaultdict(float)
+
+    for node in range(len(offsets) - 1):
+        community = partition[node]
+        for position in range(offsets[node], offsets[node + 1]):
+            degree[community] += weights[position]
+            if partition[targets[position]] == community:
+                internal[community] += weights[position]
+
+    return _modularity_from_totals(internal, degree, total_weight, resolution)
+
+
+def edge_modularity(edges, partition, weights=None, resolution=1.0):
+    """Modularity of ``partition`` in one pass over an undirected edge list.
+
+    ``partition`` maps node -> community (a dict or a list indexed by node), ``edges`` are node pairs
+    and ``weights`` optional per-edge weights. Parallel edges add up.
+    """
+    internal = defaultdict(float)
+    degree = defaultdict(float)
+    total_weight = 0.0
+
+    for index, (node_1, node_2) in enumerate(edges):
+        weight = 1.0 if weights is None else weights[index]
+        community_1 = partition[node_1]
+        community_2 = partition[node_2]
+        degree[community_1] += weight
+        degree[community_2] += weight
+        if community_1 == community_2:
+            internal[community_1] += 2 * weight
+        total_weight += 2 * weight
+
+    if total_weight == 0:
+        return 0.0
+
+    return _modularity_from_totals(internal, degree, total_weight, resolution)
+
+
+def _modularity_from_totals(internal, degree, total_weight, resolution):
+    return sum(_community_term(internal[community], degree[community], total_weight, resolution)
+               for community in degree)
+
+
+def _community_term(internal, degree, total_weight, resolution):
+    return internal / total_weight - resolution * (degree / total_weight) ** 2
+
+
+class ModularityTracker:
+    """Keeps the modularity of a partition up to date while single nodes change community.
+
+    ``move`` costs O(degree) instead of a full recomputation.
+    """
+
+    def __init__(self, offsets, targets, weights, partition=None, resolution=1.0):
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.resolution = resolution
+        self.total_weight = sum(weights)
+        self.partition = list(range(len(offsets) - 1)) if partition is None else list(partition)
+        self.internal = defaultdict(float)
+        self.degree = defaultdict(float)
+
+        for node, community in enumerate(self.partition):
+            for position in range(offsets[node], offsets[node + 1]):
+                self.degree[community] += weights[position]
+                if self.partition[targets[position]] == community:
+                    self.internal[community] += weights[position]
+
+        self.modularity = 0.0
+        if self.total_weight:
+            self.modularity = _modularity_from_totals(self.internal, self.degree, self.total_weight, resolution)
+
+    def _term(self, community):
+        return _community_term(self.internal[community], self.degree[community], self.total_weight,
+                               self.resolution)
+
+    def move(self, node, community):
+        """Move ``node`` to ``community`` and return the change in modularity."""
+        current = self.partition[node]
+        if community == current or self.total_weight == 0:
+            self.partition[node] = community
+            return 0.0
+
+        node_degree = 0.0
+        self_loop = 0.0
+        links_current = 0.0
+        links_new = 0.0
+        for position in range(self.offsets[node], self.offsets[node + 1]):
+            neighbor = self.targets[position]
+            weight = self.weights[position]
+            node_degree += weight
+            if neighbor == node:
+                self_loop += weight
+            elif self.partition[neighbor] == current:
+                links_current += weight
+            elif self.partition[neighbor] == community:
+                links_new += weight
+
+        before = self._term(current) + self._term(community)
+        # Edges to the rest of a community are counted from both ends
+        self.internal[current] -= 2 * links_current + self_loop
+        self.degree[current] -= node_degree
+        self.internal[community] += 2 * links_new + self_loop
+        self.degree[community] += node_degree
+        self.partition[node] = community
+
+        delta = self._term(current) + self._term(community) - before
+        self.modularity += delta
+        return delta
+
+
+def local_moving(offsets, targets, weights, partition=None, resolution=1.0, rng=None, nodes=None,
+                 min_gain=1e-12):
+    """Move single nodes to the neighbouring community with the best modularity gain.
+
+    Works in place on ``partition`` (singletons if None) and repeats passes until no node moves.
+    ``nodes`` restricts which nodes may move, ``rng`` shuffles the visiting order of every pass.
+    Returns ``(partition, moved)``.
+    """
+    num_nodes = len(offsets) - 1
+    if partition is None:
+        partition = list(range(num_nodes))
+
+    total_weight = sum(weights)
+    if total_weight == 0:
+        return partition, False
+
+    degree = [sum(weights[offsets[node]:offsets[node + 1]]) for node in range(num_nodes)]
+    community_degree = defaultdict(float)
+    for node in range(num_nodes):
+        community_degree[partition[node]] += degree[node]
+
+    order = list(range(num_nodes)) if nodes is None else list(nodes)
+    moved = False
+
+    while True:
+        if rng is not None:
+            rng.shuffle(order)
+
+        moves = 0
+        for node in order:
+            current = partition[node]
+            node_degree = degree[node]
+
+            # Edge weight from node to each neighbouring community, self-loops excluded
+            links = defaultdict(float)
+            for position in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[position]
+                if neighbor != node:
+                    links[partition[neighbor]] += weights[position]
+
+            community_degree[current] -= node_degree
+            scale = resolution * node_degree / total_weight
+
+            best = current
+            best_gain = links.get(current, 0.0) - scale * community_degree[current]
+            for community, weight in links.items():
+                gain = weight - scale * community_degree[community]
+                if gain > best_gain + min_gain:
+                    best, best_gain = community, gain
+
+            community_degree[best] += node_degree
+            if best != current:
+                partition[node] = best
+                moves += 1
+
+        if moves == 0:
+            return partition, moved
+        moved = True
+
+
+def relabel(partition):
+    """Renumber communities to ``0..k-1`` in order of first appearance. Returns ``(partition, k)``."""
+    labels = {}
+    relabelled = [labels.setdefault(community, len(labels)) for community in partition]
+    return relabelled, len(labels)
+
+
+def normalized_mutual_information(partition_1, partition_2):
+    """NMI of two partitions of the same nodes: 1 for identical groupings (up to labels), near 0 for unrelated ones."""
+    if len(partition_1) != len(partition_2):
+        raise ValueError("Partitions must cover the same nodes")
+    n = len(partition_1)
+    if n == 0:
+        return 1.0
+
+    joint = defaultdict(int)
+    sizes_1 = defaultdict(int)
+    sizes_2 = defaultdict(int)
+    for community_1, community_2 in zip(partition_1, partition_2):
+        joint[community_1, community_2] += 1
+        sizes_1[community_1] += 1
+        sizes_2[community_2] += 1
+
+    def entropy(sizes):
+        return -sum(size / n * math.log(size / n) for size in sizes.values())
+
+    entropy_1, entropy_2 = entropy(sizes_1), entropy(sizes_2)
+    if entropy_1 == 0 and entropy_2 == 0:
+        return 1.0  # both put every node in one community
+
+    mutual = sum(count / n * math.log(count * n / (sizes_1[c1] * sizes_2[c2])) for (c1, c2), count in joint.items())
+    return 2 * mutual / (entropy_1 + entropy_2)
+
+
+def aggregate(offsets, targets, weights, partition, num_communities):
+    """Contract every community into one node. Internal weight becomes a self-loop."""
+    rows = [defaultdict(float) for _ in range(num_communities)]
+
+    for node in range(len(offsets) - 1):
+        row = rows[partition[node]]
+        for position in range(offsets[node], offsets[node + 1]):
+            row[partition[targets[position]]] += weights[position]
+
+    return _csr_from_rows(rows)
+
+
+def louvain(num_nodes, edges, weights=None, resolution=1.0, seed=None, max_levels=None):
+    """Multi-level Louvain community detection.
+
+    Alternates local moving and aggregation until a level brings no modularity gain.
+    With ``seed`` set, nodes are visited in a random order drawn from ``random.Random(seed)``.
+    """
+    with profiling.active.phase("louvain.csr_build"):
+        csr = csr_from_edges(num_nodes, edges, weights)
+    return louvain_csr(*csr, resolution=resolution, seed=seed, max_levels=max_levels)
+
+
+def louvain_store(store, resolution=1.0, seed=None, max_levels=None):
+    """Louvain on a GraphStore, its edges are treated as undirected."""
+    return louvain(store.num_nodes, store.edges(), store.weights, resolution=resolution, seed=seed,
+                   max_levels=max_levels)
+
+
+def louvain_csr(offsets, targets, weights, resolution=1.0, seed=None, max_levels=None):
+    rng = random.Random(seed) if seed is not None else None
+    profiler = profiling.active
+    num_nodes = len(offsets) - 1
+    membership = list(range(num_nodes))  # input node -> node of the current level
+    with profiler.phase("louvain.modularity"):
+        best_modularity = modularity(offsets, targets, weights, membership, resolution)
+    levels = []
+
+    while max_levels is None or len(levels) < max_levels:
+        with profiler.phase("louvain.local_moving"):
+            partition, moved = local_moving(offsets, targets, weights, resolution=resolution, rng=rng)
+        if not moved:
+            break
+
+        partition, num_communities = relabel(partition)
+        with profiler.phase("louvain.modularity"):
+            level_modularity = modularity(offsets, targets, weights, partition, resolution)
+        if level_modularity <= best_modularity:
+            break
+
+        best_modularity = level_modularity
+        membership = [partition[node] for node in membership]
+        levels.append((membership, level_modularity))
+        profiler.count("louvain.levels")
+        with profiler.phase("louvain.aggregation"):
+            offsets, targets, weights = aggregate(offsets, targets, weights, partition, num_communities)
+
+    return LouvainResult(membership, best_modularity, levels)
+
+
+class DynamicCommunities:
+    """Undirected weighted graph that changes edge by edge, with a partition kept locally optimal.
+
+    Nodes are any hashable ids and appear with their first edge. After a batch of edge changes
+    only the nodes the changes touched are revisited, starting from the current partition, and
+    a node that moves puts its neighbours from other communities back in the queue. A node may
+    also leave for a community of its own, and a community cut in two by a removal is split.
+    """
+
+    def __init__(self, resolution=1.0, seed=None, min_gain=1e-12):
+        self.resolution = resolution
+        self.min_gain = min_gain
+        self.rng = random.Random(seed) if seed is not None else None
+        self.adjacency = {}  # node: {neighbor: weight}, a self-loop of weight w is stored as 2 * w
+        self.degree = {}  # node: weighted degree
+        self.partition = {}  # node: community
+        self.community_degree = defaultdict(float)
+        self.internal = defaultdict(float)  # community: weight inside it, counted from both ends
+        self.sizes = defaultdict(int)  # community: node count
+        self.total_weight = 0.0
+        self._next_community = 0
+
+    @property
+    def num_communities(self):
+        return len(self.sizes)
+
+    def _new_community(self):
+        self._next_community += 1
+        return self._next_community - 1
+
+    def add_node(self, node):
+        if node not in self.adjacency:
+            self.adjacency[node] = {}
+            self.degree[node] = 0.0
+            community = self.partition[node] = self._new_community()
+            self.sizes[community] += 1
+
+    def _change_weight(self, node_1, node_2, weight):
+        # weight > 0 adds, weight < 0 removes
+        row_1, row_2 = self.adjacency[node_1], self.adjacency[node_2]
+        community_1, community_2 = self.partition[node_1], self.partition[node_2]
+        if node_1 == node_2:
+            weight *= 2
+            row_1[node_1] = row_1.get(node_1, 0.0) + weight
+        else:
+            row_1[node_2] = row_1.get(node_2, 0.0) + weight
+            row_2[node_1] = row_2.get(node_1, 0.0) + weight
+        if row_1.get(node_2, 1.0) <= 1e-12:
+            del row_1[node_2]
+            row_2.pop(node_1, None)
+
+        self.degree[node_1] += weight
+        self.degree[node_2] += weight if node_1 != node_2 else 0.0
+        self.community_degree[community_1] += weight
+        self.community_degree[community_2] += weight if node_1 != node_2 else 0.0
+        if community_1 == community_2:
+            self.internal[community_1] += 2 * weight if node_1 != node_2 else weight
+        self.total_weight += 2 * weight if node_1 != node_2 else weight
+
+    def add_edge(self, node_1, node_2, weight=1.0):
+        self.add_node(node_1)
+        self.add_node(node_2)
+        self._change_weight(node_1, node_2, weight)
+
+    def remove_edge(self, node_1, node_2):
+        """Remove the edge with all its weight. Returns False when there was none."""
+        row = self.adjacency.get(node_1)
+        if row is None or node_2 not in row:
+            return False
+        weight = row[node_2] / 2 if node_1 == node_2 else row[node_2]
+        self._change_weight(node_1, node_2, -weight)
+        return True
+
+    def modularity(self):
+        if self.total_weight <= 0:
+            return 0.0
+        return _modularity_from_totals(self.internal, self.community_degree, self.total_weight, self.resolution)
+
+    def apply(self, events):
+        """Apply ``(operation, node, node)`` events, operation "add" or "remove", then update the partition.
+
+        Returns the set of nodes that changed community.
+        """
+        touched = []
+        for operation, node_1, node_2 in events:
+            if operation == "add":
+                self.add_edge(node_1, node_2)
+            elif operation == "remove":
+                if not self.remove_edge(node_1, node_2):
+                    continue
+                touched += self._split_if_disconnected(node_1, node_2)
+            else:
+                raise ValueError(f"Unknown edge event: {operation!r}")
+            touched += (node_1, node_2)
+        return self.optimize(dict.fromkeys(touched))
+
+    def _split_if_disconnected(self, node_1, node_2):
+        """Give the part of a community cut off by removing an edge between its nodes a community of its own.
+
+        Moving single nodes cannot split a community, but a disconnected one always has a lower
+        modularity than its parts. Both sides are searched in turns, so the work is bounded by the
+        smaller part. Returns the nodes moved.
+        """
+        community = self.partition[node_1]
+        if node_1 == node_2 or self.partition[node_2] != community:
+            return []
+
+        seen = ({node_1}, {node_2})
+        frontiers = (deque([node_1]), deque([node_2]))
+        side = 0
+        while frontiers[0] and frontiers[1]:
+            node = frontiers[side].popleft()
+            for neighbor in self.adjacency[node]:
+                if self.partition[neighbor] != community or neighbor in seen[side]:
+                    continue
+                if neighbor in seen[1 - side]:
+                    return []  # still connected
+                seen[side].add(neighbor)
+                frontiers[side].append(neighbor)
+            side = 1 - side
+
+        part = list(seen[0] if not frontiers[0] else seen[1])
+        new_community = self._new_community()
+        for node in part:
+            self._move(node, new_community)
+        return part
+
+    def optimize(self, nodes):
+        """Local moving from the current partition, starting at ``nodes``. Returns the nodes that moved."""
+        queue = deque(nodes)
+        if self.rng is not None:
+            self.rng.shuffle(queue)
+        queued = set(queue)
+        moved = set()
+
+        while queue:
+            node = queue.popleft()
+            queued.discard(node)
+            community = self._best_community(node)
+            if community is None:
+                continue
+
+            self._move(node, community)
+            moved.add(node)
+            for neighbor in self.adjacency[node]:
+                if neighbor not in queued and self.partition[neighbor] != community:
+                    queue.append(neighbor)
+                    queued.add(neighbor)
+
+        return moved
+
+    def _best_community(self, node):
+        """Community whose modularity gain beats staying by more than min_gain, or None."""
+        node_degree = self.degree[node]
+        if node_degree == 0 or self.total_weight == 0:
+            return None
+
+        current = self.partition[node]
+        links = defaultdict(float)
+        for neighbor, weight in self.adjacency[node].items():
+            if neighbor != node:
+                links[self.partition[neighbor]] += weight
+
+        scale = self.resolution * node_degree / self.total_weight
+        stay = links.get(current, 0.0) - scale * (self.community_degree[current] - node_degree)
+        best, best_gain = None, stay
+        for community, weight in links.items():
+            if community != current:
+                gain = weight - scale * self.community_degree[community]
+                if gain > best_gain + self.min_gain:
+                    best, best_gain = community, gain
+
+        # An empty community of its own gains 0
+        if best is None and stay < -self.min_gain and self.sizes[current] > 1:
+            best = self._new_community()
+        return best
+
+    def _move(self, node, community):
+        current = self.partition[node]
+        node_degree = self.degree[node]
+        self_loop = 0.0
+        links_current = links_new = 0.0
+        for neighbor, weight in self.adjacency[node].items():
+            if neighbor == node:
+                self_loop += weight
+            elif self.partition[neighbor] == current:
+                links_current += weight
+            elif self.partition[neighbor] == community:
+                links_new += weight
+
+        # Edges to the rest of a community are counted from both ends
+        self.internal[current] -= 2 * links_current + self_loop
+        self.community_degree[current] -= node_degree
+        self.internal[community] += 2 * links_new + self_loop
+        self.community_degree[community] += node_degree
+        self.sizes[current] -= 1
+        self.sizes[community] += 1
+        if self.sizes[current] == 0:
+            del self.sizes[current], self.community_degree[current], self.internal[current]
+        self.partition[node] = community
+
+    def recompute(self, seed=None, max_levels=None):
+        """Replace the partition with a full Louvain run on the current graph. Returns the LouvainResult."""
+        nodes = list(self.adjacency)
+        index = {node: i for i, node in enumerate(nodes)}
+        rows = [{index[neighbor]: weight for neighbor, weight in self.adjacency[node].items()} for node in nodes]
+        result = louvain_csr(*_csr_from_rows(rows), resolution=self.resolution, seed=seed, max_levels=max_levels)
+
+        self.partition = {}
+        self.community_degree = defaultdict(float)
+        self.internal = defaultdict(float)
+        self.sizes = defaultdict(int)
+        for node, community in zip(nodes, result.partition):
+            self.partition[node] = community
+            self.sizes[community] += 1
+            self.community_degree[community] += self.degree[node]
+        for node, row in self.adjacency.items():
+            community = self.partition[node]
+            for neighbor, weight in row.items():
+                if self.partition[neighbor] == community:
+                    self.internal[community] += weight
+        self._next_community = max(result.partition, default=-1) + 1
+        return result
@@ -0,0 +1,89 @@
+import os
+
+
+class CONST:
+    APP_WIDTH_PX = 1200
+    APP_HEIGHT_PX = 840
+    CANVAS_WIDTH_PX = APP_WIDTH_PX - 200
+    CANVAS_HEIGHT_PX = APP_HEIGHT_PX - 40
+
+    RANDOM_GRAPH_POINTS = 30
+    POINT_RADIUS = 1
+    EDGE_WIDTH = .5
+    EDGE_TAG = 'edge'
+
+    IMPORT_BATCH_SIZE = 5000
+
+    PLANTED_BLOCKS = 10  # "Planted graph" generates a stochastic block model of this shape
+    PLANTED_BLOCK_SIZE = 100
+    PLANTED_P_IN = 0.1
+    PLANTED_P_OUT = 0.002
+
+    FDG_ITERATIONS = 50
+    FDG_REPULSION_CONSTANT = 6000
+    FDG_ATTRACTION_CONSTANT = 0.03
+    FDG_DAMPING_CONSTANT = 1
+    FDG_REPULSION_METHOD = "barnes_hut"
+    FDG_THETA = 0.5
+    FDG_BACKEND = "python"  # "numpy" for the array backend
+    FDG_TEMPERATURE = 50  # largest step of a node in pixels, shrinks as the layout cools
+    FDG_COOLING = 0.9
+    FDG_TOLERANCE = 0.5  # stop once no node moves further than this in a step
+    FDG_MULTILEVEL_MIN_NODES = 1000  # graphs at least this big use the multilevel layout
+    FDG_MULTILEVEL_COARSENING = "matching"
+    FDG_MULTILEVEL_LEVEL_ITERATIONS = 10
+    FDG_INCREMENTAL_HOPS = 2  # after edits to a laid out graph only nodes this close to them move
+    FDG_INCREMENTAL_ITERATIONS = 50
+    FDG_INCREMENTAL_MAX_FRACTION = 0.25  # when more of the graph would move, lay it out from scratch
+    FDG_FRAME_MS = 33  # redraw at most ~30 times per second
+    FDG_NODES_ONLY_EDGE_COUNT = 20000  # above this, edges are hidden while the layout animates
+
+    LOUVAIN_RESOLUTIONS = (1.0,)  # every resolution gets LOUVAIN_RUNS runs, the best partition is kept
+    LOUVAIN_RUNS = 4
+    LOUVAIN_SEED = 0  # runs are seeded from here on, so a cached partition is the one a new sweep would find
+    LOUVAIN_WORKERS = max(1, (os.cpu_count() or 1) - 1)
+
+    CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "graph_project")
+    CACHE_MAX_BYTES = 256 * 1024 * 1024  # least recently used layouts and partitions are evicted above this
+
+    LOD_MIN_EDGES = 20000  # graphs with more edges only get line items for the edges in view
+    LOD_MAX_EDGE_ITEMS = 5000  # with more edges in view they are drawn as one density image
+    LOD_RASTER_CELL = 2  # pixels per density image cell
+    LOD_IMAGE_TAG = 'edge_density'
+    ZOOM_STEP = 1.2
+    SPATIAL_CELL_SIZE = 16  # grid cell of the node index, in world pixels
+    NODE_HIT_RADIUS_PX = 6  # clicks this close to a node center select it
+    SELECTION_BOX_TAG = 'selection_box'
+    SUPERNODE_MAX_RADIUS = 30  # communities are drawn with POINT_RADIUS * sqrt(size), up to this
+    SUPEREDGE_MAX_WIDTH = 8  # width of the heaviest edge between communities
+    STREAM_HOST = '127.0.0.1'  # edge events are only accepted from this machine
+    STREAM_PORT = 5555
+    STREAM_POLL_MS = 100
+    STREAM_BATCH_SIZE = 5000  # events applied per poll, the rest waits for the next one
+    STREAM_QUEUE_SIZE = 100000  # a full queue makes the reader wait
+    STREAM_STOP_TIMEOUT_S = 1.0  # longest wait for the reader thread when a stream is stopped
+    RENDER_WIDTH_PX = 2000  # size of images rendered without the canvas
+    RENDER_HEIGHT_PX = 2000
+    RENDER_MARGIN_PX = 20
+    RENDER_NODE_RADIUS_PX = 2
+    RENDER_EDGE_OPACITY = 0.25  # opacity of one edge, overlapping edges add up
+    PROFILE_MEMORY = False  # trace allocations while profiling, slows everything down noticeably
+
+    CANVAS_BACKGROUND_COLOR = '#8f8f8f'
+    # '#rrggbb' only, the off-screen renderer and the density raster can't resolve Tk color names
+    NODE_NON_SELECTED_COLOR = '#0000ff'
+    NODE_SELECTED_COLOR = '#ffff00'
+    EDGE_COLOR = '#ffffff'
+
+    # Colors of the first communities, a red to violet rainbow
+    COMMUNITY_COLORS = (
+        '#e62e2e', '#e6442e', '#e65a2e', '#e6702e', '#e6862e', '#e69c2e',
+        '#e6b22e', '#e6c82e', '#e6de2e', '#d7e62e', '#c1e62e', '#abe62e',
+        '#95e62e', '#7fe62e', '#69e62e', '#53e62e', '#3de62e', '#2ee635',
+        '#2ee64b', '#2ee661', '#2ee677', '#2ee68d', '#2ee6a3', '#2ee6b9',
+        '#2ee6cf', '#2ee6e6', '#2ecfe6', '#2eb9e6', '#2ea3e6', '#2e8de6',
+        '#2e77e6', '#2e61e6', '#2e4be6', '#2e35e6', '#3d2ee6', '#532ee6',
+        '#692ee6', '#7f2ee6', '#952ee6', '#ab2ee6', '#c12ee6', '#d72ee6',
+        '#e62ede', '#e62ec8', '#e62eb2', '#e62e9c', '#e62e86', '#e62e70',
+        '#e62e5a', '#e62e44',
+    )
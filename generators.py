@@ -0,0 +1,238 @@
+"""Seeded synthetic graphs for tests and benchmarks.
+
+Every generator returns undirected edges as parallel ``array('l')`` index arrays
+``(sources, targets)`` over nodes ``0..n-1``, without self-loops or parallel edges.
+With numpy installed the G(n, p), block model and geometric generators are vectorised;
+a seed reproduces the same graph only on the same backend.
+"""
+import math
+import random
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # numpy only makes the generators faster
+    np = None
+
+
+def _skip_sample(total, p, rng):
+    """Yield the indices ``0..total-1`` that are kept with probability ``p``, by geometric skipping."""
+    if p <= 0 or total <= 0:
+        return
+    if p >= 1:
+        yield from range(total)
+        return
+
+    log_q = math.log(1 - p)
+    index = -1
+    while True:
+        index += 1 + int(math.log(1 - rng.random()) / log_q)
+        if index >= total:
+            return
+        yield index
+
+
+def _triangle_pair(index):
+    # Pairs (v, w) with w < v are numbered row by row: (1, 0), (2, 0), (2, 1), (3, 0), ...
+    v = int((1 + math.sqrt(1 + 8 * index)) / 2)
+    while v * (v - 1) // 2 > index:
+        v -= 1
+    while (v + 1) * v // 2 <= index:
+        v += 1
+    return v, index - v * (v - 1) // 2
+
+
+def _to_array(values):
+    result = array("l")
+    result.frombytes(np.ascontiguousarray(values, dtype=np.dtype("l")).tobytes())
+    return result
+
+
+def _skip_sample_numpy(total, p, rng):
+    """Vectorised _skip_sample: the kept indices as an int64 array."""
+    if p <= 0 or total <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if p >= 1:
+        return np.arange(total, dtype=np.int64)
+
+    chunks = []
+    last = -1
+    while last < total:
+        expected = (total - last) * p
+        gaps = rng.geometric(p, size=int(expected + 4 * math.sqrt(expected)) + 16)
+        indices = last + np.cumsum(gaps)
+        chunks.append(indices)
+        last = int(indices[-1])
+
+    indices = np.concatenate(chunks)
+    return indices[indices < total]
+
+
+def _triangle_pairs(indices):
+    # Vectorised _triangle_pair, float sqrt gives v up to one off which the corrections fix
+    v = ((1 + np.sqrt(1 + 8 * indices.astype(np.float64))) / 2).astype(np.int64)
+    v -= v * (v - 1) // 2 > indices
+    v += (v + 1) * v // 2 <= indices
+    return v, indices - v * (v - 1) // 2
+
+
+def erdos_renyi(n, p, seed=None):
+    """G(n, p) in O(n + m) expected time."""
+    if np is not None:
+        v, w = _triangle_pairs(_skip_sample_numpy(n * (n - 1) // 2, p, np.random.default_rng(seed)))
+        return _to_array(w), _to_array(v)
+
+    rng = random.Random(seed)
+    sources = array("l")
+    targets = array("l")
+
+    for index in _skip_sample(n * (n - 1) // 2, p, rng):
+        v, w = _triangle_pair(index)
+        sources.append(w)
+        targets.append(v)
+
+    return sources, targets
+
+
+def stochastic_block_model(sizes, p_in, p_out, seed=None):
+    """Planted partition graph. Returns ``(sources, targets, blocks)``, ``blocks[i]`` is the block of node ``i``."""
+    starts = [0]
+    for size in sizes:
+        starts.append(starts[-1] + size)
+
+    blocks = array("l", (block for block, size in enumerate(sizes) for _ in range(size)))
+
+    if np is not None:
+        rng = np.random.default_rng(seed)
+        source_parts, target_parts = [], []
+        for a, size_a in enumerate(sizes):
+            v, w = _triangle_pairs(_skip_sample_numpy(size_a * (size_a - 1) // 2, p_in, rng))
+            source_parts.append(starts[a] + w)
+            target_parts.append(starts[a] + v)
+
+            for b in range(a + 1, len(sizes)):
+                indices = _skip_sample_numpy(size_a * sizes[b], p_out, rng)
+                source_parts.append(starts[a] + indices // sizes[b])
+                target_parts.append(starts[b] + indices % sizes[b])
+
+        if not source_parts:
+            return array("l"), array("l"), blocks
+        return _to_array(np.concatenate(source_parts)), _to_array(np.concatenate(target_parts)), blocks
+
+    rng = random.Random(seed)
+    sources = array("l")
+    targets = array("l")
+
+    for a, size_a in enumerate(sizes):
+        for index in _skip_sample(size_a * (size_a - 1) // 2, p_in, rng):
+            v, w = _triangle_pair(index)
+            sources.append(starts[a] + w)
+            targets.append(starts[a] + v)
+
+        for b in range(a + 1, len(sizes)):
+            size_b = sizes[b]
+            for index in _skip_sample(size_a * size_b, p_out, rng):
+                sources.append(starts[a] + index // size_b)
+                targets.append(starts[b] + index % size_b)
+
+    return sources, targets, blocks
+
+
+def barabasi_albert(n, m, seed=None):
+    """Preferential attachment, each new node links to ``m`` existing nodes. Degrees follow a power law."""
+    if not 1 <= m < n:
+        raise ValueError(f"Barabasi-Albert needs 1 <= m < n, got m={m}, n={n}")
+
+    rng = random.Random(seed)
+    sources = array("l")
+    targets = array("l")
+    # Every node appears once per incident edge, so a uniform pick is a degree-proportional pick
+    repeated = list(range(m))
+
+    for node in range(m, n):
+        chosen = set()
+        while len(chosen) < m:
+            chosen.add(rng.choice(repeated))
+
+        for target in chosen:
+            sources.append(target)
+            targets.append(node)
+            repeated.append(target)
+        repeated.extend([node] * m)
+
+    return sources, targets
+
+
+def random_geometric(n, radius, seed=None, width=1.0, height=1.0):
+    """Uniform random points in a ``width`` x ``height`` box, linked when at most ``radius`` apart.
+
+    Returns ``(sources, targets, positions)``, ``positions`` is a flat ``array('d')`` of
+    ``x0, y0, x1, y1, ...`` as used by GraphStore. Points are bucketed into ``radius`` sized
+    cells, so only neighbouring cells are compared.
+    """
+    if radius <= 0:
+        raise ValueError(f"radius must be positive, got {radius}")
+
+    if np is not None:
+        return _random_geometric_numpy(n, radius, np.random.default_rng(seed), width, height)
+
+    rng = random.Random(seed)
+    positions = array("d")
+    cells = {}
+    for node in range(n):
+        x, y = rng.uniform(0, width), rng.uniform(0, height)
+        positions.extend((x, y))
+        cells.setdefault((int(x / radius), int(y / radius)), []).append(node)
+
+    sources = array("l")
+    targets = array("l")
+    limit = radius * radius
+    for (column, row), members in cells.items():
+        # Same cell plus half of the neighbours, so every pair of cells is visited once
+        for offset_column, offset_row in ((0, 0), (1, 0), (-1, 1), (0, 1), (1, 1)):
+            others = cells.get((column + offset_column, row + offset_row))
+            if others is None:
+                continue
+            for i, node in enumerate(members):
+                x, y = positions[2 * node], positions[2 * node + 1]
+                for other in (others[i + 1:] if others is members else others):
+                    if (positions[2 * other] - x) ** 2 + (positions[2 * other + 1] - y) ** 2 <= limit:
+                        sources.append(node)
+                        targets.append(other)
+
+    return sources, targets, positions
+
+
+def _random_geometric_numpy(n, radius, rng, width, height):
+    points = np.column_stack((rng.uniform(0, width, n), rng.uniform(0, height, n)))
+    columns = int(width / radius) + 1
+    cell_xy = (points / radius).astype(np.int64)
+    cell = cell_xy[:, 1] * columns + cell_xy[:, 0]
+
+    order = np.argsort(cell, kind="stable")
+    sorted_cells = cell[order]
+    num_cells = columns * (int(height / radius) + 1)
+    cell_start = np.searchsorted(sorted_cells, np.arange(num_cells + 1))
+
+    source_parts, target_parts = [], []
+    for offset_column, offset_row in ((0, 0), (1, 0), (-1, 1), (0, 1), (1, 1)):
+        other_x, other_y = cell_xy[:, 0] + offset_column, cell_xy[:, 1] + offset_row
+        valid = (other_x >= 0) & (other_x < columns) & (other_y * columns + other_x < num_cells)
+        nodes = np.flatnonzero(valid)
+        other_cell = (other_y * columns + other_x)[valid]
+        counts = cell_start[other_cell + 1] - cell_start[other_cell]
+
+        # Every node against every member of the neighbouring cell
+        node = np.repeat(nodes, counts)
+        first = np.repeat(cell_start[other_cell] - np.cumsum(counts) + counts, counts)
+        other = order[first + np.arange(len(node))]
+
+        keep = ((points[node] - points[other]) ** 2).sum(axis=1) <= radius * radius
+        if offset_column == 0 and offset_row == 0:
+            keep &= node < other
+        source_parts.append(node[keep])
+        target_parts.append(other[keep])
+
+    positions = array("d")
+    positions.frombytes(points.astype(np.float64).tobytes())
+    return _to_array(np.concatenate(source_parts)), _to_array(np.concatenate(target_parts)), positions
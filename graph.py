@@ -1,30 +1,32 @@
+import hashlib
+import io
+import os
+from bisect import bisect_right
+from array import array
 import tkinter as tk
+from tkinter import filedialog
 import math
 import random
-from algorithm import ForceDirectGraph
 import time
+import profiling
+from algorithm import ForceDirectGraph
+from cache import ResultCache
 from collections import defaultdict
 from itertools import chain
-
-
-class CONST:
-    APP_WIDTH_PX = 1200
-    APP_HEIGHT_PX = 840
-    CANVAS_WIDTH_PX = APP_WIDTH_PX - 200
-    CANVAS_HEIGHT_PX = APP_HEIGHT_PX - 40
-
-    RANDOM_GRAPH_POINTS = 30
-    POINT_RADIUS = 1
-    EDGE_WIDTH = .5
-
-    FDG_ITERATIONS = 50
-    FDG_REPULSION_CONSTANT = 6000
-    FDG_ATTRACTION_CONSTANT = 0.03
-    FDG_DAMPING_CONSTANT = 1
-
-    NODE_NON_SELECTED_COLOR = 'blue'
-    NODE_SELECTED_COLOR = 'yellow'
-    EDGE_COLOR = 'white'
+from const import CONST
+from community import DynamicCommunities, edge_modularity, normalized_mutual_information
+from generators import stochastic_block_model
+from graph_store import GraphStore
+from hierarchy import CommunityHierarchy, HierarchyView
+from incremental import IncrementalLayout
+from layout_worker import LayoutWorker
+from lod import Viewport, density_raster, raster_ppm, visible_edges
+from multilevel import MultilevelLayout
+from parallel_louvain import SharedLouvainPool, louvain_sweep_store, summary
+from render import community_colors, render_store
+from spatial_index import GridIndex
+from streaming import ADD, EventStream
+from graph_io import convert_edge_list, is_binary_graph, load_binary_graph, read_edge_arrays, sample_grid_positions
 
 
 class Graph(tk.Canvas):
@@ -33,267 +35,897 @@ class Graph(tk.Canvas):
         self.nodes = {}  # node_from: [node_to, ...]
         self.selected = []  # list of node_id
         self.edges = {}  # (node_from, node_to): edge_id
-        self.colors = ['#e62e2e',
-                       '#e6442e',
-                       '#e65a2e',
-                       '#e6702e',
-                       '#e6862e',
-                       '#e69c2e',
-                       '#e6b22e',
-                       '#e6c82e',
-                       '#e6de2e',
-                       '#d7e62e',
-                       '#c1e62e',
-                       '#abe62e',
-                       '#95e62e',
-                       '#7fe62e',
-                       '#69e62e',
-                       '#53e62e',
-                       '#3de62e',
-                       '#2ee635',
-                       '#2ee64b',
-                       '#2ee661',
-                       '#2ee677',
-                       '#2ee68d',
-                       '#2ee6a3',
-                       '#2ee6b9',
-                       '#2ee6cf',
-                       '#2ee6e6',
-                       '#2ecfe6',
-                       '#2eb9e6',
-                       '#2ea3e6',
-                       '#2e8de6',
-                       '#2e77e6',
-                       '#2e61e6',
-                       '#2e4be6',
-                       '#2e35e6',
-                       '#3d2ee6',
-                       '#532ee6',
-                       '#692ee6',
-                       '#7f2ee6',
-                       '#952ee6',
-                       '#ab2ee6',
-                       '#c12ee6',
-                       '#d72ee6',
-                       '#e62ede',
-                       '#e62ec8',
-                       '#e62eb2',
-                       '#e62e9c',
-                       '#e62e86',
-                       '#e62e70',
-                       '#e62e5a',
-                       '#e62e44']
+        self.incident_edges = defaultdict(list)  # node_id: [(node_from, node_to), ...]
+        self.store = None  # GraphStore built from nodes/edges, None when out of date
+        self.store_tk_ids = []  # store index: node_id
+        self.store_index = {}  # node_id: store index
+        self.layout_job = None  # LayoutWorker of the running force-directed layout
+        self.layout_poll_job = None  # pending after call of _poll_layout
+        self.layout_tk_ids = []  # node_ids moved by the running layout, in the order of its snapshots
+        self.layout_edge_keys = None  # edges redrawn every frame of an incremental layout, None for all
+        self.changed_nodes = set()  # node_ids added, connected or dragged since the last finished layout
+        self.laid_out = False  # True once a layout has settled, later edits only relax their neighbourhood
+        self.layout_changed = set()  # changed_nodes when the running layout started
+        self.node_centers = {}  # node_id: (x, y), cache of the canvas coordinates
+        self.result_cache = None  # ResultCache of layouts and partitions, opened on first use
+        self.layout_cache_key = None  # where the running layout is stored once it settles
+        self.viewport = Viewport(CONST.CANVAS_WIDTH_PX, CONST.CANVAS_HEIGHT_PX)  # node_centers are world coordinates
+        self.lod = False  # True for large graphs: only visible edges are items, or one density image
+        self.lod_image = None  # PhotoImage of the edge density raster, Tk needs the reference kept
+        self.render_job = None  # pending after_idle call of _render_edges_lod
+        self.pan_start = None  # last pointer position while panning
+        self.node_index = GridIndex(CONST.SPATIAL_CELL_SIZE)  # node_id -> world center, for hit-testing
+        self.drag_node = None  # node under the pointer when button 1 went down
+        self.box_start = None  # world corner of a shift-drag selection box
+        self.planted = {}  # node_id: block, ground truth of a generated block model graph
+        self.last_profile = None  # Profiler of the last finished profiling session
+        self.node_radius = {}  # node_id: world radius, only for nodes drawn larger than CONST.POINT_RADIUS
+        self.hierarchy_view = None  # HierarchyView of the communities shown after Louvain aggregated the graph
+        self.hierarchy_items = {}  # node_id: (level, index) of the hierarchy item it shows
+        self.item_node_ids = {}  # (level, index): node_id
+        self.hierarchy_positions = []  # input node: (x, y) when the hierarchy was built
+        self.hierarchy_colors = []  # input node: color of its top level community
+        self.hierarchy_max_weight = 1.0  # edge weight drawn at CONST.SUPEREDGE_MAX_WIDTH
+        self.external_ids = {}  # node id of the imported file or of edge events: node_id
+        self.stream = None  # EventStream whose edge events are applied to the graph
+        self.stream_job = None  # pending after call of _poll_stream
+        self.stream_text = None  # text panel showing the stream statistics
+        self.stream_communities = None  # DynamicCommunities over node_ids, updated with every batch
+        self.stream_applied = 0  # events that changed the graph
+        self.stream_skipped = 0  # adds of existing and removes of missing edges
+        self.stream_seconds = 0.0  # time spent applying events
+        self.louvain_pool = None  # SharedLouvainPool kept for every Louvain run when LOUVAIN_WORKERS > 1
 
     def on_click(self, event):
-        clicked_node = self.find_withtag("current")
-
-        if not clicked_node:
-            x0 = event.x - CONST.POINT_RADIUS
-            y0 = event.y - CONST.POINT_RADIUS
-            x1 = event.x + CONST.POINT_RADIUS
-            y1 = event.y + CONST.POINT_RADIUS
-            node_id = self.create_oval(x0, y0, x1, y1, fill=CONST.NODE_NON_SELECTED_COLOR, outline='')
-            self.nodes[node_id] = []
-            return
+        clicked_node = self._node_at(event.x, event.y)
+        self.drag_node = clicked_node
 
-        if clicked_node[0] not in self.nodes:
-            return  # non node clicked
+        if clicked_node is None:
+            self.changed_nodes.add(self._create_node(*self.viewport.to_world(event.x, event.y)))
+            self.store = None
+            return
 
-        if clicked_node[0] in self.selected:
-            self.itemconfig(clicked_node[0], fill=CONST.NODE_NON_SELECTED_COLOR)
-            self.selected.remove(clicked_node[0])
+        self._toggle_selected(clicked_node)
+
+    def _node_at(self, screen_x, screen_y):
+        """Node nearest to a screen point, None if none is within CONST.NODE_HIT_RADIUS_PX pixels or its radius."""
+        x, y = self.viewport.to_world(screen_x, screen_y)
+        hit_radius = CONST.NODE_HIT_RADIUS_PX / self.viewport.scale
+        # Larger nodes are hit anywhere inside them
+        node_id = self.node_index.nearest(x, y, max_distance=max([hit_radius, *self.node_radius.values()]))
+        if node_id is not None and self._distance_to(node_id, x, y) > max(hit_radius, self.node_radius.get(node_id, 0)):
+            return None
+        return node_id
+
+    def _distance_to(self, node_id, x, y):
+        center_x, center_y = self._get_node_center(node_id)
+        return math.hypot(center_x - x, center_y - y)
+
+    def _toggle_selected(self, node_id):
+        if node_id in self.selected:
+            self.itemconfig(node_id, fill=CONST.NODE_NON_SELECTED_COLOR)
+            self.selected.remove(node_id)
         else:
-            self.itemconfig(clicked_node[0], fill=CONST.NODE_SELECTED_COLOR)
-            self.selected.append(clicked_node[0])
+            self.itemconfig(node_id, fill=CONST.NODE_SELECTED_COLOR)
+            self.selected.append(node_id)
+
+    def on_box_start(self, event):
+        self.box_start = self.viewport.to_world(event.x, event.y)
+        self.delete(CONST.SELECTION_BOX_TAG)
+        self.create_rectangle(event.x, event.y, event.x, event.y, outline=CONST.NODE_SELECTED_COLOR,
+                              dash=(4, 2), tags=CONST.SELECTION_BOX_TAG)
+
+    def on_box_drag(self, event):
+        if self.box_start is not None:
+            self.coords(CONST.SELECTION_BOX_TAG, *self.viewport.to_screen(*self.box_start), event.x, event.y)
+
+    def on_box_end(self, event):
+        """Select every node inside the shift-drag box."""
+        if self.box_start is None:
+            return
+
+        self.delete(CONST.SELECTION_BOX_TAG)
+        for node_id in self.node_index.in_box(*self.box_start, *self.viewport.to_world(event.x, event.y)):
+            if node_id not in self.selected:
+                self._toggle_selected(node_id)
+        self.box_start = None
 
     def add_double_side_edges(self):
         for i, n1 in enumerate(self.selected):
             for j, n2 in enumerate(self.selected):
-                if i == j or (n1, n2) in self.edges:
+                if i == j or n2 in self.nodes[n1]:
                     continue
 
-                x1, y1 = self._get_node_center(n1)
-                x2, y2 = self._get_node_center(n2)
+                x1, y1 = self._get_screen_center(n1)
+                x2, y2 = self._get_screen_center(n2)
 
-                edge_id = self.create_line(x1, y1, x2, y2, fill=CONST.EDGE_COLOR, width=.5)
+                edge_id = self.create_line(x1, y1, x2, y2, fill=CONST.EDGE_COLOR, width=.5, tags=CONST.EDGE_TAG)
                 self.tag_lower(edge_id)
-                self.edges[(n1, n2)] = edge_id
+                self._index_edge(n1, n2, edge_id)
 
                 self.nodes[n1].append(n2)
+                self.changed_nodes.update((n1, n2))
 
             self.itemconfig(n1, fill=CONST.NODE_NON_SELECTED_COLOR)
 
         self.selected = []
+        self.store = None
 
     def on_drag(self, event):
-        clicked_node = self.find_withtag("current")
-
-        if clicked_node[0] not in self.nodes:
-            return  # non node clicked
+        node_id = self.drag_node
+        if node_id not in self.nodes:
+            return  # drag did not start on a node
 
-        if clicked_node:
-            x1_center, y1_center = self._get_node_center(clicked_node[0])
-            dx = event.x - x1_center
-            dy = event.y - y1_center
+        x1_center, y1_center = self._get_screen_center(node_id)
+        dx = event.x - x1_center
+        dy = event.y - y1_center
 
-            self.move(clicked_node[0], dx, dy)
+        self.move(node_id, dx, dy)
+        x, y = self.node_centers[node_id] = self.viewport.to_world(event.x, event.y)
+        self.node_index.move(node_id, x, y)
+        self.changed_nodes.add(node_id)
+        if self.store is not None:
+            self.store.set_position(self.store_index[node_id], x, y)
 
-            for n1, n2 in self.edges.keys():
-                if n1 == clicked_node[0] or n2 == clicked_node[0]:
-                    self._update_edge_position(n1, n2)
+        for n1, n2 in self.incident_edges[node_id]:
+            self._update_edge_position(n1, n2)
 
     def clear_graph(self):
+        self.cancel_layout()
+        self.stop_stream()
         self.nodes = {}
         self.selected = []
         self.edges = {}
+        self.incident_edges = defaultdict(list)
+        self.node_centers = {}
+        self.node_index.clear()
+        self.drag_node = None
+        self.planted = {}
+        self.changed_nodes.clear()
+        self.laid_out = False
+        self.node_radius = {}
+        self.hierarchy_view = None
+        self.hierarchy_items = {}
+        self.item_node_ids = {}
+        self.external_ids = {}
+        self.store = None
         self.delete("all")
+        # Everything is gone, so the next graph starts unzoomed with screen == world coordinates
+        self.viewport.reset()
+        self.lod = False
+        self.lod_image = None
+        if self.render_job is not None:
+            self.after_cancel(self.render_job)
+            self.render_job = None
 
     def add_one_side_edges(self):
         for i, n1 in enumerate(self.selected):
             for j, n2 in enumerate(self.selected):
-                if i >= j or (n1, n2) in self.edges:
+                if i >= j or n2 in self.nodes[n1]:
                     continue
 
-                x1, y1 = self._get_node_center(n1)
-                x2, y2 = self._get_node_center(n2)
+                x1, y1 = self._get_screen_center(n1)
+                x2, y2 = self._get_screen_center(n2)
 
-                edge_id = self.create_line(x1, y1, x2, y2, fill=CONST.EDGE_COLOR, width=CONST.EDGE_WIDTH)
+                edge_id = self.create_line(x1, y1, x2, y2, fill=CONST.EDGE_COLOR, width=CONST.EDGE_WIDTH,
+                                           tags=CONST.EDGE_TAG)
                 self.tag_lower(edge_id)
-                self.edges[(n1, n2)] = edge_id
+                self._index_edge(n1, n2, edge_id)
 
                 self.nodes[n1].append(n2)
+                self.changed_nodes.update((n1, n2))
 
             self.itemconfig(n1, fill=CONST.NODE_NON_SELECTED_COLOR)
 
         self.selected = []
+        self.store = None
 
     def generate_random_graph(self):
         for _ in range(CONST.RANDOM_GRAPH_POINTS):
-            while True:
-                x = random.randint(math.floor(CONST.POINT_RADIUS),
-                                   math.floor(CONST.CANVAS_WIDTH_PX - CONST.POINT_RADIUS))
-                y = random.randint(math.floor(CONST.POINT_RADIUS),
-                                   math.floor(CONST.CANVAS_HEIGHT_PX - CONST.POINT_RADIUS))
-                x0 = x - CONST.POINT_RADIUS
-                y0 = y - CONST.POINT_RADIUS
-                x1 = x + CONST.POINT_RADIUS
-                y1 = y + CONST.POINT_RADIUS
-
-                overlapping = self.find_overlapping(x0, y0, x1, y1)
-
-                if not overlapping:
-                    node_id = self.create_oval(x0, y0, x1, y1, fill=CONST.NODE_NON_SELECTED_COLOR, outline='')
-                    self.nodes[node_id] = []
-
-                    available_nodes = list(filter(lambda k: k != node_id, self.nodes.keys()))
-                    if len(available_nodes) > 0:
-                        random_node = random.choice(available_nodes)
-                        self.selected = [node_id, random_node]
-                        # When a is set to 0 then more nodes might be without edges
-                        choice = random.randint(1, 100)
-                        if choice == 0:
-                            self.selected = []
-                        elif choice <= 55:
-                            self.add_one_side_edges()
-                        else:
-                            self.add_double_side_edges()
-                    break
-
-    def force_direct_graph_algorithm(self):
-        positions = {node_id: (self._get_node_center(node_id)) for node_id in self.nodes.keys()}
-        nodes_edges = []
+            # A spot where the new node overlaps no other node
+            position = self.node_index.free_position(CONST.POINT_RADIUS, CONST.POINT_RADIUS,
+                                                     CONST.CANVAS_WIDTH_PX - CONST.POINT_RADIUS,
+                                                     CONST.CANVAS_HEIGHT_PX - CONST.POINT_RADIUS,
+                                                     2 * CONST.POINT_RADIUS, random)
+            if position is None:
+                print("Canvas is full, no room for more nodes")
+                break
 
-        for n1_id, nodes in self.nodes.items():
-            for n2_id in nodes:
-                nodes_edges.append((n1_id, n2_id))
+            node_id = self._create_node(*position)
+            self.store = None
+
+            available_nodes = list(filter(lambda k: k != node_id, self.nodes.keys()))
+            if len(available_nodes) > 0:
+                random_node = random.choice(available_nodes)
+                self.selected = [node_id, random_node]
+                # When a is set to 0 then more nodes might be without edges
+                choice = random.randint(1, 100)
+                if choice == 0:
+                    self.selected = []
+                elif choice <= 55:
+                    self.add_one_side_edges()
+                else:
+                    self.add_double_side_edges()
+
+    def generate_planted_graph(self, text_field):
+        """Replace the graph with a seeded stochastic block model, built in arrays without per-node canvas work."""
+        self.clear_graph()
+        sources, targets, blocks = stochastic_block_model(
+            [CONST.PLANTED_BLOCK_SIZE] * CONST.PLANTED_BLOCKS,
+            CONST.PLANTED_P_IN,
+            CONST.PLANTED_P_OUT,
+            seed=random.randrange(2 ** 32)
+        )
+        self._create_imported_graph(GraphStore.from_edges(len(blocks), sources, targets), text_field)
+        self.planted = dict(zip(self.store_tk_ids, blocks))
 
-        fdg = ForceDirectGraph(
-            positions=positions,
-            edges=nodes_edges,
-            max_iterations=CONST.FDG_ITERATIONS,
+    @staticmethod
+    def _layout_params():
+        return dict(
             repulsion_const=CONST.FDG_REPULSION_CONSTANT,
             damping_const=CONST.FDG_DAMPING_CONSTANT,
-            attraction_constant=CONST.FDG_ATTRACTION_CONSTANT
+            attraction_constant=CONST.FDG_ATTRACTION_CONSTANT,
+            repulsion_method=CONST.FDG_REPULSION_METHOD,
+            theta=CONST.FDG_THETA,
+            backend=CONST.FDG_BACKEND,
+            temperature=CONST.FDG_TEMPERATURE,
+            cooling=CONST.FDG_COOLING,
+            tolerance=CONST.FDG_TOLERANCE
         )
 
-        for index, positions_dict in enumerate(fdg):
-            for node_id, new_coords in positions_dict.items():
-                x1_center, y1_center = self._get_node_center(node_id)
-                dx = new_coords[0] - x1_center
-                dy = new_coords[1] - y1_center
+    def _layout_cache_key(self, store):
+        params = dict(self._layout_params(), iterations=CONST.FDG_ITERATIONS,
+                      canvas=(CONST.CANVAS_WIDTH_PX, CONST.CANVAS_HEIGHT_PX, CONST.POINT_RADIUS))
+        if store.num_nodes >= CONST.FDG_MULTILEVEL_MIN_NODES:
+            params.update(coarsening=CONST.FDG_MULTILEVEL_COARSENING,
+                          level_iterations=CONST.FDG_MULTILEVEL_LEVEL_ITERATIONS)
+        return self._cache_key(store, "layout", params)
+
+    def _cached_layout(self, store, key):
+        """Cached positions of ``store`` as ``(x, y)`` pairs, or None."""
+        positions = self._cache_get(key)
+        if positions is None or len(positions) != 2 * store.num_nodes:
+            return None
+        return list(zip(positions[0::2], positions[1::2]))
 
-                new_x = x1_center + dx
-                new_y = y1_center + dy
-                new_x, new_y = self._apply_constraints(new_x, new_y)
+    def force_direct_graph_algorithm(self):
+        store = self.get_store()
+        params = self._layout_params()
+        cache_key = self._layout_cache_key(store)
+
+        # Edits and drags since the last layout are relaxed in place, restoring a cached layout would undo them
+        pending_edits = self.laid_out and bool(self.changed_nodes)
+        cached = None if pending_edits else self._cached_layout(store, cache_key)
+        if cached is not None:
+            self.cancel_layout()
+            self.redraw_positions(cached, self.store_tk_ids, draw_edges=False)
+            for store_index, node_id in enumerate(self.store_tk_ids):
+                store.set_position(store_index, *self._get_node_center(node_id))
+            self.redraw_edges()
+            self._layout_settled(set(self.changed_nodes))
+            return
 
-                self.move(node_id, new_x - x1_center, new_y - y1_center)
+        fdg = self._incremental_layout(store, params)
+        if fdg is not None:
+            self.cancel_layout()
+            # Only the relaxed nodes and their edges are redrawn, the rest of the canvas stays put
+            self.layout_job = LayoutWorker(fdg, snapshot=lambda positions: [tuple(positions[i]) for i in fdg.active])
+            self.layout_tk_ids = [self.store_tk_ids[i] for i in fdg.active]
+            self.layout_edge_keys = {pair for node_id in self.layout_tk_ids for pair in self.incident_edges[node_id]}
+            self.layout_cache_key = None
+            self.layout_changed = set(self.changed_nodes)
+            self.layout_job.start()
+            self.layout_poll_job = self.after(CONST.FDG_FRAME_MS, self._poll_layout)
+            return
 
-                for n1, n2 in self.edges.keys():
-                    if n1 == node_id or n2 == node_id:
-                        self._update_edge_position(n1, n2)
+        if store.num_nodes >= CONST.FDG_MULTILEVEL_MIN_NODES:
+            # Big graphs: coarse levels give the global structure, every level is one animation frame
+            fdg = MultilevelLayout.from_store(
+                store,
+                coarsening=CONST.FDG_MULTILEVEL_COARSENING,
+                coarsest_iterations=CONST.FDG_ITERATIONS,
+                level_iterations=CONST.FDG_MULTILEVEL_LEVEL_ITERATIONS,
+                **params
+            )
+        else:
+            fdg = ForceDirectGraph.from_store(store, max_iterations=CONST.FDG_ITERATIONS, **params)
+
+        self.cancel_layout()
+        # Snapshots are plain lists indexed like the store
+        self.layout_job = LayoutWorker(fdg, snapshot=lambda positions: [tuple(xy) for xy in positions.values()])
+        self.layout_tk_ids = list(self.store_tk_ids)
+        self.layout_edge_keys = None
+        self.layout_cache_key = cache_key
+        self.layout_changed = set(self.changed_nodes)
+
+        if self._animate_nodes_only():
+            # Large graphs animate nodes only, edges are drawn once the layout settles
+            self.itemconfigure(CONST.EDGE_TAG, state="hidden")
+            self.itemconfigure(CONST.LOD_IMAGE_TAG, state="hidden")
+
+        self.layout_job.start()
+        self.layout_poll_job = self.after(CONST.FDG_FRAME_MS, self._poll_layout)
+
+    def _incremental_layout(self, store, params):
+        """IncrementalLayout around the nodes edited since the last settled layout, None when a full layout is due."""
+        changed = [self.store_index[node_id] for node_id in self.changed_nodes if node_id in self.store_index]
+        if not self.laid_out or not changed:
+            return None
+
+        params = dict(params)
+        params.pop("backend")
+        fdg = IncrementalLayout.from_store(store, changed, hops=CONST.FDG_INCREMENTAL_HOPS,
+                                           max_iterations=CONST.FDG_INCREMENTAL_ITERATIONS, **params)
+        if len(fdg.active) > CONST.FDG_INCREMENTAL_MAX_FRACTION * store.num_nodes:
+            return None  # the edits touch too much of the graph to keep the rest fixed
+        return fdg
+
+    def _layout_settled(self, relaxed):
+        # Edits made while the layout ran are still waiting for the next one
+        self.laid_out = True
+        self.changed_nodes -= relaxed
+
+    def pause_layout(self):
+        if self.layout_job is None:
+            return
 
-            self.update()
-            time.sleep(0.1)
+        if self.layout_job.paused:
+            self.layout_job.resume()
+        else:
+            self.layout_job.pause()
+
+    def cancel_layout(self):
+        if self.layout_job is not None:
+            # The worker writes into the store, wait for it before the next layout starts
+            self.layout_job.stop()
+            self._finish_layout()
+
+    def _poll_layout(self):
+        self.layout_poll_job = None
+        job = self.layout_job
+        if job is None:
+            return
 
-    def import_edges(self, text_field):
-        self.clear_graph()
+        # Only the newest snapshot is drawn, frames computed in between are skipped
+        latest = job.latest()
+        if latest is not None:
+            self._draw_layout_frame(latest[1])
 
-        unique_digits = set()
+        if job.finished:
+            self._finish_layout()
+            if job.error is not None:
+                raise job.error
+        else:
+            self.layout_poll_job = self.after(CONST.FDG_FRAME_MS, self._poll_layout)
 
-        for edge in text_field.get("1.0", "end").splitlines():
-            if len(edge) > 0:
-                digits = edge.split()
-                unique_digits.update(map(int, digits))
+    def _draw_layout_frame(self, positions):
+        with profiling.active.phase("draw.frame"):
+            if self.layout_edge_keys is not None:
+                self.redraw_positions(positions, self.layout_tk_ids, draw_edges=False)
+                self._redraw_layout_edges()
+            else:
+                self.redraw_positions(positions, self.layout_tk_ids,
+                                      draw_edges=not self._animate_nodes_only())
+
+    def _redraw_layout_edges(self):
+        for n1, n2 in self.layout_edge_keys:
+            if (n1, n2) in self.edges:  # in LOD mode only the edges in view have items
+                self._update_edge_position(n1, n2)
+
+    def _animate_nodes_only(self):
+        return self.lod or len(self.edges) > CONST.FDG_NODES_ONLY_EDGE_COUNT
+
+    def _finish_layout(self):
+        job = self.layout_job
+        self.layout_job = None
+        if self.layout_poll_job is not None:
+            self.after_cancel(self.layout_poll_job)
+            self.layout_poll_job = None
+
+        # The canvas shows clamped positions, keep the store in line with it
+        if self.store is job.layout.store:
+            for node_id in self.layout_tk_ids:
+                self.store.set_position(self.store_index[node_id], *self._get_node_center(node_id))
+
+            # Only a layout that ran to the end is worth reusing
+            if not job.cancelled and job.error is None:
+                self._layout_settled(self.layout_changed)
+                if self.layout_cache_key is not None:
+                    self._cache_put(self.layout_cache_key, self.store.positions)
+
+        if self.layout_edge_keys is not None:
+            self._redraw_layout_edges()
+            if self.lod:
+                self._render_edges_lod()
+        elif self._animate_nodes_only():
+            self.redraw_edges()
+            self.itemconfigure(CONST.EDGE_TAG, state="normal")
+
+    def redraw_positions(self, positions, tk_ids, draw_edges=True):
+        """Move the nodes ``tk_ids[i]`` to ``positions[i]`` (clamped to the canvas) in one pass.
+
+        Uses the cached centers, nothing is read back from Tk. With ``draw_edges`` every line
+        is updated once afterwards, otherwise lines are left for a later redraw_edges().
+        """
+        centers = self.node_centers
+        scale = self.viewport.scale
+        for node_id, (x, y) in zip(tk_ids, positions):
+            x, y = self._apply_constraints(x, y)
+            x_center, y_center = self._get_node_center(node_id)
+            if x != x_center or y != y_center:
+                self.move(node_id, (x - x_center) * scale, (y - y_center) * scale)
+                centers[node_id] = (x, y)
+                self.node_index.move(node_id, x, y)
+
+        if draw_edges:
+            self.redraw_edges()
+
+    def redraw_edges(self):
+        if self.lod:
+            self._render_edges_lod()
+            return
 
-        def generate_random_squares(num):
-            square_size = 2 * CONST.POINT_RADIUS
-            x_coords = list(range(0, CONST.CANVAS_WIDTH_PX, square_size))
-            y_coords = list(range(0, CONST.CANVAS_HEIGHT_PX, square_size))
+        with profiling.active.phase("draw.edges"):
+            for (n1, n2), edge_id in self.edges.items():
+                self.coords(edge_id, *self._get_screen_center(n1), *self._get_screen_center(n2))
 
-            all_positions = [(x, y) for x in x_coords for y in y_coords]
+    def on_zoom(self, event):
+        # <MouseWheel> reports a delta, X11 sends <Button-4>/<Button-5> instead
+        zoom_in = event.delta > 0 if event.delta else event.num == 4
+        factor = self.viewport.zoom(CONST.ZOOM_STEP if zoom_in else 1 / CONST.ZOOM_STEP, event.x, event.y)
+        if factor != 1:
+            self.scale("all", event.x, event.y, factor, factor)
+            self._schedule_render()
 
-            if len(all_positions) < num:
-                print('Za mała siatka')
-                return
+    def on_pan_start(self, event):
+        self.pan_start = (event.x, event.y)
 
-            random.shuffle(all_positions)
+    def on_pan(self, event):
+        if self.pan_start is None:
+            return
 
-            return all_positions[:num]
+        dx, dy = event.x - self.pan_start[0], event.y - self.pan_start[1]
+        self.pan_start = (event.x, event.y)
+        self.viewport.pan(dx, dy)
+        self.move("all", dx, dy)
+        self._schedule_render()
+
+    def reset_view(self):
+        # Scaling about the screen position of the world origin keeps it in place, then it is moved to (0, 0)
+        origin_x, origin_y = self.viewport.to_screen(0, 0)
+        factor = 1 / self.viewport.scale
+        self.scale("all", origin_x, origin_y, factor, factor)
+        self.move("all", -origin_x, -origin_y)
+        self.viewport.reset()
+        self._schedule_render()
+
+    def _schedule_render(self):
+        # Zooming and panning only move items, the level of detail is redone once the events settle
+        if self.lod and self.render_job is None:
+            self.render_job = self.after_idle(self._render_edges_lod)
+
+    def _render_edges_lod(self):
+        """Draw the visible edges as line items, or all edges as one density image when too many are visible."""
+        self.render_job = None
+        with profiling.active.phase("draw.lod"):
+            self._draw_edges_lod()
+
+    def _draw_edges_lod(self):
+        store = self.get_store()
+        visible = visible_edges(store, self.viewport.world_bounds())
+
+        if len(visible) > CONST.LOD_MAX_EDGE_ITEMS:
+            for n1, n2 in list(self.edges):
+                self._remove_edge_item(n1, n2)
+
+            columns, rows, counts = density_raster(store, self.viewport, CONST.LOD_RASTER_CELL)
+            image = tk.PhotoImage(data=raster_ppm(columns, rows, counts, self._hex_color(CONST.CANVAS_BACKGROUND_COLOR),
+                                                  self._hex_color(CONST.EDGE_COLOR)), format="PPM")
+            self.lod_image = image.zoom(CONST.LOD_RASTER_CELL) if CONST.LOD_RASTER_CELL > 1 else image
+            self.delete(CONST.LOD_IMAGE_TAG)
+            self.create_image(0, 0, image=self.lod_image, anchor="nw", tags=CONST.LOD_IMAGE_TAG)
+            self.tag_lower(CONST.LOD_IMAGE_TAG)
+            return
 
-        positions = generate_random_squares(len(unique_digits))
+        self.delete(CONST.LOD_IMAGE_TAG)
+        self.lod_image = None
 
-        node_id_to_tk_id = {}
+        wanted = set()
+        for index in visible:
+            source = bisect_right(store.offsets, index) - 1
+            wanted.add((self.store_tk_ids[source], self.store_tk_ids[store.targets[index]]))
 
-        for node_id, position in zip(unique_digits, positions):
-            x0 = position[0]
-            y0 = position[1]
-            x1 = x0 + 2 * CONST.POINT_RADIUS
-            y1 = y0 + 2 * CONST.POINT_RADIUS
-            tk_id = self.create_oval(x0, y0, x1, y1, fill=CONST.NODE_NON_SELECTED_COLOR, outline='')
-            self.nodes[tk_id] = []
-            node_id_to_tk_id[node_id] = tk_id
+        for n1, n2 in [pair for pair in self.edges if pair not in wanted]:
+            self._remove_edge_item(n1, n2)
 
-        self.update()
+        for n1, n2 in wanted:
+            if (n1, n2) in self.edges:
+                self.coords(self.edges[(n1, n2)], *self._get_screen_center(n1), *self._get_screen_center(n2))
+            else:
+                edge_id = self.create_line(*self._get_screen_center(n1), *self._get_screen_center(n2),
+                                           fill=CONST.EDGE_COLOR, width=CONST.EDGE_WIDTH, tags=CONST.EDGE_TAG)
+                self._index_edge(n1, n2, edge_id)
 
-        for edge in text_field.get("1.0", "end").splitlines():
-            if len(edge) > 0:
-                node_1, node_2 = edge.split()
-                node_1 = node_id_to_tk_id[int(node_1)]
-                node_2 = node_id_to_tk_id[int(node_2)]
-                x1, y1 = self._get_node_center(node_1)
-                x2, y2 = self._get_node_center(node_2)
-                self.nodes[node_1].append(node_2)
-                edge_id = self.create_line([x1, y1, x2, y2], fill=CONST.EDGE_COLOR, width=CONST.EDGE_WIDTH)
-                self.tag_lower(edge_id)
-                self.edges[(node_1, node_2)] = edge_id
+        self.tag_lower(CONST.EDGE_TAG)
+
+    def import_edges(self, text_field):
+        text = text_field.get("1.0", "end")
+        self.clear_graph()
+        node_ids, sources, targets = read_edge_arrays(io.StringIO(text))
+        self._create_imported_graph(GraphStore.from_edges(len(node_ids), sources, targets), text_field, node_ids)
 
+    def import_edges_file(self, text_field, path=None):
+        if path is None:
+            path = filedialog.askopenfilename(title="Import edge list")
+            if not path:
+                return
+
+        self.clear_graph()
+        node_ids, store = self._load_graph_file(path, text_field)
+        self._create_imported_graph(store, text_field, node_ids)
+
+    def _load_graph_file(self, path, text_field):
+        """``(node_ids, store)`` of a binary graph file or a text edge list.
+
+        Text edge lists are converted once into a binary copy in the cache directory,
+        later imports of the unchanged file map that copy instead of parsing the text again.
+        """
+        if is_binary_graph(path):
+            return load_binary_graph(path)
+
+        stat = os.stat(path)
+        name = hashlib.sha256(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()
+        binary_path = os.path.join(CONST.CACHE_DIR, "graphs", f"{name}.graph")
+        if os.path.exists(binary_path):
+            return load_binary_graph(binary_path)
+
+        def progress(count):
+            self._show_progress(text_field, f"Read {count} edges")
+
+        try:
+            os.makedirs(os.path.dirname(binary_path), exist_ok=True)
+            return convert_edge_list(path, binary_path, progress=progress)
+        except OSError as error:
+            print(f"Could not write binary graph: {error}")
+            node_ids, sources, targets = read_edge_arrays(path, progress=progress)
+            return node_ids, GraphStore.from_edges(len(node_ids), sources, targets)
+
+    def _create_imported_graph(self, store, text_field, node_ids=None):
+        """Draw ``store``, edge events address node i by ``node_ids[i]``, by i itself without node_ids."""
+        try:
+            positions = sample_grid_positions(store.num_nodes, CONST.CANVAS_WIDTH_PX, CONST.CANVAS_HEIGHT_PX,
+                                              2 * CONST.POINT_RADIUS)
+        except ValueError as error:
+            self._show_progress(text_field, str(error))
+            return
+
+        centers = [(x0 + CONST.POINT_RADIUS, y0 + CONST.POINT_RADIUS) for x0, y0 in positions]
+
+        # A graph laid out before opens in its finished layout
+        cached = self._cached_layout(store, self._layout_cache_key(store))
+        if cached is not None:
+            centers = [self._apply_constraints(x, y) for x, y in cached]
+            self.laid_out = True
+            self._show_progress(text_field, "Loaded cached layout")
+        for node, (x, y) in enumerate(centers):
+            store.set_position(node, x, y)
+
+        # clear_graph() has reset the view, so the centers are screen coordinates as well
+        tk_ids = []
+        with profiling.active.phase("import.nodes"):
+            for start in range(0, len(centers), CONST.IMPORT_BATCH_SIZE):
+                for x, y in centers[start:start + CONST.IMPORT_BATCH_SIZE]:
+                    tk_ids.append(self._create_node(x, y))
+
+                self._show_progress(text_field, f"Created {len(tk_ids)}/{len(centers)} nodes")
+
+        self._set_store(store, tk_ids)
+        self.external_ids = dict(zip(map(int, node_ids) if node_ids is not None else range(store.num_nodes), tk_ids))
+        # Large graphs get no item per edge, only what the viewport shows is drawn
+        self.lod = store.num_edges > CONST.LOD_MIN_EDGES
+
+        with profiling.active.phase("import.edges"):
+            for count, (node_1, node_2) in enumerate(store.edges(), start=1):
+                tk_1, tk_2 = tk_ids[node_1], tk_ids[node_2]
+                self.nodes[tk_1].append(tk_2)
+                if not self.lod:
+                    x1, y1 = centers[node_1]
+                    x2, y2 = centers[node_2]
+                    edge_id = self.create_line(x1, y1, x2, y2, fill=CONST.EDGE_COLOR, width=CONST.EDGE_WIDTH,
+                                               tags=CONST.EDGE_TAG)
+                    self._index_edge(tk_1, tk_2, edge_id)
+
+                if count % CONST.IMPORT_BATCH_SIZE == 0 or count == store.num_edges:
+                    self._show_progress(text_field, f"Created {count}/{store.num_edges} edges")
+
+        if self.lod:
+            self._render_edges_lod()
+        else:
+            # One restacking call for all lines instead of one per edge
+            self.tag_lower(CONST.EDGE_TAG)
         self.update()
 
+        self._show_progress(text_field, "Import finished")
+
+    def get_store(self):
+        """GraphStore view of the current graph, rebuilt from the canvas only after edits."""
+        if self.store is None:
+            tk_ids = list(self.nodes.keys())
+            index = {node_id: i for i, node_id in enumerate(tk_ids)}
+            sources = [index[n1] for n1, neighbors in self.nodes.items() for _ in neighbors]
+            targets = [index[n2] for neighbors in self.nodes.values() for n2 in neighbors]
+            centers = [self._get_node_center(node_id) for node_id in tk_ids]
+            weights = None
+            if self.hierarchy_view is not None:
+                sources, targets, weights = self._hierarchy_edges(tk_ids, sources, targets)
+            self._set_store(GraphStore.from_edges(len(tk_ids), sources, targets, weights=weights, positions=centers),
+                            tk_ids)
+
+        return self.store
+
+    def _hierarchy_edges(self, tk_ids, sources, targets):
+        """``(sources, targets, weights)`` of the hierarchy items on the canvas.
+
+        Edges weigh what the input edges between the items sum to, and every community gets its
+        internal weight as a self-loop, so Louvain and modularity see the graph the items stand for.
+        """
+        view = self.hierarchy_view
+        items = self.hierarchy_items
+        weights = []
+        for source, target in zip(sources, targets):
+            pair = (items.get(tk_ids[source]), items.get(tk_ids[target]))
+            # Edges drawn by hand after the aggregation weigh 1
+            weights.append(view.edges.get(pair, view.edges.get(pair[::-1], 1.0)))
+
+        sources, targets = list(sources), list(targets)
+        for i, node_id in enumerate(tk_ids):
+            internal = view.hierarchy.internal_weight(items[node_id]) if node_id in items else 0.0
+            if internal:
+                sources.append(i)
+                targets.append(i)
+                weights.append(internal)
+        return sources, targets, weights
+
+    def _set_store(self, store, tk_ids):
+        self.store = store
+        self.store_tk_ids = tk_ids
+        self.store_index = {node_id: i for i, node_id in enumerate(tk_ids)}
+
+    def _get_cache(self):
+        if self.result_cache is None:
+            try:
+                self.result_cache = ResultCache(CONST.CACHE_DIR, CONST.CACHE_MAX_BYTES)
+            except OSError as error:
+                print(f"Result cache disabled: {error}")
+                self.result_cache = False
+        return self.result_cache or None
+
+    def _cache_key(self, store, kind, params):
+        return ResultCache.key(store.content_hash(), kind, params)
+
+    def _cache_get(self, key):
+        cache = self._get_cache()
+        return cache.get(key) if cache is not None else None
+
+    def _cache_put(self, key, values):
+        cache = self._get_cache()
+        if cache is not None:
+            try:
+                cache.put(key, values)
+            except OSError as error:
+                print(f"Could not cache result: {error}")
+
+    def toggle_profiling(self, text_field):
+        """Start collecting phase timings, or stop and show what was collected in the text panel."""
+        profiler = profiling.disable()
+        if profiler is None:
+            profiling.enable(CONST.PROFILE_MEMORY)
+            self._show_progress(text_field, "Profiling started")
+            return
+
+        self.last_profile = profiler
+        self._show_progress(text_field, profiler.report())
+
+    def save_profile(self):
+        profiler = profiling.active if profiling.active.enabled else self.last_profile
+        if profiler is None:
+            print("Nothing profiled yet")
+            return
+
+        path = filedialog.asksaveasfilename(title="Save profile", defaultextension=".json",
+                                            filetypes=[("JSON", "*.json")])
+        if path:
+            profiler.write_json(path)
+
+    def stream_file(self, text_field, path=None):
+        """Apply the edge events appended to a file, see streaming for the format."""
+        if not self._can_stream(text_field):
+            return
+        if path is None:
+            path = filedialog.askopenfilename(title="Stream edge events")
+            if not path:
+                return
+        self._start_stream(EventStream.from_file(path, max_pending=CONST.STREAM_QUEUE_SIZE), text_field)
+
+    def stream_socket(self, text_field):
+        """Apply the edge events sent to CONST.STREAM_PORT, e.g. with ``nc 127.0.0.1 5555 < events.txt``."""
+        # Checked first, the socket is only bound for a stream that starts
+        if not self._can_stream(text_field):
+            return
+        try:
+            stream = EventStream.from_socket(CONST.STREAM_HOST, CONST.STREAM_PORT, max_pending=CONST.STREAM_QUEUE_SIZE)
+        except OSError as error:
+            self._show_progress(text_field, f"Could not listen on {CONST.STREAM_HOST}:{CONST.STREAM_PORT}: {error}")
+            return
+        self._start_stream(stream, text_field)
+        text_field.insert(tk.END, "Listening on {}:{}\n".format(*stream.address))
+
+    def _can_stream(self, text_field):
+        """Stop the running stream, False (with a message) when the graph can't take a new one."""
+        self.stop_stream()
+        if self.hierarchy_view is not None:
+            self._show_progress(text_field, "Edge events need the input graph, import it again to stream into it")
+            return False
+        return True
+
+    def _start_stream(self, stream, text_field):
+        # Communities start from a full Louvain run, every batch only revisits the nodes it touched
+        communities = DynamicCommunities(resolution=CONST.LOUVAIN_RESOLUTIONS[0], seed=CONST.LOUVAIN_SEED)
+        for node_id, neighbors in self.nodes.items():
+            communities.add_node(node_id)
+            for neighbor in neighbors:
+                communities.add_edge(node_id, neighbor)
+        communities.recompute(seed=CONST.LOUVAIN_SEED)
+
+        self.stream = stream
+        self.stream_text = text_field
+        self.stream_communities = communities
+        self.stream_applied = self.stream_skipped = 0
+        self.stream_seconds = 0.0
+        self._color_communities(self.nodes)
+        stream.start()
+        self._show_stream_stats()
+        self.stream_job = self.after(CONST.STREAM_POLL_MS, self._poll_stream)
+
+    def stop_stream(self):
+        if self.stream is None:
+            return
+        self.stream.stop()
+        # The reader notices within its poll interval, a socket stream frees its port on the way out
+        self.stream.join(CONST.STREAM_STOP_TIMEOUT_S)
+        if self.stream_job is not None:
+            self.after_cancel(self.stream_job)
+            self.stream_job = None
+        self._show_stream_stats()
+        self.stream = None
+
+    def _poll_stream(self):
+        self.stream_job = None
+        events = self.stream.drain(CONST.STREAM_BATCH_SIZE)
+        if events:
+            self._apply_events(events)
+            self._show_stream_stats()
+        if self.stream.error is not None:
+            print(f"Edge stream failed: {self.stream.error}")
+            self.stop_stream()
+            return
+        self.stream_job = self.after(CONST.STREAM_POLL_MS, self._poll_stream)
+
+    def _apply_events(self, events):
+        """Apply a batch of edge events to the canvas, then update the communities of the nodes they touched."""
+        start = time.perf_counter()
+        applied = []
+        with profiling.active.phase("stream.apply"):
+            for operation, id_1, id_2 in events:
+                if operation == ADD:
+                    n1, n2 = self._event_node(id_1), self._event_node(id_2)
+                    if self._has_edge(n1, n2):
+                        self.stream_skipped += 1
+                        continue
+                    self._add_edge(n1, n2)
+                else:
+                    n1, n2 = self.external_ids.get(id_1), self.external_ids.get(id_2)
+                    if n1 is None or n2 is None or not self._delete_edge(n1, n2):
+                        self.stream_skipped += 1
+                        continue
+                applied.append((operation, n1, n2))
+
+        with profiling.active.phase("stream.communities"):
+            moved = self.stream_communities.apply(applied)
+        # New nodes start in a community of their own and are colored even when they did not move
+        self._color_communities(moved.union(*((n1, n2) for _, n1, n2 in applied)))
+        self.stream_applied += len(applied)
+        self.stream_seconds += time.perf_counter() - start
+
+        self.store = None
+        if self.lod:
+            self._schedule_render()
+        else:
+            self.tag_lower(CONST.EDGE_TAG)
+
+    def _event_node(self, external_id):
+        """node_id of an id in an edge event, new nodes are put on a free spot."""
+        node_id = self.external_ids.get(external_id)
+        if node_id is None or node_id not in self.nodes:
+            position = self.node_index.free_position(CONST.POINT_RADIUS, CONST.POINT_RADIUS,
+                                                     CONST.CANVAS_WIDTH_PX - CONST.POINT_RADIUS,
+                                                     CONST.CANVAS_HEIGHT_PX - CONST.POINT_RADIUS,
+                                                     2 * CONST.POINT_RADIUS, random)
+            if position is None:
+                position = (random.uniform(0, CONST.CANVAS_WIDTH_PX), random.uniform(0, CONST.CANVAS_HEIGHT_PX))
+            node_id = self.external_ids[external_id] = self._create_node(*position)
+            self.changed_nodes.add(node_id)
+        return node_id
+
+    def _has_edge(self, n1, n2):
+        return n2 in self.nodes[n1] or n1 in self.nodes[n2]
+
+    def _add_edge(self, n1, n2):
+        self.nodes[n1].append(n2)
+        if not self.lod:
+            edge_id = self.create_line(*self._get_screen_center(n1), *self._get_screen_center(n2),
+                                       fill=CONST.EDGE_COLOR, width=CONST.EDGE_WIDTH, tags=CONST.EDGE_TAG)
+            self._index_edge(n1, n2, edge_id)
+        self.changed_nodes.update((n1, n2))
+
+    def _delete_edge(self, n1, n2):
+        """Remove the edge between two nodes in both directions. Returns False when there was none."""
+        found = False
+        for a, b in ((n1, n2), (n2, n1)):
+            if b in self.nodes[a]:
+                self.nodes[a].remove(b)
+                if (a, b) in self.edges:
+                    self._remove_edge_item(a, b)
+                found = True
+        if found:
+            self.changed_nodes.update((n1, n2))
+        return found
+
+    def _color_communities(self, node_ids):
+        partition = self.stream_communities.partition
+        palette = CONST.COMMUNITY_COLORS
+        for node_id in node_ids:
+            self.itemconfig(node_id, fill=palette[partition[node_id] % len(palette)])
+
+    def _show_stream_stats(self):
+        communities = self.stream_communities
+        rate = self.stream_applied / self.stream_seconds if self.stream_seconds else 0.0
+        state = "stopped" if self.stream is None or self.stream.stopped else "running"
+        self._show_progress(self.stream_text,
+                            f"Edge stream {state}: {self.stream_applied} events applied, "
+                            f"{self.stream_skipped} skipped, {self.stream.errors} unreadable lines\n"
+                            f"{communities.num_communities} communities, modularity {communities.modularity():.4f}\n"
+                            f"{rate:.0f} events/s")
+
+    def export_png(self, text_field, path=None):
+        """Render the whole graph off-screen into a CONST.RENDER_WIDTH_PX x CONST.RENDER_HEIGHT_PX PNG."""
+        if path is None:
+            path = filedialog.asksaveasfilename(title="Export PNG", defaultextension=".png",
+                                                filetypes=[("PNG", "*.png")])
+            if not path:
+                return
+
+        store = self.get_store()
+        # Nodes keep the colors they have on the canvas
+        colors = [self._hex_color(self.itemcget(node_id, "fill")) for node_id in self.store_tk_ids]
+        started = time.perf_counter()
+        render_store(path, store, colors=colors, background=self._hex_color(CONST.CANVAS_BACKGROUND_COLOR),
+                     edge_color=self._hex_color(CONST.EDGE_COLOR))
+        self._show_progress(text_field, f"{CONST.RENDER_WIDTH_PX}x{CONST.RENDER_HEIGHT_PX} image written to {path} "
+                                        f"in {time.perf_counter() - started:.2f} s")
+
+    def _hex_color(self, color):
+        """'#rrggbb' of any color Tk accepts, e.g. a color name."""
+        red, green, blue = self.winfo_rgb(color)
+        return f"#{red >> 8:02x}{green >> 8:02x}{blue >> 8:02x}"
+
+    def _show_progress(self, text_field, message):
         text_field.delete("1.0", tk.END)
-        text_field.insert("1.0", "Import finished\n")
+        text_field.insert("1.0", f"{message}\n")
+        text_field.update()
 
     def remove_edges(self):
-        self.delete(*self.edges.values())
+        self.delete(*self.edges.values(), CONST.LOD_IMAGE_TAG)
         self.update()
 
     def louvain_method(self, btn, text_input):
@@ -301,115 +933,134 @@ class Graph(tk.Canvas):
         text_input.delete("1.0", tk.END)
         text_input.insert("1.0", "Louvain started\n")
         text_input.update()
-        # Step 1: Initialization - Each community is a single node
-        current_partition = {node: node for node in self.nodes}
-        current_modularity = self._calculate_modularity(self.nodes, current_partition)
-        best_partition = current_partition
-        best_modularity = current_modularity
-        print(f"Initial modularity: {current_modularity:.4f}")
-        text_input.insert(tk.END, f"Initial modularity: {current_modularity:.4f}\n")
+        # Step 1: Community detection - multi-level Louvain on the current graph
+        store = self.get_store()
+        node_ids = self.store_tk_ids
+        seeds = range(CONST.LOUVAIN_SEED, CONST.LOUVAIN_SEED + CONST.LOUVAIN_RUNS)
+        cache_key = self._cache_key(store, "louvain_levels", dict(resolutions=CONST.LOUVAIN_RESOLUTIONS,
+                                                                  seeds=list(seeds)))
+        # The cache holds the partitions of all levels back to back
+        cached = self._cache_get(cache_key)
+        num_nodes = store.num_nodes
+
+        # Runs at different resolutions are compared by their modularity at resolution 1
+        if cached is not None and num_nodes and len(cached) % num_nodes == 0:
+            levels = [cached[start:start + num_nodes] for start in range(0, len(cached), num_nodes)]
+            partition = levels[-1] if levels else list(range(num_nodes))
+            best_modularity = edge_modularity(store.edges(), partition, store.weights)
+            text_input.insert(tk.END, "Loaded cached partition\n")
+        else:
+            if self.louvain_pool is None and CONST.LOUVAIN_WORKERS > 1:
+                self.louvain_pool = SharedLouvainPool(CONST.LOUVAIN_WORKERS)
+            with profiling.active.phase("louvain.total"):
+                result = louvain_sweep_store(store, resolutions=CONST.LOUVAIN_RESOLUTIONS, seeds=seeds,
+                                             pool=self.louvain_pool)
+            print(summary(result))
+            text_input.insert(tk.END, summary(result) + "\n")
+
+            levels = result.best.levels
+            partition = result.best.partition
+            best_modularity = result.best.score
+            self._cache_put(cache_key, array("l", chain.from_iterable(levels)))
         text_input.update()
 
-        while True:
-            improved = False
-
-            for node in self.nodes:
-                current_community = current_partition[node]
-
-                neighbor_communities = defaultdict(int)
-                for neighbor in self.nodes[node]:
-                    neighbor_communities[current_partition[neighbor]] += 1
-
-                if len(self.nodes[node]) == 0:
-                    for n_id, neighbors in self.nodes.items():
-                        if node in neighbors:
-                            neighbor_community = best_partition[n_id]
-                            neighbor_communities[neighbor_community] += 1
-
-                best_community = max(neighbor_communities, key=neighbor_communities.get, default=None)
-
-                if best_community != current_community and best_community is not None:
-                    current_partition[node] = best_community
-                    improved = True
-
-            new_modularity = self._calculate_modularity(self.nodes, current_partition)
-            print(f"New modularity: {new_modularity:.4f}")
-            text_input.insert(tk.END, f"New modularity: {new_modularity:.4f}\n")
-            text_input.update()
-
-            if new_modularity > best_modularity:
-                best_partition = current_partition
-                best_modularity = new_modularity
-
-            if not improved:
-                break
-
         print(f"Best modularity: {best_modularity:.4f}")
         text_input.insert(tk.END, f"Best modularity: {best_modularity:.4f}\n")
+        if self.planted and all(node_id in self.planted for node_id in node_ids):
+            nmi = normalized_mutual_information(partition, [self.planted[node_id] for node_id in node_ids])
+            text_input.insert(tk.END, f"Agreement with planted communities (NMI): {nmi:.4f}\n")
         text_input.update()
 
-        if len(set(best_partition.values())) <= 50:
-            community_colors = {value: self.colors.pop() for value in set(best_partition.values())}
-        else:
-            community_colors = {value: self._get_random_hex_color() for value in set(best_partition.values())}
+        colors = community_colors(partition)
 
         if len(self.nodes) < 100:
-            for node_id in self.nodes:
-                self.itemconfig(node_id, fill=community_colors[best_partition[node_id]])
+            for node_id, color in zip(node_ids, colors):
+                self.itemconfig(node_id, fill=color)
                 self.resize_node(node_id, 8)
 
+            btn["state"] = "normal"
             return
 
-        # Step 2: Creating a new graph (community aggregation)
-        communities = defaultdict(list)
-
-        for node, community in best_partition.items():
-            communities[community].append(node)
-
-        new_nodes = {}
-        for community, members in communities.items():
-            self.itemconfig(community, fill=community_colors[community])
-            new_neighbors = set()
-            for member in members:
-                for neighbor in self.nodes[member]:
-                    if neighbor not in members:
-                        new_neighbors.add(best_partition[neighbor])
-
-            new_nodes[community] = list(new_neighbors)
-
-        for edge_id in self.edges.values():
-            self.delete(edge_id)
-
-        self.edges = {}
-        self.update()
-
-        for node in self.nodes.keys():
-            if node in new_nodes.keys():
-                if len(new_nodes[node]) == 0 and node not in list(chain(*new_nodes.values())):
-                    self.delete(node)
-                    del new_nodes[node]
-                    continue
-
-                for neighbor in new_nodes[node]:
-                    x1, y1 = self._get_node_center(node)
-                    x2, y2 = self._get_node_center(neighbor)
-                    edge_id = self.create_line([x1, y1, x2, y2], fill=CONST.EDGE_COLOR, width=CONST.EDGE_WIDTH)
-                    self.tag_lower(edge_id)
-                    self.edges[(node, neighbor)] = edge_id
-            else:
-                self.delete(node)
-
-        self.update()
-        self.nodes = new_nodes
-
-        for node in self.nodes:
-            self.resize_node(node, 8)
+        # Step 2: Community aggregation - show the top level of the weighted hierarchy,
+        # communities are expanded into their members on demand
+        self._show_hierarchy(store, levels, colors)
+        sizes = " -> ".join(str(len(level_sizes)) for level_sizes in self.hierarchy_view.hierarchy.sizes)
+        text_input.insert(tk.END, f"Community levels: {sizes}\n"
+                                  "Double-click expands a community, Ctrl-click collapses it\n")
 
         btn["state"] = "normal"
         self.update()
         print('Louvain done')
         text_input.insert(tk.END, 'Louvain done')
 
+    def _show_hierarchy(self, store, levels, colors):
+        """Replace the graph by the top level of its community hierarchy, ``colors[i]`` is the color of input node i."""
+        laid_out = self.laid_out
+        positions = store.position_list()
+        hierarchy = CommunityHierarchy.from_store(store, levels)
+
+        self.clear_graph()
+        # Items sit at the center of their members, so an already laid out graph stays laid out
+        self.laid_out = laid_out
+        self.hierarchy_view = HierarchyView(hierarchy)
+        self.hierarchy_positions = positions
+        self.hierarchy_colors = colors
+        self.hierarchy_max_weight = max(self.hierarchy_view.edges.values(), default=1.0)
+        self._add_items(sorted(self.hierarchy_view.visible))
+        self.changed_nodes.clear()
+
+    def on_expand(self, event):
+        """Show the members of the community under the pointer instead of the community."""
+        node_id = self._node_at(event.x, event.y)
+        if node_id in self.hierarchy_items:
+            self._replace_items(*self.hierarchy_view.expand(self.hierarchy_items[node_id]))
+
+    def on_collapse(self, event):
+        """Show the community containing the node under the pointer instead of its members."""
+        node_id = self._node_at(event.x, event.y)
+        if node_id in self.hierarchy_items:
+            self._replace_items(*self.hierarchy_view.collapse(self.hierarchy_items[node_id]))
+
+    def _replace_items(self, removed, added):
+        for item in removed:
+            node_id = self.item_node_ids.pop(item)
+            del self.hierarchy_items[node_id]
+            self._remove_node(node_id)
+        self._add_items(added)
+
+    def _add_items(self, items):
+        """Draw hierarchy items, sized by member count, and their edges, as wide as their weight."""
+        view = self.hierarchy_view
+        hierarchy = view.hierarchy
+        for item in items:
+            members = hierarchy.item_members(item)
+            x = sum(self.hierarchy_positions[node][0] for node in members) / len(members)
+            y = sum(self.hierarchy_positions[node][1] for node in members) / len(members)
+            radius = min(CONST.SUPERNODE_MAX_RADIUS, CONST.POINT_RADIUS * math.sqrt(len(members)))
+            node_id = self._create_node(x, y, radius)
+            self.itemconfig(node_id, fill=self.hierarchy_colors[members[0]])
+            self.hierarchy_items[node_id] = item
+            self.item_node_ids[item] = node_id
+            self.changed_nodes.add(node_id)
+
+        new = set(items)
+        for item in items:
+            for other in view.incident[item]:
+                if other in new and other < item:
+                    continue  # drawn from the other side
+
+                weight = view.edges[(item, other) if item < other else (other, item)]
+                width = CONST.EDGE_WIDTH + (CONST.SUPEREDGE_MAX_WIDTH - CONST.EDGE_WIDTH) * math.sqrt(
+                    min(1.0, weight / self.hierarchy_max_weight))
+                n1, n2 = self.item_node_ids[item], self.item_node_ids[other]
+                edge_id = self.create_line(*self._get_screen_center(n1), *self._get_screen_center(n2),
+                                           fill=CONST.EDGE_COLOR, width=width, tags=CONST.EDGE_TAG)
+                self._index_edge(n1, n2, edge_id)
+                self.nodes[n1].append(n2)
+
+        self.tag_lower(CONST.EDGE_TAG)
+        self.store = None
+
     def resize_node(self, node_id, r):
         x1, y1, x2, y2 = self.coords(node_id)
         cx = (x1 + x2) / 2
@@ -418,43 +1069,72 @@ class Graph(tk.Canvas):
         new_radius = current_radius + r
         self.coords(node_id, cx - new_radius, cy - new_radius, cx + new_radius, cy + new_radius)
 
-    def _calculate_modularity(self, nodes, partition):
-        m = sum(len(neighbors) for neighbors in nodes.values()) // 2  # Liczba krawędzi w grafie
-        modularity = 0.0
-
-        for community in set(partition.values()):
-            community_nodes = [node for node, com in partition.items() if com == community]
-
-            # Liczba krawędzi wewnątrz społeczności
-            lc = 0
-            for node in community_nodes:
-                for neighbor in nodes[node]:
-                    if neighbor in community_nodes:
-                        lc += 1
-            lc //= 2  # Każda krawędź jest liczona dwukrotnie
-
-            # Suma stopni w społeczności
-            dc = sum(len(nodes[node]) for node in community_nodes)
-
-            modularity += lc / m - (dc / (2 * m)) ** 2
-        return modularity
-
     def _draw_edges(self):
         self.delete(self.edge)
 
+    def _index_edge(self, n1, n2, edge_id):
+        self.edges[(n1, n2)] = edge_id
+        self.incident_edges[n1].append((n1, n2))
+        if n2 != n1:
+            self.incident_edges[n2].append((n1, n2))
+
+    def _remove_edge_item(self, n1, n2):
+        self.delete(self.edges.pop((n1, n2)))
+        self.incident_edges[n1].remove((n1, n2))
+        if n2 != n1:
+            self.incident_edges[n2].remove((n1, n2))
+
     def _update_edge_position(self, n1, n2):
         edge = self.edges[(n1, n2)]
-        x1, y1 = self._get_node_center(n1)
-        x2, y2 = self._get_node_center(n2)
+        x1, y1 = self._get_screen_center(n1)
+        x2, y2 = self._get_screen_center(n2)
         self.coords(edge, x1, y1, x2, y2)
 
-        self.nodes[n1] = [id_ if id_ == n2 else id_ for id_ in self.nodes[n1]]
+    def _create_node(self, x, y, radius=CONST.POINT_RADIUS):
+        """Oval for a new node centered on world position ``(x, y)``."""
+        screen_x, screen_y = self.viewport.to_screen(x, y)
+        screen_radius = radius * self.viewport.scale
+        node_id = self.create_oval(screen_x - screen_radius, screen_y - screen_radius, screen_x + screen_radius,
+                                   screen_y + screen_radius, fill=CONST.NODE_NON_SELECTED_COLOR, outline='')
+        if radius != CONST.POINT_RADIUS:
+            self.node_radius[node_id] = radius
+        self.nodes[node_id] = []
+        self.node_centers[node_id] = (x, y)
+        self.node_index.insert(node_id, x, y)
+        return node_id
+
+    def _delete_node(self, node_id):
+        self.delete(node_id)
+        self.node_centers.pop(node_id, None)
+        self.node_radius.pop(node_id, None)
+        if node_id in self.node_index:
+            self.node_index.remove(node_id)
+
+    def _remove_node(self, node_id):
+        """Delete a node with all its edges."""
+        for n1, n2 in list(self.incident_edges[node_id]):
+            self._remove_edge_item(n1, n2)
+            self.nodes[n1].remove(n2)
+        del self.incident_edges[node_id]
+        del self.nodes[node_id]
+        if node_id in self.selected:
+            self.selected.remove(node_id)
+        self.changed_nodes.discard(node_id)
+        self._delete_node(node_id)
+        self.store = None
 
     def _get_node_center(self, node_id):
-        coords = self.coords(node_id)
-        x_center = (coords[0] + coords[2]) / 2
-        y_center = (coords[1] + coords[3]) / 2
-        return x_center, y_center
+        """World coordinates of a node's center."""
+        center = self.node_centers.get(node_id)
+        if center is None:
+            coords = self.coords(node_id)
+            x_center = (coords[0] + coords[2]) / 2
+            y_center = (coords[1] + coords[3]) / 2
+            center = self.node_centers[node_id] = self.viewport.to_world(x_center, y_center)
+        return center
+
+    def _get_screen_center(self, node_id):
+        return self.viewport.to_screen(*self._get_node_center(node_id))
 
     def _calc_node_distances(self, n1, n2):
         x1, y1 = self._get_node_center(n1)
@@ -473,13 +1153,3 @@ class Graph(tk.Canvas):
         )
         return x, y
 
-    def _get_random_hex_color(self) -> str:
-        color = None
-
-        while color is None:
-            temp = f'#{random.randint(0, 0xFFFFFF):06x}'
-            if temp not in self.colors:
-                color = temp
-                self.colors.append(color)
-
-        return color
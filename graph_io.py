@@ -0,0 +1,253 @@
+import argparse
+import csv
+import mmap
+import random
+import struct
+import sys
+import time
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only required for .npy output
+    np = None
+
+import profiling
+from graph_store import GraphStore
+
+CHUNK_BYTES = 1 << 20
+
+# Binary graph file: a 64 byte header (magic, version, flags, node count, edge count) followed by
+# little-endian arrays, each starting on an 8 byte boundary: int64 original node ids,
+# int64 CSR offsets, int32 (int64 with FLAG_WIDE_TARGETS) CSR targets and, with FLAG_WEIGHTS, float64 weights.
+BINARY_MAGIC = b"GRAPHCSR"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<8sIIqq")
+BINARY_HEADER_BYTES = 64
+FLAG_WEIGHTS = 1
+FLAG_WIDE_TARGETS = 2
+
+
+def iter_edge_chunks(lines_or_path, chunk_bytes=CHUNK_BYTES):
+    """Yield lists of raw ``(node_id, node_id)`` pairs, reading roughly ``chunk_bytes`` of text at a time.
+
+    Accepts a path or an open text file. Blank lines and ``#`` comments are skipped,
+    columns after the second one (e.g. weights) are ignored.
+    """
+    if isinstance(lines_or_path, str):
+        with open(lines_or_path) as file:
+            yield from iter_edge_chunks(file, chunk_bytes)
+        return
+
+    file = lines_or_path
+    while True:
+        lines = file.readlines(chunk_bytes)
+        if not lines:
+            return
+        yield _parse_lines(lines)
+
+
+def _parse_lines(lines):
+    # One split per line, blank, comment and single-column lines are skipped, extra columns ignored
+    return [(int(fields[0]), int(fields[1])) for fields in map(str.split, lines)
+            if len(fields) >= 2 and not fields[0].startswith("#")]
+
+
+def read_edge_arrays(lines_or_path, chunk_bytes=CHUNK_BYTES, progress=None):
+    """Stream an edge list into compact integer arrays.
+
+    Returns ``(node_ids, sources, targets)``: ``node_ids[i]`` is the original id of node ``i``,
+    ``sources``/``targets`` are ``array('l')`` of node indices. ``progress`` is called with the
+    number of edges read so far after every chunk.
+    """
+    node_index = {}
+    node_ids = []
+    sources = array("l")
+    targets = array("l")
+
+    def index_of(node_id):
+        index = node_index.get(node_id)
+        if index is None:
+            index = node_index[node_id] = len(node_ids)
+            node_ids.append(node_id)
+        return index
+
+    with profiling.active.phase("import.parse"):
+        for pairs in iter_edge_chunks(lines_or_path, chunk_bytes):
+            for node_1, node_2 in pairs:
+                sources.append(index_of(node_1))
+                targets.append(index_of(node_2))
+            if progress is not None:
+                progress(len(sources))
+
+    profiling.active.count("import.edges_read", len(sources))
+    return node_ids, sources, targets
+
+
+def read_edge_list(path):
+    """Read a whitespace separated edge list such as facebook_combined.txt.
+
+    Returns ``(node_ids, edges)`` where ``node_ids[i]`` is the original id of node ``i``
+    and ``edges`` is a list of ``(i, j)`` index pairs. Blank lines and ``#`` comments are skipped.
+    """
+    node_ids, sources, targets = read_edge_arrays(path)
+    return node_ids, list(zip(sources, targets))
+
+
+def sample_grid_positions(count, width, height, cell_size, rng=random):
+    """Pick ``count`` distinct cells of a ``cell_size`` grid and return their top-left corners.
+
+    The grid is never materialised, cells are sampled as indices from a ``range``.
+    """
+    columns = max(1, width // cell_size)
+    rows = max(1, height // cell_size)
+    if columns * rows < count:
+        raise ValueError(f"Grid of {columns * rows} cells is too small for {count} nodes")
+
+    return [((cell % columns) * cell_size, (cell // columns) * cell_size)
+            for cell in rng.sample(range(columns * rows), count)]
+
+
+def write_positions(path, node_ids, positions):
+    """Write node positions either as ``node,x,y`` CSV or as an (n, 2) ``.npy`` array.
+
+    For ``.npy`` output row ``i`` belongs to ``node_ids[i]``.
+    """
+    if str(path).endswith(".npy"):
+        if np is None:
+            raise ImportError("Writing .npy files requires numpy")
+        np.save(path, np.asarray(positions, dtype=np.float64).reshape(-1, 2))
+        return
+
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["node", "x", "y"])
+        for node_id, (x, y) in zip(node_ids, positions):
+            writer.writerow([node_id, x, y])
+
+
+def _binary_sections(num_nodes, num_edges, flags):
+    """``{name: (start, stop, typecode)}`` byte ranges of the arrays in a binary graph file."""
+    arrays = [
+        ("node_ids", "q", num_nodes),
+        ("offsets", "q", num_nodes + 1),
+        ("targets", "q" if flags & FLAG_WIDE_TARGETS else "i", num_edges),
+    ]
+    if flags & FLAG_WEIGHTS:
+        arrays.append(("weights", "d", num_edges))
+
+    sections = {}
+    start = BINARY_HEADER_BYTES
+    for name, typecode, count in arrays:
+        stop = start + count * array(typecode).itemsize
+        sections[name] = (start, stop, typecode)
+        start = (stop + 7) // 8 * 8
+    return sections
+
+
+def write_binary_graph(path, node_ids, store):
+    """Write ``store`` (without positions) and the original ``node_ids`` as a binary graph file."""
+    flags = 0
+    if store.weights is not None:
+        flags |= FLAG_WEIGHTS
+    if store.targets.itemsize > 4:
+        flags |= FLAG_WIDE_TARGETS
+    sections = _binary_sections(store.num_nodes, store.num_edges, flags)
+
+    with open(path, "wb") as file:
+        header = BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, flags, store.num_nodes, store.num_edges)
+        file.write(header.ljust(BINARY_HEADER_BYTES, b"\0"))
+
+        for name, values in (("node_ids", node_ids), ("offsets", store.offsets), ("targets", store.targets),
+                             ("weights", store.weights)):
+            if name not in sections:
+                continue
+            start, _, typecode = sections[name]
+            file.write(b"\0" * (start - file.tell()))
+            values = array(typecode, values)
+            if sys.byteorder == "big":
+                values.byteswap()
+            values.tofile(file)
+
+
+def is_binary_graph(path):
+    with open(path, "rb") as file:
+        return file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def load_binary_graph(path):
+    """Memory-map a binary graph file. Returns ``(node_ids, store)``.
+
+    The store's offsets, targets and weights are read-only views of the mapping, nothing is copied
+    or parsed, and processes loading the same file share its pages. Positions start out at zero.
+    """
+    with profiling.active.phase("import.load_binary"), open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(mapped) < BINARY_HEADER_BYTES:
+        raise ValueError(f"{path} is not a binary graph file")
+    magic, version, flags, num_nodes, num_edges = BINARY_HEADER.unpack_from(mapped)
+    if magic != BINARY_MAGIC:
+        raise ValueError(f"{path} is not a binary graph file")
+    if version != BINARY_VERSION:
+        raise ValueError(f"Unsupported binary graph version {version} in {path}")
+
+    sections = _binary_sections(num_nodes, num_edges, flags)
+    if max(stop for _, stop, _ in sections.values()) > len(mapped):
+        raise ValueError(f"{path} is truncated")
+
+    view = memoryview(mapped)
+
+    def section(name):
+        if name not in sections:
+            return None
+        start, stop, typecode = sections[name]
+        values = view[start:stop].cast(typecode)
+        if sys.byteorder == "big":  # the file is little-endian, big-endian hosts get a swapped copy
+            values = array(typecode, values)
+            values.byteswap()
+        return values
+
+    store = GraphStore(section("offsets"), section("targets"), weights=section("weights"))
+    return section("node_ids"), store
+
+
+def convert_edge_list(source, destination, chunk_bytes=CHUNK_BYTES, progress=None):
+    """Parse a text edge list once and write it as a binary graph file. Returns ``(node_ids, store)``."""
+    node_ids, sources, targets = read_edge_arrays(source, chunk_bytes, progress)
+    with profiling.active.phase("import.csr_build"):
+        store = GraphStore.from_edges(len(node_ids), sources, targets)
+    with profiling.active.phase("import.write_binary"):
+        write_binary_graph(destination, node_ids, store)
+    return node_ids, store
+
+
+def load_graph(path, progress=None):
+    """``(node_ids, store)`` from either a binary graph file or a text edge list."""
+    if is_binary_graph(path):
+        return load_binary_graph(path)
+
+    node_ids, sources, targets = read_edge_arrays(path, progress=progress)
+    with profiling.active.phase("import.csr_build"):
+        return node_ids, GraphStore.from_edges(len(node_ids), sources, targets)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m graph_io",
+                                     description="Convert a text edge list to the binary graph format")
+    parser.add_argument("edges", help="edge list file, one 'node node' pair per line")
+    parser.add_argument("output", help="binary graph file to write")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    started = time.perf_counter()
+    _, store = convert_edge_list(args.edges, args.output)
+    print(f"{store.num_nodes} nodes, {store.num_edges} edges written to {args.output} "
+          f"in {time.perf_counter() - started:.3f} s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+import hashlib
+import sys
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only required for the array views
+    np = None
+
+
+class GraphStore:
+    """Graph with contiguous node indices ``0..n-1``.
+
+    Edges are kept as CSR adjacency: the edges leaving node ``i`` go to
+    ``targets[offsets[i]:offsets[i + 1]]``, ``weights`` (optional) is parallel to ``targets``.
+    Positions are a flat ``array('d')`` of ``x0, y0, x1, y1, ...``.
+    Everything is stored in typed arrays, a few bytes per edge, and shared with numpy without copying.
+    ``offsets``/``targets``/``weights`` may also be read-only memoryviews of a memory-mapped file.
+    """
+
+    def __init__(self, offsets, targets, positions=None, weights=None):
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        num_nodes = len(offsets) - 1
+        self.positions = positions if positions is not None else array("d", bytes(16 * num_nodes))
+
+        if len(self.positions) != 2 * num_nodes:
+            raise ValueError(f"Expected {2 * num_nodes} coordinates, got {len(self.positions)}")
+        if weights is not None and len(weights) != len(targets):
+            raise ValueError("weights must be parallel to targets")
+
+    @classmethod
+    def from_edges(cls, num_nodes, sources, targets, weights=None, positions=None):
+        """Build the CSR arrays from parallel ``sources``/``targets`` index sequences with a counting sort."""
+        offsets = array("q", bytes(8 * (num_nodes + 1)))
+        for source in sources:
+            offsets[source + 1] += 1
+        for node in range(num_nodes):
+            offsets[node + 1] += offsets[node]
+
+        cursor = array("q", offsets[:-1])
+        csr_targets = array("i", bytes(4 * len(targets)))
+        csr_weights = array("d", bytes(8 * len(targets))) if weights is not None else None
+
+        for index, (source, target) in enumerate(zip(sources, targets)):
+            position = cursor[source]
+            cursor[source] += 1
+            csr_targets[position] = target
+            if csr_weights is not None:
+                csr_weights[position] = weights[index]
+
+        if positions is not None and not isinstance(positions, array):
+            positions = array("d", (coordinate for point in positions for coordinate in point))
+
+        return cls(offsets, csr_targets, positions=positions, weights=csr_weights)
+
+    @property
+    def num_nodes(self):
+        return len(self.offsets) - 1
+
+    @property
+    def num_edges(self):
+        return len(self.targets)
+
+    @property
+    def nbytes(self):
+        arrays = [self.offsets, self.targets, self.positions]
+        if self.weights is not None:
+            arrays.append(self.weights)
+        return sum(len(values) * values.itemsize for values in arrays)
+
+    def content_hash(self):
+        """sha256 hex digest of the edges and weights, independent of positions and byte order."""
+        digest = hashlib.sha256()
+        for values in (self.offsets, self.targets, self.weights):
+            if values is None:
+                digest.update(b"-")
+                continue
+            # array typecodes and memoryview formats (see graph_io.load_binary_graph) use the same letters
+            typecode = getattr(values, "typecode", None) or values.format
+            digest.update(typecode.encode())
+            if sys.byteorder == "big":
+                values = array(typecode, values)
+                values.byteswap()
+            digest.update(values)
+        return digest.hexdigest()
+
+    def neighbors(self, node):
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def degree(self, node):
+        return self.offsets[node + 1] - self.offsets[node]
+
+    def edges(self):
+        """Iterate ``(source, target)`` pairs in CSR order, i.e. parallel to ``weights``."""
+        targets = self.targets
+        for node in range(self.num_nodes):
+            for position in range(self.offsets[node], self.offsets[node + 1]):
+                yield node, targets[position]
+
+    def get_position(self, node):
+        return self.positions[2 * node], self.positions[2 * node + 1]
+
+    def set_position(self, node, x, y):
+        self.positions[2 * node] = x
+        self.positions[2 * node + 1] = y
+
+    def position_list(self):
+        positions = self.positions
+        return [[positions[2 * node], positions[2 * node + 1]] for node in range(self.num_nodes)]
+
+    def position_array(self):
+        """(n, 2) float64 numpy view of the positions, writes go straight into the store."""
+        if np is None:
+            raise ImportError("GraphStore.position_array requires numpy")
+        return np.frombuffer(self.positions, dtype=np.float64).reshape(-1, 2)
+
+    def edge_array(self):
+        """(m, 2) int64 numpy array of ``(source, target)`` pairs in CSR order."""
+        if np is None:
+            raise ImportError("GraphStore.edge_array requires numpy")
+        offsets = np.frombuffer(self.offsets, dtype=np.int64)
+        sources = np.repeat(np.arange(self.num_nodes, dtype=np.int64), np.diff(offsets))
+        targets = np.asarray(self.targets).astype(np.int64)
+        return np.column_stack((sources, targets))
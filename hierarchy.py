@@ -0,0 +1,199 @@
+"""Weighted community hierarchy of a Louvain run, and an expandable view of it.
+
+Level ``k`` of the hierarchy holds the communities of ``levels[k]`` (finest first), level -1
+stands for the input nodes. Every level keeps the size of its communities, their internal
+edge weight and the weights between them. A HierarchyView shows a cut through the tree:
+it starts with the top level and communities can be expanded into their children and
+collapsed again, edge weights are only recomputed for the part that changes.
+"""
+from collections import defaultdict
+
+from community import aggregate, csr_from_edges
+
+INPUT_LEVEL = -1
+
+
+class CommunityHierarchy:
+    """Nested partitions over a symmetric CSR graph (see community), ``levels`` finest first.
+
+    Every partition in ``levels`` covers the input nodes and has to be a coarsening of the
+    one before, as the levels of a LouvainResult are.
+    """
+
+    def __init__(self, offsets, targets, weights, levels):
+        self.offsets, self.targets, self.weights = offsets, targets, weights
+        self.num_nodes = len(offsets) - 1
+        self.membership = [list(partition) for partition in levels]  # level: input node -> community
+        self.parents = []  # level: community -> community of the next level
+        self.children = []  # level: community -> [community of the level below, or input node, ...]
+        self.members = []  # level: community -> [input node, ...]
+        self.sizes = []  # level: community -> input node count
+        self.internal_weights = []  # level: community -> weight of the edges inside it
+        self.edge_weights = []  # level: {(community, community): weight}, smaller community first
+
+        below = list(range(self.num_nodes))  # input node -> community of the level below
+        for level, membership in enumerate(self.membership):
+            if len(membership) != self.num_nodes:
+                raise ValueError(f"Level {level} has {len(membership)} entries, expected {self.num_nodes}")
+            count = max(membership, default=-1) + 1
+
+            parent = [-1] * (len(offsets) - 1)  # community of the level below -> community
+            members = [[] for _ in range(count)]
+            for node, community in enumerate(membership):
+                if parent[below[node]] not in (-1, community):
+                    raise ValueError(f"Level {level} splits a community of the level below")
+                parent[below[node]] = community
+                members[community].append(node)
+
+            if level > 0:
+                self.parents.append(parent)
+            children = [[] for _ in range(count)]
+            for child, community in enumerate(parent):
+                children[community].append(child)
+
+            offsets, targets, weights = aggregate(offsets, targets, weights, parent, count)
+            internal = [0.0] * count
+            edges = {}
+            for community in range(count):
+                for position in range(offsets[community], offsets[community + 1]):
+                    other = targets[position]
+                    if other == community:
+                        internal[community] = weights[position] / 2  # every edge is in both rows
+                    elif community < other:
+                        edges[community, other] = weights[position]
+
+            self.children.append(children)
+            self.members.append(members)
+            self.sizes.append([len(nodes) for nodes in members])
+            self.internal_weights.append(internal)
+            self.edge_weights.append(edges)
+            below = membership
+
+        if self.membership:
+            self.parents.append(None)  # the top level has no parents
+
+    @classmethod
+    def from_store(cls, store, levels):
+        return cls(*csr_from_edges(store.num_nodes, store.edges(), store.weights), levels)
+
+    @property
+    def top_level(self):
+        """Level of the coarsest communities, INPUT_LEVEL when there are none."""
+        return len(self.membership) - 1
+
+    def parent(self, item):
+        """``(level, community)`` containing ``item``, None for a top level item."""
+        level, index = item
+        if level == self.top_level:
+            return None
+        if level == INPUT_LEVEL:
+            return 0, self.membership[0][index]
+        return level + 1, self.parents[level][index]
+
+    def item_children(self, item):
+        level, index = item
+        if level == INPUT_LEVEL:
+            return []
+        return [(level - 1, child) for child in self.children[level][index]]
+
+    def item_members(self, item):
+        level, index = item
+        return [index] if level == INPUT_LEVEL else self.members[level][index]
+
+    def size(self, item):
+        level, index = item
+        return 1 if level == INPUT_LEVEL else self.sizes[level][index]
+
+    def internal_weight(self, item):
+        level, index = item
+        if level == INPUT_LEVEL:
+            return sum(self.weights[position] for position in range(self.offsets[index], self.offsets[index + 1])
+                       if self.targets[position] == index) / 2
+        return self.internal_weights[level][index]
+
+
+class HierarchyView:
+    """The currently shown items of a CommunityHierarchy and the weighted edges between them.
+
+    Items are ``(level, index)`` pairs. ``edges`` maps ``(item, item)`` (smaller first) to the
+    summed weight of the input edges between the two.
+    """
+
+    def __init__(self, hierarchy):
+        self.hierarchy = hierarchy
+        top = hierarchy.top_level
+        if top == INPUT_LEVEL:
+            self.owner = [(INPUT_LEVEL, node) for node in range(hierarchy.num_nodes)]
+            self.visible = set(self.owner)
+            self.edges = {}
+            self.incident = defaultdict(set)
+            self._add_edges(self.visible)
+            return
+
+        self.owner = [(top, community) for community in hierarchy.membership[top]]  # input node -> visible item
+        self.visible = {(top, community) for community in range(len(hierarchy.sizes[top]))}
+        self.edges = {((top, a), (top, b)): weight for (a, b), weight in hierarchy.edge_weights[top].items()}
+        self.incident = defaultdict(set)  # item: {item, ...} it has an edge to
+        for item_1, item_2 in self.edges:
+            self.incident[item_1].add(item_2)
+            self.incident[item_2].add(item_1)
+
+    def expand(self, item):
+        """Replace ``item`` by its children. Returns ``(removed, added)`` lists of items."""
+        if item not in self.visible:
+            raise KeyError(item)
+        children = self.hierarchy.item_children(item)
+        if not children:
+            return [], []
+
+        self._remove([item])
+        for child in children:
+            for node in self.hierarchy.item_members(child):
+                self.owner[node] = child
+        self.visible.update(children)
+        self._add_edges(children)
+        return [item], children
+
+    def collapse(self, item):
+        """Replace ``item``'s parent community, with everything of it that is shown, by the parent.
+
+        Returns ``(removed, added)`` lists of items.
+        """
+        parent = self.hierarchy.parent(item)
+        if parent is None:
+            return [], []
+
+        members = self.hierarchy.item_members(parent)
+        removed = list(dict.fromkeys(self.owner[node] for node in members))
+        self._remove(removed)
+        for node in members:
+            self.owner[node] = parent
+        self.visible.add(parent)
+        self._add_edges([parent])
+        return removed, [parent]
+
+    def _remove(self, items):
+        for item in items:
+            self.visible.discard(item)
+            for other in self.incident.pop(item, ()):
+                self.incident[other].discard(item)
+                self.edges.pop((item, other) if item < other else (other, item), None)
+
+    def _add_edges(self, items):
+        """Add the edges of the new ``items`` by scanning the input rows of their members only."""
+        hierarchy = self.hierarchy
+        offsets, targets, weights = hierarchy.offsets, hierarchy.targets, hierarchy.weights
+        owner = self.owner
+        new = set(items)
+
+        for item in items:
+            for node in hierarchy.item_members(item):
+                for position in range(offsets[node], offsets[node + 1]):
+                    other = owner[targets[position]]
+                    # Edges between two new items are in the rows of both, count them from one side
+                    if other == item or (other in new and other < item):
+                        continue
+                    key = (item, other) if item < other else (other, item)
+                    self.edges[key] = self.edges.get(key, 0.0) + weights[position]
+                    self.incident[item].add(other)
+                    self.incident[other].add(item)
@@ -0,0 +1,184 @@
+"""Incremental (warm-start) force-directed layout after local edits.
+
+Only the nodes within ``hops`` edges of the changed nodes move, everything else keeps its
+position. The frozen nodes still repel the moving ones, through a Barnes-Hut quadtree built
+once over the frozen positions, so a step costs about O(a log n + a^2) for a moving nodes
+instead of a full O(n^2) or O(n log n) pass.
+"""
+import math
+from collections import defaultdict, deque
+
+import profiling
+from algorithm import CoolingSchedule, ForceDirectGraph
+from quadtree import QuadTree
+
+
+def k_hop_nodes(adjacency, seeds, hops):
+    """Nodes at most ``hops`` edges away from any of ``seeds`` (breadth-first), seeds included.
+
+    ``adjacency`` maps a node to its neighbours in both directions.
+    """
+    distance = {node: 0 for node in seeds}
+    queue = deque(distance)
+    while queue:
+        node = queue.popleft()
+        if distance[node] == hops:
+            continue
+        for neighbor in adjacency.get(node, ()):
+            if neighbor not in distance:
+                distance[neighbor] = distance[node] + 1
+                queue.append(neighbor)
+    return set(distance)
+
+
+def undirected_adjacency(edges):
+    adjacency = defaultdict(list)
+    for node_1, node_2 in edges:
+        adjacency[node_1].append(node_2)
+        adjacency[node_2].append(node_1)
+    return adjacency
+
+
+class IncrementalLayout:
+    """Iterator relaxing the neighbourhood of ``changed`` nodes, same force model as ForceDirectGraph.
+
+    ``positions`` is a ``{node_id: [x, y]}`` dict that is updated in place. Every step
+    returns it, but only the nodes in ``active`` (sorted) ever change.
+    """
+
+    def __init__(self, positions, edges, changed, hops=2, max_iterations=50, repulsion_const=5000,
+                 damping_const=0.85, attraction_constant=0.1, repulsion_method="exact", theta=0.5,
+                 temperature=None, cooling=0.9, tolerance=None):
+        if repulsion_method not in ForceDirectGraph.REPULSION_METHODS:
+            raise ValueError(f"Unknown repulsion method: {repulsion_method!r}")
+        if hops < 0:
+            raise ValueError(f"hops must not be negative, got {hops}")
+
+        self.current_iteration = 0
+        self.max_iterations = max_iterations
+        self.positions = positions
+        self.repulsion_const = repulsion_const
+        self.damping_const = damping_const
+        self.attraction_constant = attraction_constant
+        self.repulsion_method = repulsion_method
+        self.theta = theta
+        self.store = None
+        self.schedule = CoolingSchedule(temperature, cooling, tolerance)
+
+        edges = list(edges)
+        changed = [node for node in changed if node in positions]
+        self.active = sorted(k_hop_nodes(undirected_adjacency(edges), changed, hops))
+        active = set(self.active)
+        # Edges with a frozen end still pull on their moving end
+        self.edges = [(node_1, node_2) for node_1, node_2 in edges if node_1 in active or node_2 in active]
+        self._frozen_tree = QuadTree([tuple(coords) for node_id, coords in positions.items()
+                                      if node_id not in active])
+
+    @classmethod
+    def from_store(cls, store, changed, **kwargs):
+        """Relax the neighbourhood of the store indices ``changed``, moved nodes are written back to the store."""
+        layout = cls(dict(enumerate(store.position_list())), store.edges(), changed, **kwargs)
+        layout.store = store
+        return layout
+
+    @property
+    def energy(self):
+        return self.schedule.energies[-1] if self.schedule.energies else None
+
+    @property
+    def converged(self):
+        return self.schedule.converged
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.current_iteration >= self.max_iterations or self.schedule.converged or not self.active:
+            raise StopIteration
+
+        self.current_iteration += 1
+        profiler = profiling.active
+        profiler.count("layout.iterations")
+        forces = self._calculate_forces()
+        with profiler.phase("layout.update"):
+            self._update_positions(forces)
+
+        if self.store is not None:
+            with profiler.phase("layout.store_write"):
+                for node_id in self.active:
+                    self.store.set_position(node_id, *self.positions[node_id])
+
+        return self.positions
+
+    def _calculate_forces(self):
+        positions = self.positions
+        forces = {node_id: [0.0, 0.0] for node_id in self.active}
+        profiler = profiling.active
+
+        with profiler.phase("layout.repulsion"):
+            for node_id in self.active:
+                fx, fy = self._frozen_tree.repulsion_at(*positions[node_id], self.repulsion_const, self.theta)
+                forces[node_id][0] += fx
+                forces[node_id][1] += fy
+
+            if self.repulsion_method == "barnes_hut":
+                tree = QuadTree([tuple(positions[node_id]) for node_id in self.active])
+                for index, node_id in enumerate(self.active):
+                    fx, fy = tree.repulsion(index, self.repulsion_const, self.theta)
+                    forces[node_id][0] += fx
+                    forces[node_id][1] += fy
+            else:
+                self._add_exact_repulsion(forces)
+
+        with profiler.phase("layout.attraction"):
+            for node_1, node_2 in self.edges:
+                x1, y1 = positions[node_1]
+                x2, y2 = positions[node_2]
+                dx, dy = x2 - x1, y2 - y1
+                distance = math.sqrt(dx ** 2 + dy ** 2) + 0.1
+                force = self.attraction_constant * distance
+                fx, fy = force * dx / distance, force * dy / distance
+                if node_1 in forces:
+                    forces[node_1][0] += fx
+                    forces[node_1][1] += fy
+                if node_2 in forces:
+                    forces[node_2][0] -= fx
+                    forces[node_2][1] -= fy
+
+        return forces
+
+    def _add_exact_repulsion(self, forces):
+        positions = self.positions
+        active = self.active
+        for i, node_1 in enumerate(active):
+            x1, y1 = positions[node_1]
+            for node_2 in active[i + 1:]:
+                x2, y2 = positions[node_2]
+                dx, dy = x2 - x1, y2 - y1
+                distance = math.sqrt(dx ** 2 + dy ** 2) + 0.1
+                force = self.repulsion_const / (distance ** 2)
+                fx, fy = force * dx / distance, force * dy / distance
+                forces[node_1][0] -= fx
+                forces[node_1][1] -= fy
+                forces[node_2][0] += fx
+                forces[node_2][1] += fy
+
+    def _update_positions(self, forces):
+        limit = self.schedule.temperature
+        energy = 0.0
+        max_displacement = 0.0
+
+        for node_id in self.active:
+            fx, fy = forces[node_id]
+            x, y = self.positions[node_id]
+            dx, dy = self.damping_const * fx, self.damping_const * fy
+            displacement = math.sqrt(dx ** 2 + dy ** 2)
+            if limit is not None and displacement > limit:
+                dx, dy = dx * limit / displacement, dy * limit / displacement
+                displacement = limit
+
+            energy += fx ** 2 + fy ** 2
+            max_displacement = max(max_displacement, displacement)
+            self.positions[node_id] = [x + dx, y + dy]
+
+        self.schedule.update(energy, max_displacement)
@@ -0,0 +1,142 @@
+"""Headless batch layout.
+
+Usage: python -m layout facebook_combined.txt -o positions.csv --iterations 50
+
+Runs ForceDirectGraph without any Tk import and writes node positions as CSV or .npy.
+"""
+import argparse
+import random
+import sys
+import time
+
+import profiling
+from algorithm import ForceDirectGraph, ArrayForceDirectGraph
+from const import CONST
+from graph_io import load_graph, write_positions
+from multilevel import COARSENING, MultilevelLayout
+
+
+def random_positions(count, seed=None, width=CONST.CANVAS_WIDTH_PX, height=CONST.CANVAS_HEIGHT_PX):
+    rng = random.Random(seed)
+    return [[rng.uniform(0, width), rng.uniform(0, height)] for _ in range(count)]
+
+
+def build_layout(store, args):
+    params = dict(
+        max_iterations=args.iterations,
+        repulsion_const=args.repulsion,
+        damping_const=args.damping,
+        attraction_constant=args.attraction,
+        repulsion_method=args.method,
+        theta=args.theta,
+        temperature=args.temperature,
+        cooling=args.cooling,
+        tolerance=args.tolerance
+    )
+
+    if args.multilevel:
+        params.pop("max_iterations")
+        return MultilevelLayout.from_store(
+            store,
+            coarsening=args.multilevel,
+            coarsest_iterations=args.iterations,
+            level_iterations=args.level_iterations,
+            seed=args.seed,
+            backend=args.backend,
+            workers=args.workers,
+            **params
+        )
+
+    if args.backend == "numpy":
+        return ArrayForceDirectGraph.from_store(store, workers=args.workers, **params)
+
+    return ForceDirectGraph.from_store(store, **params)
+
+
+def run_layout(layout, report=None):
+    """Run every iteration of ``layout`` and return the list of per-iteration wall-clock times."""
+    timings = []
+    started = time.perf_counter()
+
+    for index, _ in enumerate(layout, start=1):
+        now = time.perf_counter()
+        timings.append(now - started)
+        started = now
+        if report is not None:
+            report(f"iteration {index}/{layout.max_iterations}: {timings[-1]:.4f} s, energy {layout.energy:.6g}")
+
+    return timings
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m layout", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("edges", help="edge list file, one 'node node' pair per line, or a binary graph file")
+    parser.add_argument("-o", "--output", required=True, help="output file, .csv or .npy")
+    parser.add_argument("-n", "--iterations", type=int, default=CONST.FDG_ITERATIONS)
+    parser.add_argument("--backend", choices=ForceDirectGraph.BACKENDS, default=CONST.FDG_BACKEND)
+    parser.add_argument("--method", choices=ForceDirectGraph.REPULSION_METHODS, default=CONST.FDG_REPULSION_METHOD)
+    parser.add_argument("--theta", type=float, default=CONST.FDG_THETA)
+    parser.add_argument("--repulsion", type=float, default=CONST.FDG_REPULSION_CONSTANT)
+    parser.add_argument("--attraction", type=float, default=CONST.FDG_ATTRACTION_CONSTANT)
+    parser.add_argument("--damping", type=float, default=CONST.FDG_DAMPING_CONSTANT)
+    parser.add_argument("--temperature", type=float, default=CONST.FDG_TEMPERATURE,
+                        help="largest step of a node, adapted as the layout cools")
+    parser.add_argument("--cooling", type=float, default=CONST.FDG_COOLING)
+    parser.add_argument("--tolerance", type=float, default=CONST.FDG_TOLERANCE,
+                        help="stop early once no node moves further than this")
+    parser.add_argument("--multilevel", choices=sorted(COARSENING),
+                        help="coarsen the graph this way and lay it out level by level, --iterations "
+                             "then applies to the coarsest level")
+    parser.add_argument("--level-iterations", type=int, default=CONST.FDG_MULTILEVEL_LEVEL_ITERATIONS,
+                        help="refining iterations on every finer level of a multilevel layout")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes for exact repulsion, numpy backend only")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the random initial positions")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="time every phase and write the profile as JSON to PATH")
+    parser.add_argument("--profile-memory", action="store_true", help="also trace peak memory, slower")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args(argv)
+    if args.workers > 1 and args.backend != "numpy":
+        parser.error("--workers needs --backend numpy")
+    if args.workers > 1 and args.method != "exact":
+        parser.error("--workers needs --method exact")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    def report(message):
+        print(message, file=sys.stderr)
+
+    if args.profile:
+        profiling.enable(args.profile_memory)
+
+    node_ids, store = load_graph(args.edges)
+    for node, (x, y) in enumerate(random_positions(store.num_nodes, args.seed)):
+        store.set_position(node, x, y)
+    report(f"loaded {store.num_nodes} nodes, {store.num_edges} edges")
+
+    # Both layouts write every step back into the store
+    layout = build_layout(store, args)
+    timings = run_layout(layout, report=None if args.quiet else report)
+    write_positions(args.output, node_ids, store.position_list())
+
+    if layout.converged:
+        report(f"converged after {len(timings)} iterations")
+    if timings:
+        report(f"{len(timings)} iterations in {sum(timings):.3f} s, "
+               f"{sum(timings) / len(timings):.4f} s per iteration")
+    report(f"positions written to {args.output}")
+
+    profiler = profiling.disable()
+    if profiler is not None:
+        profiler.write_json(args.profile)
+        report(profiler.report())
+        report(f"profile written to {args.profile}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
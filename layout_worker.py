@@ -0,0 +1,95 @@
+import queue
+import threading
+
+
+class LayoutWorker(threading.Thread):
+    """Runs a layout iterator on a background thread and hands position snapshots back through a queue.
+
+    The queue only holds the newest ``max_pending`` snapshots, older ones are dropped so
+    a slow consumer always draws the most recent state. ``pause``/``resume``/``cancel``
+    take effect between iterations. The layout's ``close()``, if it has one, is called once
+    the thread is done with it.
+    """
+
+    def __init__(self, layout, snapshot=None, max_pending=1):
+        super().__init__(daemon=True)
+        self.layout = layout
+        self.snapshot = snapshot if snapshot is not None else self._copy_positions
+        self.snapshots = queue.Queue(maxsize=max_pending)
+        self.iterations_done = 0
+        self.error = None
+        self._running = threading.Event()
+        self._running.set()
+        self._cancelled = threading.Event()
+
+    @staticmethod
+    def _copy_positions(positions):
+        if isinstance(positions, dict):
+            return {node_id: list(coords) for node_id, coords in positions.items()}
+        return positions.copy()
+
+    def run(self):
+        try:
+            for positions in self.layout:
+                self.iterations_done += 1
+                self._publish((self.iterations_done, self.snapshot(positions)))
+
+                self._running.wait()
+                if self._cancelled.is_set():
+                    break
+        except Exception as error:
+            self.error = error
+        finally:
+            # A layout left early still holds its worker processes and shared memory
+            close = getattr(self.layout, "close", None)
+            if close is not None:
+                close()
+
+    def _publish(self, item):
+        while True:
+            try:
+                self.snapshots.put_nowait(item)
+                return
+            except queue.Full:
+                # Drop the stale frame nobody has drawn yet
+                try:
+                    self.snapshots.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def latest(self):
+        """Newest ``(iteration, positions)`` snapshot not yet taken, or None."""
+        item = None
+        while True:
+            try:
+                item = self.snapshots.get_nowait()
+            except queue.Empty:
+                return item
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def finished(self):
+        return not self.is_alive() and self.snapshots.empty()
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def cancel(self):
+        self._cancelled.set()
+        self._running.set()
+
+    def stop(self):
+        """Cancel and wait until the step in progress is done, the layout is left alone after that."""
+        self.cancel()
+        if self.is_alive():
+            self.join()
@@ -0,0 +1,227 @@
+"""Level-of-detail drawing helpers for large graphs, independent of Tk.
+
+Positions are world coordinates (the ones layouts and the GraphStore use), the Viewport maps
+them to canvas pixels. Only the edges inside the viewport are drawn as items, when there are too
+many of them they are drawn as a single density raster instead.
+"""
+import math
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # numpy only speeds up culling and rasterising
+    np = None
+
+# Sample points per numpy batch while rasterising, bounds the temporary memory
+RASTER_BATCH_SAMPLES = 1 << 21
+
+class Viewport:
+    """Zoom and pan of the canvas: ``screen = (world - origin) * scale``."""
+
+    MIN_SCALE = 0.05
+    MAX_SCALE = 50.0
+
+    def __init__(self, width, height, scale=1.0, origin_x=0.0, origin_y=0.0):
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.origin_x = origin_x
+        self.origin_y = origin_y
+
+    def to_screen(self, x, y):
+        return (x - self.origin_x) * self.scale, (y - self.origin_y) * self.scale
+
+    def to_world(self, x, y):
+        return x / self.scale + self.origin_x, y / self.scale + self.origin_y
+
+    def zoom(self, factor, screen_x, screen_y):
+        """Zoom by ``factor`` keeping the point under ``(screen_x, screen_y)`` in place.
+
+        Returns the factor actually applied, which is smaller near the scale limits.
+        """
+        scale = min(self.MAX_SCALE, max(self.MIN_SCALE, self.scale * factor))
+        factor = scale / self.scale
+        world_x, world_y = self.to_world(screen_x, screen_y)
+        self.scale = scale
+        self.origin_x = world_x - screen_x / scale
+        self.origin_y = world_y - screen_y / scale
+        return factor
+
+    def pan(self, dx, dy):
+        """Move the view content by ``(dx, dy)`` screen pixels."""
+        self.origin_x -= dx / self.scale
+        self.origin_y -= dy / self.scale
+
+    def reset(self):
+        self.scale = 1.0
+        self.origin_x = self.origin_y = 0.0
+
+    @property
+    def identity(self):
+        return self.scale == 1.0 and self.origin_x == 0.0 and self.origin_y == 0.0
+
+    def world_bounds(self):
+        """``(x0, y0, x1, y1)`` of the visible part of the world."""
+        x0, y0 = self.to_world(0, 0)
+        x1, y1 = self.to_world(self.width, self.height)
+        return x0, y0, x1, y1
+
+
+def visible_edges(store, bounds):
+    """Indices (in CSR order) of the edges whose bounding box overlaps ``bounds``."""
+    x0, y0, x1, y1 = bounds
+
+    if np is not None:
+        positions = store.position_array()
+        edges = store.edge_array()
+        start, end = positions[edges[:, 0]], positions[edges[:, 1]]
+        low, high = np.minimum(start, end), np.maximum(start, end)
+        inside = (high[:, 0] >= x0) & (low[:, 0] <= x1) & (high[:, 1] >= y0) & (low[:, 1] <= y1)
+        return np.flatnonzero(inside).tolist()
+
+    positions = store.positions
+    visible = []
+    for index, (node_1, node_2) in enumerate(store.edges()):
+        ax, ay = positions[2 * node_1], positions[2 * node_1 + 1]
+        bx, by = positions[2 * node_2], positions[2 * node_2 + 1]
+        if max(ax, bx) >= x0 and min(ax, bx) <= x1 and max(ay, by) >= y0 and min(ay, by) <= y1:
+            visible.append(index)
+    return visible
+
+
+def density_raster(store, viewport, cell=2):
+    """Count how many edges cross every ``cell`` x ``cell`` pixel block of the viewport.
+
+    Every edge is sampled about once per block along its on-screen length. Returns
+    ``(columns, rows, counts)`` with ``counts`` a flat row-major sequence of ``columns * rows`` values.
+    """
+    columns = max(1, math.ceil(viewport.width / cell))
+    rows = max(1, math.ceil(viewport.height / cell))
+    # Block coordinates of a world point are (world - origin) * scale / cell
+    step = viewport.scale / cell
+
+    if np is not None:
+        return columns, rows, _density_numpy(store, viewport, step, columns, rows)
+
+    counts = array("l", bytes(array("l").itemsize * columns * rows))
+    positions = store.positions
+    for node_1, node_2 in store.edges():
+        ax = (positions[2 * node_1] - viewport.origin_x) * step
+        ay = (positions[2 * node_1 + 1] - viewport.origin_y) * step
+        bx = (positions[2 * node_2] - viewport.origin_x) * step
+        by = (positions[2 * node_2 + 1] - viewport.origin_y) * step
+        clipped = clip_segment(ax, ay, bx, by, columns, rows)
+        if clipped is None:
+            continue
+
+        ax, ay, bx, by = clipped
+        samples = int(max(abs(bx - ax), abs(by - ay))) + 1
+        for sample in range(samples + 1):
+            t = sample / samples
+            column, row = int(ax + (bx - ax) * t), int(ay + (by - ay) * t)
+            if 0 <= column < columns and 0 <= row < rows:
+                counts[row * columns + column] += 1
+
+    return columns, rows, counts
+
+
+def clip_segment(ax, ay, bx, by, columns, rows):
+    """The part of segment a-b inside ``[0, columns] x [0, rows]`` (Liang-Barsky), or None."""
+    t0, t1 = 0.0, 1.0
+    for start, delta, limit in ((ax, bx - ax, columns), (ay, by - ay, rows)):
+        if delta == 0:
+            if start < 0 or start > limit:
+                return None
+            continue
+        low, high = -start / delta, (limit - start) / delta
+        t0, t1 = max(t0, min(low, high)), min(t1, max(low, high))
+    if t0 > t1:
+        return None
+    return ax + (bx - ax) * t0, ay + (by - ay) * t0, ax + (bx - ax) * t1, ay + (by - ay) * t1
+
+
+def clip_segments(start, end, columns, rows):
+    """Vectorised clip_segment() of (n, 2) start and end point arrays, segments outside the box are dropped."""
+    delta = end - start
+    limit = np.array([columns, rows])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        low, high = -start / delta, (limit - start) / delta
+    flat = delta == 0
+    outside = flat & ((start < 0) | (start > limit))
+    low = np.where(flat, -np.inf, low)
+    high = np.where(flat, np.inf, high)
+    t0 = np.maximum(0.0, np.minimum(low, high).max(axis=1))
+    t1 = np.minimum(1.0, np.maximum(low, high).min(axis=1))
+    keep = (t0 <= t1) & ~outside.any(axis=1)
+    return start[keep] + delta[keep] * t0[keep, None], start[keep] + delta[keep] * t1[keep, None]
+
+
+def _density_numpy(store, viewport, step, columns, rows):
+    origin = np.array([viewport.origin_x, viewport.origin_y])
+    points = (store.position_array() - origin) * step
+    edges = store.edge_array()
+    start, end = points[edges[:, 0]], points[edges[:, 1]]
+
+    # Clip every edge to the raster, so only the visible part is sampled
+    start, end = clip_segments(start, end, columns, rows)
+
+    samples = np.abs(end - start).max(axis=1).astype(np.int64) + 1
+    counts = np.zeros(columns * rows, dtype=np.int64)
+
+    for _, _, x, y in sample_segments(start, end, samples):
+        keep = (x >= 0) & (x < columns) & (y >= 0) & (y < rows)
+        cells = y[keep].astype(np.int64) * columns + x[keep].astype(np.int64)
+        counts += np.bincount(cells, minlength=columns * rows)
+
+    return counts
+
+
+def sample_segments(start, end, samples, batch_samples=RASTER_BATCH_SAMPLES):
+    """Evenly spaced points along segments, ``samples[i] + 1`` of them on segment i including its ends.
+
+    Yields ``(first, stop, x, y)`` per batch of about ``batch_samples`` points, the points of
+    segments ``first`` to ``stop - 1`` one after the other.
+    """
+    # Split into batches of about batch_samples sample points
+    ends = np.cumsum(samples + 1)
+    bounds = np.searchsorted(ends, np.arange(batch_samples, ends[-1] if len(ends) else 0, batch_samples))
+    bounds = np.concatenate(([0], bounds, [len(samples)]))
+
+    for batch_start, batch_stop in zip(bounds[:-1], bounds[1:]):
+        if batch_stop <= batch_start:
+            continue
+        repeats = samples[batch_start:batch_stop] + 1
+        first = np.cumsum(repeats) - repeats
+        t = (np.arange(repeats.sum()) - np.repeat(first, repeats)) / np.repeat(repeats - 1, repeats)
+        x0, y0 = start[batch_start:batch_stop, 0], start[batch_start:batch_stop, 1]
+        dx, dy = end[batch_start:batch_stop, 0] - x0, end[batch_start:batch_stop, 1] - y0
+        yield (batch_start, batch_stop, np.repeat(x0, repeats) + np.repeat(dx, repeats) * t,
+               np.repeat(y0, repeats) + np.repeat(dy, repeats) * t)
+
+
+def parse_color(color):
+    """``(r, g, b)`` of a '#rrggbb' color. Tk color names have to be resolved by Tk (``winfo_rgb``) first."""
+    if len(color) != 7 or not color.startswith("#"):
+        raise ValueError(f"Not a '#rrggbb' color: {color!r}")
+    return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+
+
+def raster_ppm(columns, rows, counts, background, foreground):
+    """Binary PPM image of a density raster, log-scaled from ``background`` (empty) to ``foreground`` (densest)."""
+    background, foreground = parse_color(background), parse_color(foreground)
+    header = f"P6 {columns} {rows} 255\n".encode()
+
+    if np is not None:
+        counts = np.asarray(counts, dtype=np.float64)
+        peak = counts.max() if len(counts) else 0
+        level = np.log1p(counts) / math.log1p(peak) if peak > 0 else counts
+        pixels = np.array(background) + np.outer(level, np.subtract(foreground, background))
+        return header + np.rint(pixels).astype(np.uint8).tobytes()
+
+    peak = max(counts, default=0)
+    scale = 1 / math.log1p(peak) if peak > 0 else 0.0
+    pixels = bytearray()
+    for count in counts:
+        level = math.log1p(count) * scale
+        pixels.extend(round(b + (f - b) * level) for b, f in zip(background, foreground))
+    return header + bytes(pixels)
@@ -0,0 +1,233 @@
+"""Multilevel (coarsen - layout - refine) force-directed layout.
+
+The graph is coarsened repeatedly, either by heavy-edge matching or by contracting
+Louvain communities, the coarsest graph is laid out from scratch and every finer level
+starts from the positions of its coarse parent and only needs a few refining iterations.
+"""
+import math
+import random
+from collections import defaultdict
+
+import profiling
+from algorithm import ForceDirectGraph
+from community import local_moving, relabel
+
+
+def adjacency_from_edges(num_nodes, edges):
+    """Undirected weighted adjacency as a list of ``{neighbor: weight}`` dicts, self-loops dropped."""
+    adjacency = [defaultdict(float) for _ in range(num_nodes)]
+    for node_1, node_2 in edges:
+        if node_1 != node_2:
+            adjacency[node_1][node_2] += 1.0
+            adjacency[node_2][node_1] += 1.0
+    return adjacency
+
+
+def heavy_edge_matching(adjacency, rng):
+    """Pair every node with its unmatched neighbour of largest edge weight. Returns ``(parent, coarse_count)``."""
+    parent = [-1] * len(adjacency)
+    order = list(range(len(adjacency)))
+    rng.shuffle(order)
+    count = 0
+
+    for node in order:
+        if parent[node] != -1:
+            continue
+
+        best, best_weight = None, 0.0
+        for neighbor, weight in adjacency[node].items():
+            if parent[neighbor] == -1 and weight > best_weight:
+                best, best_weight = neighbor, weight
+
+        parent[node] = count
+        if best is not None:
+            parent[best] = count
+        count += 1
+
+    return parent, count
+
+
+def community_contraction(adjacency, rng):
+    """Group nodes by one level of Louvain local moving. Returns ``(parent, coarse_count)``."""
+    offsets = [0]
+    targets = []
+    weights = []
+    for row in adjacency:
+        targets.extend(row.keys())
+        weights.extend(row.values())
+        offsets.append(len(targets))
+
+    partition, _ = local_moving(offsets, targets, weights, rng=rng)
+    return relabel(partition)
+
+
+def contract(adjacency, parent, coarse_count):
+    coarse = [defaultdict(float) for _ in range(coarse_count)]
+    for node, row in enumerate(adjacency):
+        coarse_node = parent[node]
+        for neighbor, weight in row.items():
+            coarse_neighbor = parent[neighbor]
+            if coarse_neighbor != coarse_node:
+                coarse[coarse_node][coarse_neighbor] += weight
+    return coarse
+
+
+COARSENING = {
+    "matching": heavy_edge_matching,
+    "community": community_contraction,
+}
+
+
+class MultilevelLayout:
+    """Iterator over the levels of a multilevel layout, coarsest first.
+
+    Every step lays out one level and returns the positions of the input nodes (``{index: [x, y]}``),
+    each node placed at its representative on that level and the level scaled to fit the bounding
+    box of the starting positions. Remaining keyword arguments go to the ForceDirectGraph run on
+    every level, finer levels start with the temperature the level before ended with.
+    """
+
+    def __init__(self, positions, edges, coarsening="matching", min_nodes=50, max_levels=30, min_reduction=0.95,
+                 coarsest_iterations=200, level_iterations=30, jitter=1.0, seed=None, **layout_kwargs):
+        if coarsening not in COARSENING:
+            raise ValueError(f"Unknown coarsening: {coarsening!r}")
+
+        self.positions = {index: list(coords) for index, coords in enumerate(positions)}
+        self.coarsest_iterations = coarsest_iterations
+        self.level_iterations = level_iterations
+        self.jitter = jitter
+        self.layout_kwargs = layout_kwargs
+        self.rng = random.Random(seed)
+        self.store = None
+        self.iterations_done = 0
+        self.node_updates = 0  # iterations times the node count of their level
+        self.bounds = self._bounds()
+        self._level_layout = None
+
+        # parents[k][i] is the node of level k + 1 that node i of level k was merged into
+        with profiling.active.phase("layout.coarsening"):
+            self.adjacencies = [adjacency_from_edges(len(self.positions), edges)]
+            self.parents = []
+            while len(self.adjacencies) < max_levels and len(self.adjacencies[-1]) > min_nodes:
+                adjacency = self.adjacencies[-1]
+                parent, coarse_count = COARSENING[coarsening](adjacency, self.rng)
+                if coarse_count > min_reduction * len(adjacency):
+                    break  # coarsening has stalled, e.g. on star-like parts of the graph
+                self.parents.append(parent)
+                self.adjacencies.append(contract(adjacency, parent, coarse_count))
+
+        self.level = len(self.adjacencies)  # index of the level laid out next is level - 1
+        self.level_positions = None
+        self.max_iterations = len(self.adjacencies)
+
+    @classmethod
+    def from_store(cls, store, **kwargs):
+        """Lay out a GraphStore, every level is written back to the store."""
+        layout = cls(store.position_list(), list(store.edges()), **kwargs)
+        layout.store = store
+        return layout
+
+    @property
+    def level_sizes(self):
+        """Node count of every level, finest first."""
+        return [len(adjacency) for adjacency in self.adjacencies]
+
+    @property
+    def energy(self):
+        """Final energy of the level laid out last."""
+        return self._level_layout.energy if self._level_layout is not None else None
+
+    @property
+    def converged(self):
+        """True once the finest level has been laid out and settled."""
+        return self.level == 0 and self._level_layout is not None and self._level_layout.converged
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.level == 0:
+            raise StopIteration
+
+        self.level -= 1
+        adjacency = self.adjacencies[self.level]
+
+        layout_kwargs = self.layout_kwargs
+        if self.level_positions is None:
+            positions = self._initial_positions(len(adjacency))
+            iterations = self.coarsest_iterations
+        else:
+            # The coarse parent already has the layout's shape, the refinement only has to settle
+            temperature = layout_kwargs.get("temperature")
+            if temperature is not None:
+                layout_kwargs = dict(layout_kwargs,
+                                     temperature=min(temperature, self._level_layout.schedule.temperature))
+            parent = self.parents[self.level]
+            coarse = self._expanded(self.level_positions, len(adjacency) / len(self.adjacencies[self.level + 1]))
+            positions = {node: [coarse[parent[node]][0] + self.rng.uniform(-self.jitter, self.jitter),
+                                coarse[parent[node]][1] + self.rng.uniform(-self.jitter, self.jitter)]
+                         for node in range(len(adjacency))}
+            iterations = self.level_iterations
+
+        edges = [(node, neighbor) for node, row in enumerate(adjacency) for neighbor in row if node < neighbor]
+        layout = ForceDirectGraph(positions, edges, iterations, **layout_kwargs)
+        for _ in layout:
+            pass
+
+        self.iterations_done += layout.current_iteration
+        self.node_updates += layout.current_iteration * len(adjacency)
+        self._level_layout = layout
+        self.level_positions = layout.positions
+        profiling.active.count("layout.levels")
+        with profiling.active.phase("layout.projection"):
+            return self._project()
+
+    @staticmethod
+    def _expanded(positions, node_ratio):
+        # The finer level has node_ratio times more nodes at about the same spacing, so it needs
+        # sqrt(node_ratio) times the width and height
+        scale = node_ratio ** 0.5
+        center_x = sum(x for x, _ in positions.values()) / len(positions)
+        center_y = sum(y for _, y in positions.values()) / len(positions)
+        return {node: [center_x + (x - center_x) * scale, center_y + (y - center_y) * scale]
+                for node, (x, y) in positions.items()}
+
+    def _bounds(self):
+        """``(min_x, min_y, max_x, max_y)`` of the starting positions, 1000 x 1000 when they are all in one spot."""
+        xs = [x for x, _ in self.positions.values()] or [0.0]
+        ys = [y for _, y in self.positions.values()] or [0.0]
+        if max(xs) - min(xs) < 1 or max(ys) - min(ys) < 1:
+            return 0.0, 0.0, 1000.0, 1000.0
+        return min(xs), min(ys), max(xs), max(ys)
+
+    def _initial_positions(self, count):
+        min_x, min_y, max_x, max_y = self.bounds
+        return {node: [self.rng.uniform(min_x, max_x), self.rng.uniform(min_y, max_y)] for node in range(count)}
+
+    def _fitted(self, positions):
+        # Every expansion grows the layout by sqrt(node_ratio), the finest level would end up far outside
+        # the starting box. Uniform scaling keeps its shape
+        min_x, min_y, max_x, max_y = self.bounds
+        xs = [x for x, _ in positions.values()]
+        ys = [y for _, y in positions.values()]
+        width, height = max(xs) - min(xs), max(ys) - min(ys)
+        scale = min((max_x - min_x) / width if width else math.inf, (max_y - min_y) / height if height else math.inf)
+        if scale == math.inf:
+            scale = 1.0
+        center_x, center_y = (min(xs) + max(xs)) / 2, (min(ys) + max(ys)) / 2
+        offset_x, offset_y = (min_x + max_x) / 2, (min_y + max_y) / 2
+        return {node: (offset_x + (x - center_x) * scale, offset_y + (y - center_y) * scale)
+                for node, (x, y) in positions.items()}
+
+    def _project(self):
+        fitted = self._fitted(self.level_positions)
+        for index in self.positions:
+            node = index
+            for parent in self.parents[:self.level]:
+                node = parent[node]
+            x, y = fitted[node]
+            self.positions[index] = [x, y]
+            if self.store is not None:
+                self.store.set_position(index, x, y)
+
+        return self.positions
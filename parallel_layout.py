@@ -0,0 +1,80 @@
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from algorithm import add_repulsion_rows
+from shared_arrays import open_shared
+
+# Set in every worker process by _attach()
+_worker = {}
+
+
+def _attach(positions_name, forces_name, num_nodes, repulsion_const, tile_elements):
+    positions_shm = open_shared(positions_name)
+    forces_shm = open_shared(forces_name)
+    _worker.update(
+        segments=(positions_shm, forces_shm),
+        positions=np.ndarray((num_nodes, 2), dtype=np.float64, buffer=positions_shm.buf),
+        forces=np.ndarray((num_nodes, 2), dtype=np.float64, buffer=forces_shm.buf),
+        repulsion_const=repulsion_const,
+        tile_elements=tile_elements
+    )
+
+
+def _repulsion_block(start, stop):
+    forces = _worker["forces"]
+    forces[start:stop] = 0
+    add_repulsion_rows(_worker["positions"], forces, start, stop, _worker["repulsion_const"],
+                       _worker["tile_elements"])
+
+
+def split_blocks(num_nodes, count):
+    """Split ``0..num_nodes`` into at most ``count`` contiguous ``(start, stop)`` blocks of near equal size."""
+    count = max(1, min(count, num_nodes))
+    bounds = [num_nodes * i // count for i in range(count + 1)]
+    return [(start, stop) for start, stop in zip(bounds, bounds[1:]) if stop > start]
+
+
+class SharedRepulsionPool:
+    """Process pool computing all-pairs repulsion in node blocks.
+
+    Positions and forces live in shared memory, the layout moves the nodes in ``positions`` directly
+    and every step only sends block bounds to the workers.
+    Each worker owns the force rows of its block, so reducing the partial results is free.
+    """
+
+    def __init__(self, num_nodes, workers, repulsion_const, tile_elements):
+        size = max(1, 16 * num_nodes)
+        self._positions_shm = shared_memory.SharedMemory(create=True, size=size)
+        self._forces_shm = shared_memory.SharedMemory(create=True, size=size)
+        self.positions = np.ndarray((num_nodes, 2), dtype=np.float64, buffer=self._positions_shm.buf)
+        self.forces = np.ndarray((num_nodes, 2), dtype=np.float64, buffer=self._forces_shm.buf)
+        self.blocks = split_blocks(num_nodes, workers)
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_attach,
+            initargs=(self._positions_shm.name, self._forces_shm.name, num_nodes, repulsion_const, tile_elements)
+        )
+        self._finalizer = weakref.finalize(self, SharedRepulsionPool._release, self.executor,
+                                           self._positions_shm, self._forces_shm)
+
+    def repulsion(self):
+        """Repulsive force on every node at the current ``positions``, as a new (n, 2) array."""
+        futures = [self.executor.submit(_repulsion_block, start, stop) for start, stop in self.blocks]
+        for future in futures:
+            future.result()
+        return self.forces.copy()
+
+    @staticmethod
+    def _release(executor, *segments):
+        executor.shutdown(wait=True)
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+
+    def close(self):
+        # Drop the array views first, a segment with exported buffers can't be closed
+        self.positions = self.forces = None
+        self._finalizer()
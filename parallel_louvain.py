@@ -0,0 +1,222 @@
+"""Many seeded Louvain runs over a range of resolutions, fanned out to a process pool.
+
+The symmetric CSR adjacency is copied once into shared memory, workers only receive
+``(resolution, seed)`` pairs and send back partitions.
+
+Usage: python -m parallel_louvain facebook_combined.txt --resolutions 0.5 1 2 --seeds 8 -o partition.csv
+"""
+import argparse
+import csv
+import sys
+import weakref
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import profiling
+from community import csr_from_edges, louvain_csr, modularity, normalized_mutual_information
+from graph_io import load_graph
+from shared_arrays import attach_array, share_array
+
+SweepRun = namedtuple("SweepRun", ["resolution", "seed", "modularity", "score", "num_communities", "partition",
+                                   "levels"])
+SweepRun.__doc__ = """One Louvain run of a sweep.
+
+modularity      - modularity of ``partition`` at the run's ``resolution``, the value Louvain optimised
+score           - modularity of ``partition`` at resolution 1, comparable between resolutions
+num_communities - number of communities in ``partition``
+partition       - array of the community index of every node
+levels          - array partition of every aggregation level, finest first, the last one is ``partition``
+"""
+
+SweepResult = namedtuple("SweepResult", ["best", "runs", "stability"])
+SweepResult.__doc__ = """Outcome of louvain_sweep().
+
+best      - the SweepRun with the highest score
+runs      - every SweepRun, in (resolution, seed) order
+stability - {resolution: mean NMI over all pairs of runs at that resolution}, 1.0 when every seed agrees
+"""
+
+CSR_TYPECODES = ("q", "q", "d")  # offsets, targets, weights
+
+# Graph the worker process is attached to, set by _attach()
+_worker = {}
+
+
+def _attach(names, lengths):
+    """Attach to the CSR segments ``names``, detaching from the previous graph first."""
+    if _worker.get("names") == names:
+        return
+    for view in _worker.pop("csr", ()):
+        view.release()
+    for segment in _worker.pop("segments", ()):
+        segment.close()
+
+    segments, views = [], []
+    for name, typecode, length in zip(names, CSR_TYPECODES, lengths):
+        segment, view = attach_array(name, typecode, length)
+        segments.append(segment)
+        views.append(view)
+    _worker.update(names=names, segments=segments, csr=views)
+
+
+def _run(offsets, targets, weights, resolution, seed, max_levels):
+    result = louvain_csr(offsets, targets, weights, resolution=resolution, seed=seed, max_levels=max_levels)
+    score = result.modularity if resolution == 1.0 else modularity(offsets, targets, weights, result.partition)
+    return SweepRun(resolution, seed, result.modularity, score, len(set(result.partition)),
+                    array("l", result.partition), [array("l", level) for level, _ in result.levels])
+
+
+def _run_shared(names, lengths, resolution, seed, max_levels):
+    _attach(names, lengths)
+    return _run(*_worker["csr"], resolution, seed, max_levels)
+
+
+class SharedLouvainPool:
+    """Process pool running Louvain on a read-only copy of a CSR graph in shared memory.
+
+    The worker processes outlive the graph: ``load`` swaps in another one, the workers attach
+    to it with their next task.
+    """
+
+    def __init__(self, workers, offsets=None, targets=None, weights=None):
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.workers = workers
+        self._segments = []  # the loaded graph's offsets, targets and weights
+        self._lengths = []
+        self._finalizer = weakref.finalize(self, SharedLouvainPool._release, self.executor, self._segments)
+        if offsets is not None:
+            self.load(offsets, targets, weights)
+
+    def load(self, offsets, targets, weights):
+        """Copy a graph into shared memory, replacing the one loaded before."""
+        self._unlink(self._segments)
+        self._lengths.clear()
+        for values, typecode in zip((offsets, targets, weights), CSR_TYPECODES):
+            segment, length = share_array(values, typecode)
+            self._segments.append(segment)
+            self._lengths.append(length)
+
+    def map(self, tasks, max_levels=None):
+        """SweepRun of every ``(resolution, seed)`` in ``tasks`` on the loaded graph, in order."""
+        if not self._segments:
+            raise ValueError("No graph loaded")
+        names = [segment.name for segment in self._segments]
+        futures = [self.executor.submit(_run_shared, names, list(self._lengths), resolution, seed, max_levels)
+                   for resolution, seed in tasks]
+        return [future.result() for future in futures]
+
+    @staticmethod
+    def _unlink(segments):
+        # Workers still attached keep their mapping until they move on to the next graph
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+        segments.clear()
+
+    @staticmethod
+    def _release(executor, segments):
+        executor.shutdown(wait=True)
+        SharedLouvainPool._unlink(segments)
+
+    def close(self):
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def partition_stability(partitions):
+    """Mean NMI over all pairs of ``partitions``, 1.0 for fewer than two."""
+    pairs = list(combinations(partitions, 2))
+    if not pairs:
+        return 1.0
+    return sum(normalized_mutual_information(p1, p2) for p1, p2 in pairs) / len(pairs)
+
+
+def louvain_sweep_csr(offsets, targets, weights, resolutions=(1.0,), seeds=range(8), workers=1, max_levels=None,
+                      pool=None):
+    """Run Louvain once for every resolution and seed, in ``workers`` processes when more than one.
+
+    A SharedLouvainPool given as ``pool`` is used, and kept, instead of starting a new one.
+    """
+    tasks = [(resolution, seed) for resolution in resolutions for seed in seeds]
+    if not tasks:
+        raise ValueError("Need at least one resolution and one seed")
+
+    with profiling.active.phase("louvain.sweep"):
+        if pool is not None and len(tasks) > 1:
+            pool.load(offsets, targets, weights)
+            runs = pool.map(tasks, max_levels)
+        elif workers > 1 and len(tasks) > 1:
+            with SharedLouvainPool(min(workers, len(tasks)), offsets, targets, weights) as pool:
+                runs = pool.map(tasks, max_levels)
+        else:
+            runs = [_run(offsets, targets, weights, resolution, seed, max_levels) for resolution, seed in tasks]
+
+    stability = {resolution: partition_stability([run.partition for run in runs if run.resolution == resolution])
+                 for resolution in dict.fromkeys(resolutions)}
+    return SweepResult(max(runs, key=lambda run: run.score), runs, stability)
+
+
+def louvain_sweep(num_nodes, edges, weights=None, **kwargs):
+    """louvain_sweep_csr() on ``(i, j)`` index pairs."""
+    with profiling.active.phase("louvain.csr_build"):
+        csr = csr_from_edges(num_nodes, edges, weights)
+    return louvain_sweep_csr(*csr, **kwargs)
+
+
+def louvain_sweep_store(store, **kwargs):
+    """louvain_sweep_csr() on a GraphStore, its edges are treated as undirected."""
+    return louvain_sweep(store.num_nodes, store.edges(), store.weights, **kwargs)
+
+
+def summary(result):
+    """One line per resolution: best and mean modularity, community count of the best run and stability."""
+    lines = []
+    for resolution, stability in result.stability.items():
+        runs = [run for run in result.runs if run.resolution == resolution]
+        best = max(runs, key=lambda run: run.modularity)
+        mean = sum(run.modularity for run in runs) / len(runs)
+        lines.append(f"resolution {resolution:g}: best modularity {best.modularity:.4f} (seed {best.seed}), "
+                     f"mean {mean:.4f}, {best.num_communities} communities, stability (NMI) {stability:.4f}")
+    best = result.best
+    # Runs are ranked by their modularity at resolution 1, which is what makes resolutions comparable
+    lines.append(f"best: resolution {best.resolution:g}, seed {best.seed}, modularity {best.modularity:.4f}, "
+                 f"{best.score:.4f} at resolution 1, {best.num_communities} communities")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m parallel_louvain", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("edges", help="edge list file, one 'node node' pair per line, or a binary graph file")
+    parser.add_argument("-o", "--output", help="write the best partition as 'node,community' CSV")
+    parser.add_argument("--resolutions", type=float, nargs="+", default=[1.0])
+    parser.add_argument("--seeds", type=int, default=8, help="runs per resolution, seeded 0..SEEDS-1")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("--max-levels", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    node_ids, store = load_graph(args.edges)
+    result = louvain_sweep_store(store, resolutions=args.resolutions, seeds=range(args.seeds),
+                                 workers=args.workers, max_levels=args.max_levels)
+    print(summary(result), file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["node", "community"])
+            writer.writerows(zip(node_ids, result.best.partition))
+        print(f"partition written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
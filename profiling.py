@@ -0,0 +1,156 @@
+"""Opt-in per-phase timers and counters.
+
+Instrumented code looks the profiler up on every call::
+
+    with profiling.active.phase("layout.repulsion"):
+        ...
+    profiling.active.count("layout.iterations")
+
+While disabled ``active`` is a null profiler whose methods do nothing, so instrumentation
+costs one attribute lookup and an empty ``with`` per phase. Phases are placed around whole
+passes (one per iteration, level or import step), never inside per-node loops.
+"""
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class NullProfiler:
+    enabled = False
+    _phase = _NullPhase()
+
+    def phase(self, name):
+        return self._phase
+
+    def count(self, name, amount=1):
+        pass
+
+
+class Profiler:
+    """Accumulates wall-clock time per phase and named counters, safe to use from several threads.
+
+    Observers are called as ``observer(kind, name, value)`` with kind ``"phase"`` (value in seconds)
+    or ``"count"`` (value is the increment). With ``track_memory`` tracemalloc runs while the
+    profiler is active and the traced peak is reported, at a noticeable slowdown.
+    """
+
+    enabled = True
+
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.phases = {}  # name: {"seconds": total, "calls": n, "max_seconds": longest call}
+        self.counters = {}  # name: total
+        self.observers = []
+        self.owns_tracing = False  # set by enable() when it started tracemalloc
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add_observer(self, observer):
+        self.observers.append(observer)
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            seconds = time.perf_counter() - started
+            with self._lock:
+                stats = self.phases.setdefault(name, {"seconds": 0.0, "calls": 0, "max_seconds": 0.0})
+                stats["seconds"] += seconds
+                stats["calls"] += 1
+                stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            for observer in self.observers:
+                observer("phase", name, seconds)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+        for observer in self.observers:
+            observer("count", name, amount)
+
+    def reset(self):
+        with self._lock:
+            self.phases.clear()
+            self.counters.clear()
+            self.started = time.perf_counter()
+        if self.track_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+
+    def peak_memory(self):
+        """``{"traced_peak_bytes", "max_rss_bytes"}``, entries are None when not measured."""
+        traced = tracemalloc.get_traced_memory()[1] if self.track_memory and tracemalloc.is_tracing() else None
+        rss = None
+        if resource is not None:
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            if sys.platform != "darwin":  # kilobytes everywhere but macOS, which reports bytes
+                rss *= 1024
+        return {"traced_peak_bytes": traced, "max_rss_bytes": rss}
+
+    def to_dict(self):
+        with self._lock:
+            phases = {name: dict(stats) for name, stats in self.phases.items()}
+            counters = dict(self.counters)
+        return {
+            "elapsed_seconds": time.perf_counter() - self.started,
+            "phases": phases,
+            "counters": counters,
+            "memory": self.peak_memory(),
+        }
+
+    def write_json(self, path):
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def report(self):
+        """Human readable summary, slowest phases first."""
+        data = self.to_dict()
+        lines = [f"Profile over {data['elapsed_seconds']:.2f} s"]
+        for name, stats in sorted(data["phases"].items(), key=lambda item: -item[1]["seconds"]):
+            lines.append(f"{name}: {stats['seconds']:.4f} s in {stats['calls']} calls "
+                         f"(max {stats['max_seconds']:.4f} s)")
+        for name, value in sorted(data["counters"].items()):
+            lines.append(f"{name}: {value}")
+        for name, value in data["memory"].items():
+            if value is not None:
+                lines.append(f"{name}: {value / 2 ** 20:.1f} MiB")
+        return "\n".join(lines)
+
+
+active = NullProfiler()
+
+
+def enable(track_memory=False):
+    """Install and return a fresh Profiler as ``active``."""
+    global active
+    disable()
+    active = Profiler(track_memory)
+    if track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        active.owns_tracing = True
+    return active
+
+
+def disable():
+    """Go back to the null profiler. Returns the profiler that was active, or None."""
+    global active
+    profiler, active = active, NullProfiler()
+    if profiler.enabled and profiler.owns_tracing:
+        tracemalloc.stop()
+    return profiler if profiler.enabled else None
@@ -0,0 +1,166 @@
+import math
+
+
+class QuadTree:
+    """Barnes-Hut quadtree over unit point masses.
+
+    Cells are stored in flat lists indexed by cell id, so building and walking
+    the tree does not allocate one Python object per cell.
+    """
+
+    MAX_DEPTH = 32
+
+    def __init__(self, points):
+        self.points = points
+        self.center_x = []
+        self.center_y = []
+        self.half_size = []
+        self.mass = []
+        self.mass_x = []
+        self.mass_y = []
+        self.children = []  # cell_id: [child_id, ...] or None for leaves
+        self.bodies = []  # cell_id: [point_index, ...] for leaves
+
+        if not points:
+            return
+
+        xs = [x for x, _ in points]
+        ys = [y for _, y in points]
+        min_x, max_x = min(xs), max(xs)
+        min_y, max_y = min(ys), max(ys)
+        half = max(max_x - min_x, max_y - min_y) / 2 + 1e-9
+        self._new_cell((min_x + max_x) / 2, (min_y + max_y) / 2, half)
+
+        for index in range(len(points)):
+            self._insert(index)
+
+        self._compute_mass(0)
+
+    def _new_cell(self, cx, cy, half):
+        self.center_x.append(cx)
+        self.center_y.append(cy)
+        self.half_size.append(half)
+        self.mass.append(0)
+        self.mass_x.append(0.0)
+        self.mass_y.append(0.0)
+        self.children.append(None)
+        self.bodies.append([])
+        return len(self.center_x) - 1
+
+    def _child_for(self, cell, x, y):
+        quadrant = (x >= self.center_x[cell]) + 2 * (y >= self.center_y[cell])
+        return self.children[cell][quadrant]
+
+    def _subdivide(self, cell):
+        cx, cy = self.center_x[cell], self.center_y[cell]
+        quarter = self.half_size[cell] / 2
+        self.children[cell] = [
+            self._new_cell(cx - quarter, cy - quarter, quarter),
+            self._new_cell(cx + quarter, cy - quarter, quarter),
+            self._new_cell(cx - quarter, cy + quarter, quarter),
+            self._new_cell(cx + quarter, cy + quarter, quarter),
+        ]
+
+        bodies = self.bodies[cell]
+        self.bodies[cell] = []
+        for index in bodies:
+            x, y = self.points[index]
+            self.bodies[self._child_for(cell, x, y)].append(index)
+
+    def _insert(self, index):
+        x, y = self.points[index]
+        cell = 0
+        depth = 0
+
+        while True:
+            if self.children[cell] is not None:
+                cell = self._child_for(cell, x, y)
+                depth += 1
+                continue
+
+            bodies = self.bodies[cell]
+            if not bodies or depth >= self.MAX_DEPTH:
+                bodies.append(index)
+                return
+
+            # Occupied leaf - split it and retry from the same cell
+            self._subdivide(cell)
+
+    def _compute_mass(self, root):
+        # Post-order walk without recursion, so deep trees don't hit the recursion limit
+        order = []
+        stack = [root]
+        while stack:
+            cell = stack.pop()
+            order.append(cell)
+            if self.children[cell] is not None:
+                stack.extend(self.children[cell])
+
+        for cell in reversed(order):
+            if self.children[cell] is None:
+                bodies = self.bodies[cell]
+                mass = len(bodies)
+                mx = sum(self.points[i][0] for i in bodies)
+                my = sum(self.points[i][1] for i in bodies)
+            else:
+                mass = 0
+                mx = my = 0.0
+                for child in self.children[cell]:
+                    mass += self.mass[child]
+                    mx += self.mass_x[child] * self.mass[child]
+                    my += self.mass_y[child] * self.mass[child]
+
+            self.mass[cell] = mass
+            if mass:
+                self.mass_x[cell] = mx / mass
+                self.mass_y[cell] = my / mass
+
+    def repulsion(self, index, repulsion_const, theta):
+        """Approximate repulsive force acting on point ``index`` from every other point."""
+        if not self.points:
+            return 0.0, 0.0
+
+        return self.repulsion_at(*self.points[index], repulsion_const, theta, skip=index)
+
+    def repulsion_at(self, x, y, repulsion_const, theta, skip=None):
+        """Approximate repulsive force of all points (but ``skip``) on a unit mass at ``(x, y)``."""
+        if not self.points:
+            return 0.0, 0.0
+
+        fx = fy = 0.0
+        stack = [0]
+
+        while stack:
+            cell = stack.pop()
+            mass = self.mass[cell]
+            if mass == 0:
+                continue
+
+            if self.children[cell] is None:
+                for other in self.bodies[cell]:
+                    if other == skip:
+                        continue
+                    dx = self.points[other][0] - x
+                    dy = self.points[other][1] - y
+                    distance = math.sqrt(dx ** 2 + dy ** 2) + 0.1
+                    force = repulsion_const / (distance ** 2)
+                    fx -= force * dx / distance
+                    fy -= force * dy / distance
+                continue
+
+            half = self.half_size[cell]
+            contains_point = (abs(x - self.center_x[cell]) <= half
+                              and abs(y - self.center_y[cell]) <= half)
+            dx = self.mass_x[cell] - x
+            dy = self.mass_y[cell] - y
+            distance = math.sqrt(dx ** 2 + dy ** 2) + 0.1
+
+            if not contains_point and 2 * half < theta * distance:
+                # Far enough away - treat the whole cell as one body at its centre of mass
+                force = repulsion_const * mass / (distance ** 2)
+                fx -= force * dx / distance
+                fy -= force * dy / distance
+            else:
+                stack.extend(self.children[cell])
+
+        return fx, fy
@@ -0,0 +1,290 @@
+"""Off-screen rendering of a whole graph into a PNG of any size, without Tk.
+
+Usage: python -m render facebook_combined.txt positions.csv -o graph.png --width 4000 --height 4000 --louvain
+
+Positions are scaled to fit the image. Edges are sampled about once per pixel along their
+length and every sample is spread over the four pixels around it, which antialiases them;
+overlapping edges add up. Nodes are antialiased discs colored by community.
+"""
+import argparse
+import csv
+import math
+import struct
+import sys
+import time
+import zlib
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # numpy only makes rendering fast
+    np = None
+
+from community import louvain_store
+from const import CONST
+from graph_io import load_graph
+from lod import clip_segment, clip_segments, parse_color, sample_segments
+
+# Edges handed to numpy at once and sample points per batch, together they bound the temporary memory
+EDGE_CHUNK = 1 << 16
+BATCH_SAMPLES = 1 << 20
+
+
+def community_colors(partition, palette=CONST.COMMUNITY_COLORS):
+    """Color of every node, community ``c`` gets ``palette[c % len(palette)]``."""
+    return [palette[community % len(palette)] for community in partition]
+
+
+def fit_bounds(bounds, width, height, margin=CONST.RENDER_MARGIN_PX):
+    """``(scale, offset_x, offset_y)`` mapping the ``(x0, y0, x1, y1)`` box centered into the image.
+
+    The aspect ratio is kept, a pixel is ``world * scale + offset``.
+    """
+    if bounds is None:
+        return 1.0, 0.0, 0.0
+    x0, y0, x1, y1 = bounds
+    span_x, span_y = x1 - x0, y1 - y0
+    inner_width, inner_height = max(1, width - 2 * margin), max(1, height - 2 * margin)
+    scale = min(inner_width / span_x if span_x else math.inf, inner_height / span_y if span_y else math.inf)
+    if scale == math.inf:
+        scale = 1.0
+    offset_x = (width - span_x * scale) / 2 - x0 * scale
+    offset_y = (height - span_y * scale) / 2 - y0 * scale
+    return scale, offset_x, offset_y
+
+
+def render(positions, edges, width=CONST.RENDER_WIDTH_PX, height=CONST.RENDER_HEIGHT_PX, colors=None,
+           background=CONST.CANVAS_BACKGROUND_COLOR, edge_color=CONST.EDGE_COLOR,
+           edge_opacity=CONST.RENDER_EDGE_OPACITY, node_radius=CONST.RENDER_NODE_RADIUS_PX,
+           margin=CONST.RENDER_MARGIN_PX):
+    """Rasterise a graph. Returns ``width * height * 3`` bytes of RGB, row by row.
+
+    ``positions`` holds an ``(x, y)`` pair per node, ``edges`` ``(node, node)`` index pairs and
+    ``colors`` the color of every node (CONST.NODE_NON_SELECTED_COLOR for all when None).
+    A ``node_radius`` of 0 draws edges only.
+    """
+    if np is not None:
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        bounds = (*positions.min(axis=0), *positions.max(axis=0)) if len(positions) else None
+        scale, offset_x, offset_y = fit_bounds(bounds, width, height, margin)
+        points = positions * scale + np.array([offset_x, offset_y])
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        return _render_numpy(points, edges, width, height, colors, background, edge_color, edge_opacity,
+                             node_radius)
+
+    positions = [(x, y) for x, y in positions]
+    xs, ys = [x for x, _ in positions], [y for _, y in positions]
+    bounds = (min(xs), min(ys), max(xs), max(ys)) if positions else None
+    scale, offset_x, offset_y = fit_bounds(bounds, width, height, margin)
+    points = [(x * scale + offset_x, y * scale + offset_y) for x, y in positions]
+    return _render_python(points, edges, width, height, colors, background, edge_color, edge_opacity,
+                          node_radius)
+
+
+def _node_colors(colors, count):
+    if colors is None:
+        colors = [CONST.NODE_NON_SELECTED_COLOR] * count
+    if len(colors) != count:
+        raise ValueError(f"{len(colors)} colors for {count} nodes")
+    rgb = {color: parse_color(color) for color in set(colors)}
+    return [rgb[color] for color in colors]
+
+
+def _disc_offsets(radius):
+    """``(dx, dy, coverage)`` of the pixels a disc of ``radius`` centered on a pixel center touches."""
+    reach = int(math.ceil(radius + 0.5))
+    offsets = []
+    for dy in range(-reach, reach + 1):
+        for dx in range(-reach, reach + 1):
+            coverage = min(1.0, max(0.0, radius + 0.5 - math.hypot(dx, dy)))
+            if coverage > 0:
+                offsets.append((dx, dy, coverage))
+    return offsets
+
+
+def _render_numpy(points, edges, width, height, colors, background, edge_color, edge_opacity, node_radius):
+    coverage = np.zeros(width * height, dtype=np.float32)
+    for chunk_start in range(0, len(edges), EDGE_CHUNK):
+        chunk = edges[chunk_start:chunk_start + EDGE_CHUNK]
+        # Pixel centers are at +0.5, sample coordinates are shifted so the splat below is plain bilinear
+        start, end = clip_segments(points[chunk[:, 0]], points[chunk[:, 1]], width, height)
+        start, end = start - 0.5, end - 0.5
+        lengths = np.hypot(*(end - start).T)
+        samples = np.maximum(1, np.ceil(lengths)).astype(np.int64)
+        spacing = lengths / samples
+
+        for first, stop, x, y in sample_segments(start, end, samples, BATCH_SAMPLES):
+            weight = np.repeat(spacing[first:stop], samples[first:stop] + 1)
+            column, row = np.floor(x), np.floor(y)
+            fx, fy = x - column, y - row
+            column, row = column.astype(np.int64), row.astype(np.int64)
+            cells, weights = [], []
+            for dx, dy, share in ((0, 0, (1 - fx) * (1 - fy)), (1, 0, fx * (1 - fy)),
+                                  (0, 1, (1 - fx) * fy), (1, 1, fx * fy)):
+                cx, cy = column + dx, row + dy
+                keep = (cx >= 0) & (cx < width) & (cy >= 0) & (cy < height)
+                cells.append(cy[keep] * width + cx[keep])
+                weights.append((weight * share)[keep])
+            cells, weights = np.concatenate(cells), np.concatenate(weights)
+            if len(cells):
+                # Summed over the range of rows the batch touches only
+                low = cells.min()
+                summed = np.bincount(cells - low, weights)
+                coverage[low:low + len(summed)] += summed
+
+    # Opacity of n overlapping edges is 1 - (1 - opacity) ** n, computed on the summed coverage.
+    # Blended a band of rows at a time, so there is never a full float copy of the image
+    log_clear = np.float32(math.log1p(-min(edge_opacity, 0.999999)))
+    background_rgb = np.array(parse_color(background), dtype=np.float32)
+    edge_rgb = np.array(parse_color(edge_color), dtype=np.float32)
+    image = np.empty((width * height, 3), dtype=np.uint8)
+    for band in range(0, width * height, BATCH_SAMPLES):
+        alpha = -np.expm1(coverage[band:band + BATCH_SAMPLES] * log_clear)
+        image[band:band + BATCH_SAMPLES] = np.rint(background_rgb + alpha[:, None] * (edge_rgb - background_rgb))
+    del coverage
+
+    if node_radius > 0 and len(points):
+        node_rgb = np.array(_node_colors(colors, len(points)), dtype=np.float32)
+        centers = np.floor(points).astype(np.int64)
+        for dx, dy, share in _disc_offsets(node_radius):
+            cx, cy = centers[:, 0] + dx, centers[:, 1] + dy
+            keep = (cx >= 0) & (cx < width) & (cy >= 0) & (cy < height)
+            cells = cy[keep] * width + cx[keep]
+            under = image[cells].astype(np.float32)
+            image[cells] = np.rint(under + share * (node_rgb[keep] - under))
+
+    return image.tobytes()
+
+
+def _render_python(points, edges, width, height, colors, background, edge_color, edge_opacity, node_radius):
+    coverage = array("d", bytes(8 * width * height))
+    for node_1, node_2 in edges:
+        (ax, ay), (bx, by) = points[node_1], points[node_2]
+        clipped = clip_segment(ax, ay, bx, by, width, height)
+        if clipped is None:
+            continue
+
+        ax, ay, bx, by = (value - 0.5 for value in clipped)
+        length = math.hypot(bx - ax, by - ay)
+        samples = max(1, math.ceil(length))
+        weight = length / samples
+        for sample in range(samples + 1):
+            t = sample / samples
+            x, y = ax + (bx - ax) * t, ay + (by - ay) * t
+            column, row = math.floor(x), math.floor(y)
+            fx, fy = x - column, y - row
+            for dx, dy, share in ((0, 0, (1 - fx) * (1 - fy)), (1, 0, fx * (1 - fy)),
+                                  (0, 1, (1 - fx) * fy), (1, 1, fx * fy)):
+                if 0 <= column + dx < width and 0 <= row + dy < height:
+                    coverage[(row + dy) * width + column + dx] += weight * share
+
+    log_clear = math.log1p(-min(edge_opacity, 0.999999))
+    background, edge_rgb = parse_color(background), parse_color(edge_color)
+    image = array("d")
+    for value in coverage:
+        alpha = -math.expm1(value * log_clear)
+        image.extend(b + (e - b) * alpha for b, e in zip(background, edge_rgb))
+
+    if node_radius > 0:
+        offsets = _disc_offsets(node_radius)
+        for (x, y), rgb in zip(points, _node_colors(colors, len(points))):
+            column, row = math.floor(x), math.floor(y)
+            for dx, dy, share in offsets:
+                if 0 <= column + dx < width and 0 <= row + dy < height:
+                    cell = 3 * ((row + dy) * width + column + dx)
+                    for channel in range(3):
+                        image[cell + channel] += share * (rgb[channel] - image[cell + channel])
+
+    return bytes(round(value) for value in image)
+
+
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def encode_png(pixels, width, height, level=6):
+    """PNG file contents of ``width * height * 3`` bytes of RGB, compressed row by row."""
+    stride = 3 * width
+    if len(pixels) != stride * height:
+        raise ValueError(f"{len(pixels)} bytes of pixels for a {width}x{height} RGB image")
+
+    compressor = zlib.compressobj(level)
+    view = memoryview(pixels)
+    parts = []
+    for row in range(height):
+        # Filter type 0: the row as is
+        parts.append(compressor.compress(b"\0"))
+        parts.append(compressor.compress(view[row * stride:(row + 1) * stride]))
+    parts.append(compressor.flush())
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)  # 8 bit RGB
+    return (b"\x89PNG\r\n\x1a\n" + _png_chunk(b"IHDR", header) + _png_chunk(b"IDAT", b"".join(parts))
+            + _png_chunk(b"IEND", b""))
+
+
+def render_png(path, positions, edges, width=CONST.RENDER_WIDTH_PX, height=CONST.RENDER_HEIGHT_PX, **kwargs):
+    """render() into a PNG file at ``path``."""
+    pixels = render(positions, edges, width, height, **kwargs)
+    with open(path, "wb") as file:
+        file.write(encode_png(pixels, width, height))
+
+
+def render_store(path, store, width=CONST.RENDER_WIDTH_PX, height=CONST.RENDER_HEIGHT_PX, partition=None,
+                 **kwargs):
+    """render_png() of a GraphStore's positions and edges, nodes colored by ``partition`` if given."""
+    if partition is not None:
+        kwargs["colors"] = community_colors(partition)
+    if np is not None:
+        render_png(path, store.position_array(), store.edge_array(), width, height, **kwargs)
+    else:
+        render_png(path, store.position_list(), list(store.edges()), width, height, **kwargs)
+
+
+def read_positions(path, node_ids):
+    """Positions written by ``python -m layout``, CSV or .npy, in the order of ``node_ids``."""
+    if str(path).endswith(".npy"):
+        if np is None:
+            raise ImportError("Reading .npy files requires numpy")
+        return np.load(path).reshape(-1, 2).tolist()
+
+    with open(path, newline="") as file:
+        reader = csv.reader(file)
+        next(reader, None)
+        by_id = {int(node_id): (float(x), float(y)) for node_id, x, y in reader}
+    return [by_id[int(node_id)] for node_id in node_ids]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m render", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("edges", help="edge list file, one 'node node' pair per line, or a binary graph file")
+    parser.add_argument("positions", help="node positions from 'python -m layout', .csv or .npy")
+    parser.add_argument("-o", "--output", required=True, help="PNG file to write")
+    parser.add_argument("--width", type=int, default=CONST.RENDER_WIDTH_PX)
+    parser.add_argument("--height", type=int, default=CONST.RENDER_HEIGHT_PX)
+    parser.add_argument("--node-radius", type=float, default=CONST.RENDER_NODE_RADIUS_PX, help="in pixels, 0 for none")
+    parser.add_argument("--edge-opacity", type=float, default=CONST.RENDER_EDGE_OPACITY)
+    parser.add_argument("--louvain", action="store_true", help="color nodes by their Louvain community")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the Louvain run")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    node_ids, store = load_graph(args.edges)
+    for node, (x, y) in enumerate(read_positions(args.positions, node_ids)):
+        store.set_position(node, x, y)
+
+    partition = None
+    if args.louvain:
+        partition = louvain_store(store, seed=args.seed).partition
+
+    started = time.perf_counter()
+    render_store(args.output, store, args.width, args.height, partition=partition, node_radius=args.node_radius,
+                 edge_opacity=args.edge_opacity)
+    print(f"{store.num_nodes} nodes, {store.num_edges} edges rendered to {args.output} "
+          f"({args.width}x{args.height}) in {time.perf_counter() - started:.3f} s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
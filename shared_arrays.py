@@ -0,0 +1,34 @@
+"""Typed arrays in shared memory segments, for handing data to worker processes without copies."""
+from array import array
+from multiprocessing import shared_memory
+
+
+def open_shared(name):
+    """Attach to an existing segment without taking ownership of it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13 has no track argument
+        pass
+
+    # Older versions register the segment with the resource tracker again. Workers share the
+    # tracker of the process that created the segment, which keeps one entry per name, so this
+    # changes nothing. Unregistering here would drop the creator's entry and make its unlink fail
+    return shared_memory.SharedMemory(name=name)
+
+
+def share_array(values, typecode):
+    """New segment holding ``values`` as ``typecode`` items. Returns ``(segment, length)``."""
+    data = values if isinstance(values, array) and values.typecode == typecode else array(typecode, values)
+    nbytes = len(data) * data.itemsize
+    shm = shared_memory.SharedMemory(create=True, size=max(1, nbytes))
+    shm.buf[:nbytes] = data.tobytes()
+    return shm, len(data)
+
+
+def attach_array(name, typecode, length):
+    """``(segment, view)`` with ``view`` a memoryview of ``length`` ``typecode`` items in segment ``name``.
+
+    The view must be released before the segment can be closed.
+    """
+    shm = open_shared(name)
+    return shm, shm.buf[:length * array(typecode).itemsize].cast(typecode)
@@ -0,0 +1,143 @@
+import math
+
+
+class GridIndex:
+    """Uniform grid over 2D points with keys, e.g. canvas node ids.
+
+    Every point lives in the square cell of side ``cell_size`` containing it, so nearest,
+    radius and box queries only look at the few cells around the query instead of all points.
+    Moving a point costs O(1).
+    """
+
+    def __init__(self, cell_size):
+        if cell_size <= 0:
+            raise ValueError(f"cell_size must be positive, got {cell_size}")
+        self.cell_size = cell_size
+        self.cells = {}  # (column, row): {key, ...}
+        self.points = {}  # key: (x, y)
+
+    def __len__(self):
+        return len(self.points)
+
+    def __contains__(self, key):
+        return key in self.points
+
+    def _cell(self, x, y):
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def insert(self, key, x, y):
+        if key in self.points:
+            self.move(key, x, y)
+            return
+        self.points[key] = (x, y)
+        self.cells.setdefault(self._cell(x, y), set()).add(key)
+
+    def move(self, key, x, y):
+        old_cell = self._cell(*self.points[key])
+        new_cell = self._cell(x, y)
+        self.points[key] = (x, y)
+        if old_cell != new_cell:
+            self._discard(old_cell, key)
+            self.cells.setdefault(new_cell, set()).add(key)
+
+    def remove(self, key):
+        self._discard(self._cell(*self.points.pop(key)), key)
+
+    def _discard(self, cell, key):
+        keys = self.cells[cell]
+        keys.discard(key)
+        if not keys:
+            del self.cells[cell]
+
+    def clear(self):
+        self.cells.clear()
+        self.points.clear()
+
+    def in_box(self, x0, y0, x1, y1):
+        """Keys of the points inside the box, corners in any order."""
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+        column_0, row_0 = self._cell(x0, y0)
+        column_1, row_1 = self._cell(x1, y1)
+
+        if (column_1 - column_0 + 1) * (row_1 - row_0 + 1) > len(self.cells):
+            # Box covers more cells than are occupied, walk the occupied ones
+            candidates = (key for (column, row), keys in self.cells.items()
+                          if column_0 <= column <= column_1 and row_0 <= row <= row_1 for key in keys)
+        else:
+            candidates = (key for column in range(column_0, column_1 + 1) for row in range(row_0, row_1 + 1)
+                          for key in self.cells.get((column, row), ()))
+
+        points = self.points
+        return [key for key in candidates if x0 <= points[key][0] <= x1 and y0 <= points[key][1] <= y1]
+
+    def within(self, x, y, radius):
+        """Keys of the points at most ``radius`` away from ``(x, y)``."""
+        points = self.points
+        return [key for key in self.in_box(x - radius, y - radius, x + radius, y + radius)
+                if (points[key][0] - x) ** 2 + (points[key][1] - y) ** 2 <= radius * radius]
+
+    def nearest(self, x, y, max_distance=None):
+        """Key of the point closest to ``(x, y)``, or None if there is none within ``max_distance``."""
+        if not self.points:
+            return None
+
+        column, row = self._cell(x, y)
+        best, best_distance = None, math.inf if max_distance is None else max_distance ** 2
+        ring = 0
+
+        while True:
+            if (2 * ring + 1) ** 2 > len(self.cells):
+                # The rings now cover more cells than are occupied, finish with a plain scan
+                for key, (point_x, point_y) in self.points.items():
+                    distance = (point_x - x) ** 2 + (point_y - y) ** 2
+                    if distance <= best_distance:
+                        best, best_distance = key, distance
+                return best
+
+            for cell in self._ring(column, row, ring):
+                for key in self.cells.get(cell, ()):
+                    point_x, point_y = self.points[key]
+                    distance = (point_x - x) ** 2 + (point_y - y) ** 2
+                    if distance <= best_distance:
+                        best, best_distance = key, distance
+
+            # Points in later rings are at least ring * cell_size away
+            if (ring * self.cell_size) ** 2 >= best_distance:
+                return best
+            ring += 1
+
+    @staticmethod
+    def _ring(column, row, ring):
+        if ring == 0:
+            yield column, row
+            return
+        for offset in range(-ring, ring + 1):
+            yield column + offset, row - ring
+            yield column + offset, row + ring
+        for offset in range(-ring + 1, ring):
+            yield column - ring, row + offset
+            yield column + ring, row + offset
+
+    def free_position(self, x0, y0, x1, y1, clearance, rng, attempts=100):
+        """A point in the box with no indexed point closer than ``clearance``, or None if the box is full.
+
+        Tries ``attempts`` random points first, then scans a ``clearance`` spaced lattice from
+        a random start, so it always terminates.
+        """
+        for _ in range(attempts):
+            x, y = rng.uniform(x0, x1), rng.uniform(y0, y1)
+            if not self.within(x, y, clearance):
+                return x, y
+
+        columns = max(1, int((x1 - x0) / clearance) + 1)
+        rows = max(1, int((y1 - y0) / clearance) + 1)
+        start = rng.randrange(columns * rows)
+        for index in range(columns * rows):
+            cell = (start + index) % (columns * rows)
+            x = min(x1, x0 + (cell % columns) * clearance)
+            y = min(y1, y0 + (cell // columns) * clearance)
+            if not self.within(x, y, clearance):
+                return x, y
+
+        return None
@@ -0,0 +1,186 @@
+"""Edge events read from a growing file or a local socket on a background thread.
+
+One event per line: ``+ u v`` or ``add u v`` adds an edge, ``- u v`` or ``remove u v`` removes
+it and a bare ``u v`` pair, as in an edge list, adds one. Node ids are integers, blank lines
+and ``#`` comments are skipped.
+"""
+import os
+import queue
+import socket
+import threading
+import time
+
+ADD = "add"
+REMOVE = "remove"
+OPERATIONS = {"+": ADD, "add": ADD, "-": REMOVE, "remove": REMOVE}
+
+
+def parse_event(line):
+    """``(operation, node_id, node_id)`` for an event line, None for a blank or comment line.
+
+    Raises ValueError for anything else.
+    """
+    fields = line.split()
+    if not fields or fields[0].startswith("#"):
+        return None
+    operation = ADD
+    if fields[0] in OPERATIONS:
+        operation = OPERATIONS[fields[0]]
+        fields = fields[1:]
+    if len(fields) < 2:
+        raise ValueError(f"Not an edge event: {line!r}")
+    return operation, int(fields[0]), int(fields[1])
+
+
+def follow_file(path, stop, poll_interval=0.1, from_start=True):
+    """Yield the complete lines of ``path`` as they are written, until the ``stop`` event is set.
+
+    A line is only yielded once its newline arrived. The file may not exist yet.
+    """
+    file = None
+    pending = ""
+    try:
+        while not stop.is_set():
+            if file is None:
+                try:
+                    file = open(path)
+                except FileNotFoundError:
+                    stop.wait(poll_interval)
+                    continue
+                if not from_start:
+                    file.seek(0, os.SEEK_END)
+
+            text = file.read()
+            if not text:
+                stop.wait(poll_interval)
+                continue
+            *lines, pending = (pending + text).split("\n")
+            yield from lines
+    finally:
+        if file is not None:
+            file.close()
+
+
+class LineServer:
+    """Listens on a local TCP port and yields the lines sent by one client after another.
+
+    The socket is bound on construction, so ``address`` is known before reading starts
+    (port 0 picks a free one).
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, timeout=0.2):
+        self.timeout = timeout
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((host, port))
+        self.socket.listen(1)
+        self.socket.settimeout(timeout)
+        self.address = self.socket.getsockname()
+
+    def lines(self, stop):
+        try:
+            while not stop.is_set():
+                try:
+                    connection, _ = self.socket.accept()
+                except socket.timeout:
+                    continue
+                with connection:
+                    connection.settimeout(self.timeout)
+                    yield from self._read(connection, stop)
+        finally:
+            self.socket.close()
+
+    @staticmethod
+    def _read(connection, stop):
+        pending = b""
+        while not stop.is_set():
+            try:
+                data = connection.recv(1 << 16)
+            except socket.timeout:
+                continue
+            if not data:
+                break
+            *lines, pending = (pending + data).split(b"\n")
+            for line in lines:
+                yield line.decode("utf-8", "replace")
+        if pending:
+            yield pending.decode("utf-8", "replace")
+
+
+class EventStream(threading.Thread):
+    """Parses event lines from ``lines(stop)`` on a background thread and queues the events.
+
+    The queue holds up to ``max_pending`` events, a full queue blocks the reader until the
+    consumer ``drain``s it, so no event is lost. Unparseable lines are counted in ``errors``.
+    """
+
+    def __init__(self, lines, max_pending=100000):
+        super().__init__(daemon=True)
+        self.lines = lines
+        self.events = queue.Queue(maxsize=max_pending)
+        self.events_read = 0
+        self.errors = 0
+        self.error = None
+        self.address = None  # (host, port) the socket stream listens on
+        self._stopped = threading.Event()
+
+    @classmethod
+    def from_file(cls, path, poll_interval=0.1, **kwargs):
+        return cls(lambda stop: follow_file(path, stop, poll_interval), **kwargs)
+
+    @classmethod
+    def from_socket(cls, host="127.0.0.1", port=0, **kwargs):
+        server = LineServer(host, port)
+        stream = cls(server.lines, **kwargs)
+        stream.address = server.address
+        return stream
+
+    def run(self):
+        try:
+            for line in self.lines(self._stopped):
+                try:
+                    event = parse_event(line)
+                except ValueError:
+                    self.errors += 1
+                    continue
+                if event is not None:
+                    self._put(event)
+        except Exception as error:
+            self.error = error
+
+    def _put(self, event):
+        while not self._stopped.is_set():
+            try:
+                self.events.put(event, timeout=0.1)
+                self.events_read += 1
+                return
+            except queue.Full:
+                pass
+
+    def drain(self, max_events=None):
+        """Up to ``max_events`` queued events, oldest first, without waiting."""
+        events = []
+        while max_events is None or len(events) < max_events:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    def wait_for(self, count, timeout=5.0):
+        """Drain until ``count`` events arrived or ``timeout`` seconds passed."""
+        events = []
+        deadline = time.monotonic() + timeout
+        while len(events) < count and time.monotonic() < deadline:
+            try:
+                events.append(self.events.get(timeout=0.05))
+            except queue.Empty:
+                pass
+        return events
+
+    @property
+    def stopped(self):
+        return self._stopped.is_set()
+
+    def stop(self):
+        self._stopped.set()
@@ -1,6 +1,8 @@
+import math
+import random
 import unittest
 
-from algorithm import ForceDirectGraph
+from algorithm import ArrayForceDirectGraph, CoolingSchedule, ForceDirectGraph, np
 
 
 class TestForceDirectGraph(unittest.TestCase):
@@ -39,5 +41,180 @@ class TestForceDirectGraph(unittest.TestCase):
         self.assertEqual(iteration_count, self.max_iterations)  # Should run max_iterations times
 
 
+class TestBarnesHutRepulsion(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(7)
+        self.positions = {node_id: [rng.uniform(0, 500), rng.uniform(0, 500)] for node_id in range(60)}
+        self.edges = [(rng.randrange(60), rng.randrange(60)) for _ in range(90)]
+
+    def _forces(self, repulsion_method, theta=0.5):
+        positions = {node_id: list(coords) for node_id, coords in self.positions.items()}
+        graph = ForceDirectGraph(positions, self.edges, 1, repulsion_method=repulsion_method, theta=theta)
+        return graph._calculate_forces()
+
+    def test_unknown_method_rejected(self):
+        with self.assertRaises(ValueError):
+            ForceDirectGraph(self.positions, self.edges, 1, repulsion_method="fast")
+
+    def test_theta_zero_matches_exact(self):
+        # With theta = 0 no cell is ever approximated, so the result is the exact sum
+        exact = self._forces("exact")
+        approx = self._forces("barnes_hut", theta=0)
+
+        for node_id in self.positions:
+            self.assertAlmostEqual(exact[node_id][0], approx[node_id][0], places=6)
+            self.assertAlmostEqual(exact[node_id][1], approx[node_id][1], places=6)
+
+    def test_forces_within_tolerance_of_exact(self):
+        exact = self._forces("exact")
+        approx = self._forces("barnes_hut", theta=0.5)
+
+        error = sum(math.dist(exact[node_id], approx[node_id]) for node_id in self.positions)
+        magnitude = sum(math.hypot(*exact[node_id]) for node_id in self.positions)
+        self.assertLess(error / magnitude, 0.05)
+
+    def test_coincident_points(self):
+        # Several nodes on the same spot must not recurse forever or produce NaN
+        self.positions = {node_id: [10.0, 10.0] for node_id in range(5)}
+        self.edges = []
+        forces = self._forces("barnes_hut")
+
+        for fx, fy in forces.values():
+            self.assertFalse(math.isnan(fx) or math.isnan(fy))
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestArrayBackend(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(11)
+        self.positions = {node_id: [rng.uniform(0, 300), rng.uniform(0, 300)] for node_id in range(40)}
+        self.edges = [(rng.randrange(40), rng.randrange(40)) for _ in range(70)]
+
+    def _run(self, backend, iterations=5):
+        positions = {node_id: list(coords) for node_id, coords in self.positions.items()}
+        graph = ForceDirectGraph(positions, self.edges, iterations, backend=backend)
+        for result in graph:
+            pass
+        return result
+
+    def test_matches_python_backend(self):
+        expected = self._run("python")
+        actual = self._run("numpy")
+
+        self.assertEqual(list(expected.keys()), list(actual.keys()))
+        for node_id in expected:
+            self.assertAlmostEqual(expected[node_id][0], actual[node_id][0], places=6)
+            self.assertAlmostEqual(expected[node_id][1], actual[node_id][1], places=6)
+
+    def test_small_tiles_match_single_tile(self):
+        positions = np.array(list(self.positions.values()))
+        edges = np.array(self.edges)
+        single = ArrayForceDirectGraph(positions, edges, 1)
+        tiled = ArrayForceDirectGraph(positions, edges, 1)
+        tiled.TILE_ELEMENTS = 100
+
+        np.testing.assert_allclose(single._calculate_forces(), tiled._calculate_forces())
+
+    def test_array_iteration(self):
+        graph = ArrayForceDirectGraph(list(self.positions.values()), self.edges, 3)
+        steps = list(graph)
+
+        self.assertEqual(len(steps), 3)
+        self.assertEqual(graph.positions.shape, (40, 2))
+
+
+class TestCoolingSchedule(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(3)
+        self.positions = {node_id: [rng.uniform(0, 200), rng.uniform(0, 200)] for node_id in range(20)}
+        self.edges = [(i, (i + 1) % 20) for i in range(20)]
+
+    def _layout(self, **kwargs):
+        positions = {node_id: list(coords) for node_id, coords in self.positions.items()}
+        return ForceDirectGraph(positions, self.edges, 500, repulsion_const=500, **kwargs)
+
+    def test_displacement_is_capped(self):
+        before = {node_id: list(coords) for node_id, coords in self.positions.items()}
+        graph = self._layout(temperature=2.0)
+        after = next(graph)
+
+        for node_id in before:
+            self.assertLessEqual(math.dist(before[node_id], after[node_id]), 2.0 + 1e-9)
+        self.assertLessEqual(graph.schedule.max_displacements[-1], 2.0 + 1e-9)
+
+    def test_stops_early_once_settled(self):
+        graph = self._layout(temperature=10.0, tolerance=0.01)
+        energies = [graph.energy for _ in graph]
+
+        self.assertTrue(graph.converged)
+        self.assertLess(graph.current_iteration, graph.max_iterations)
+        self.assertEqual(energies, graph.schedule.energies)
+        self.assertLess(energies[-1], energies[0])
+
+    def test_adaptive_step(self):
+        schedule = CoolingSchedule(temperature=8.0, cooling=0.5, patience=2)
+        schedule.update(10, 1)
+        schedule.update(20, 1)  # energy went up, cool down
+        self.assertEqual(schedule.temperature, 4.0)
+        schedule.update(15, 1)
+        schedule.update(12, 1)  # two improvements in a row, heat up again
+        self.assertEqual(schedule.temperature, 8.0)
+
+    def test_defaults_keep_plain_steps(self):
+        graph = self._layout()
+        list(zip(range(3), graph))
+
+        self.assertIsNone(graph.schedule.temperature)
+        self.assertFalse(graph.converged)
+        self.assertEqual(graph.current_iteration, 3)
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_array_backend_matches(self):
+        expected = self._layout(temperature=5.0, tolerance=0.05)
+        list(expected)
+        actual = self._layout(temperature=5.0, tolerance=0.05, backend="numpy")
+        list(actual)
+
+        self.assertEqual(expected.current_iteration, actual.current_iteration)
+        for node_id in self.positions:
+            self.assertAlmostEqual(expected.positions[node_id][0], actual.positions[node_id][0], places=6)
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestParallelRepulsion(unittest.TestCase):
+
+    def test_matches_serial(self):
+        rng = random.Random(5)
+        positions = np.array([[rng.uniform(0, 400), rng.uniform(0, 400)] for _ in range(50)])
+        edges = np.array([(rng.randrange(50), rng.randrange(50)) for _ in range(80)])
+        serial = ArrayForceDirectGraph(positions.copy(), edges, 3)
+        list(serial)
+
+        target = positions.copy()
+        with ArrayForceDirectGraph(target, edges, 3, workers=2) as parallel:
+            for _ in parallel:
+                pass
+            self.assertIsNone(parallel._pool)  # closed once the iterations are used up
+
+        # The positions were moved in shared memory and written back to the caller's array
+        self.assertTrue(np.shares_memory(parallel.positions, target))
+        np.testing.assert_allclose(serial.positions, target)
+
+    def test_split_blocks(self):
+        from parallel_layout import split_blocks
+
+        self.assertEqual(split_blocks(10, 3), [(0, 3), (3, 6), (6, 10)])
+        self.assertEqual(split_blocks(2, 8), [(0, 1), (1, 2)])
+
+    def test_workers_need_exact_numpy(self):
+        with self.assertRaises(ValueError):
+            ArrayForceDirectGraph([[0, 0]], [], 1, repulsion_method="barnes_hut", workers=2)
+        with self.assertRaises(ValueError):
+            ForceDirectGraph({1: [0, 0]}, [], 1, workers=2)
+
+
 if __name__ == "__main__":
     unittest.main()
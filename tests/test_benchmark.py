@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import unittest
+
+import benchmark
+
+
+class TestBenchmark(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.results = benchmark.run_benchmarks(sizes=[60], iterations=1, memory=False, facebook=False)
+
+    def test_covers_every_area(self):
+        names = [result["name"] for result in self.results["results"]]
+
+        for prefix in ("layout/", "louvain/", "modularity-csr/", "modularity-edges/", "parse/",
+                       "load-binary/", "stream-incremental/", "stream-full/"):
+            self.assertTrue(any(name.startswith(prefix) for name in names), prefix)
+        for graph in ("er-60", "sbm-60", "ba-60", "rgg-60"):
+            self.assertTrue(any(name.endswith(graph) for name in names), graph)
+
+    def test_modularity_results_agree(self):
+        by_name = {result["name"]: result for result in self.results["results"]}
+
+        for graph in ("er-60", "sbm-60", "ba-60"):
+            louvain_q = by_name[f"louvain/{graph}"]["modularity"]
+            self.assertAlmostEqual(by_name[f"modularity-csr/{graph}"]["modularity"], louvain_q)
+            self.assertAlmostEqual(by_name[f"modularity-edges/{graph}"]["modularity"], louvain_q)
+
+        # Only the block model has planted communities to compare against
+        self.assertTrue(0 <= by_name["louvain/sbm-60"]["nmi"] <= 1)
+        self.assertNotIn("nmi", by_name["louvain/er-60"])
+
+    def test_stream_results(self):
+        by_name = {result["name"]: result for result in self.results["results"]}
+
+        incremental, full = by_name["stream-incremental/sbm-60"], by_name["stream-full/sbm-60"]
+        self.assertGreater(incremental["events"], 0)
+        self.assertLessEqual(full["events"], incremental["events"])
+        self.assertLessEqual(incremental["modularity"], 1)
+
+    def test_compare_flags_regressions(self):
+        slower = json.loads(json.dumps(self.results))
+        for result in slower["results"]:
+            for key in benchmark.TIMING_KEYS:
+                if key in result:
+                    result[key] *= 2
+
+        rows = benchmark.compare(slower, self.results, threshold=1.5)
+        self.assertTrue(rows)
+        self.assertTrue(all(regressed for *_, regressed in rows))
+        self.assertFalse(any(regressed for *_, regressed in benchmark.compare(self.results, self.results)))
+
+    def test_main_writes_json(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output = os.path.join(tmp_dir, "results.json")
+            benchmark.main(["-o", output, "--sizes", "40", "-n", "1", "--no-memory", "--quick"])
+
+            with open(output) as file:
+                results = json.load(file)
+        self.assertEqual(results["meta"]["sizes"], [40])
+        self.assertFalse(any(result["name"].endswith("facebook") for result in results["results"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
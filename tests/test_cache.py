@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from array import array
+
+from cache import ResultCache, np
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.cache = ResultCache(self.tmp_dir.name)
+
+    def test_roundtrip(self):
+        key = ResultCache.key("graph", "layout", {"iterations": 50})
+        self.assertIsNone(self.cache.get(key))
+
+        self.cache.put(key, array("d", [1.5, -2.0, 3.25]))
+        self.cache.put("partition", array("l", [0, 0, 1]))
+
+        self.assertIn(key, self.cache)
+        self.assertEqual(self.cache.get(key), array("d", [1.5, -2.0, 3.25]))
+        self.assertEqual(self.cache.get("partition"), array("l", [0, 0, 1]))
+
+    def test_persists_across_instances(self):
+        self.cache.put("positions", [1.0, 2.0])
+        reopened = ResultCache(self.tmp_dir.name)
+        self.assertEqual(reopened.get("positions"), array("d", [1.0, 2.0]))
+
+    def test_key_depends_on_graph_kind_and_params(self):
+        key = ResultCache.key("graph", "layout", {"iterations": 50, "theta": 0.5})
+        self.assertEqual(key, ResultCache.key("graph", "layout", {"theta": 0.5, "iterations": 50}))
+        self.assertNotEqual(key, ResultCache.key("graph", "layout", {"iterations": 51, "theta": 0.5}))
+        self.assertNotEqual(key, ResultCache.key("other", "layout", {"iterations": 50, "theta": 0.5}))
+        self.assertNotEqual(key, ResultCache.key("graph", "louvain", {"iterations": 50, "theta": 0.5}))
+
+    def test_evicts_least_recently_used(self):
+        cache = ResultCache(self.tmp_dir.name, max_bytes=3 * 80)
+        for key in ("a", "b", "c"):
+            cache.put(key, array("d", [0.0] * 10))
+
+        cache.get("a")  # "b" is now the oldest
+        cache.put("d", array("d", [0.0] * 10))
+
+        self.assertEqual(sorted(cache.index), ["a", "c", "d"])
+        self.assertFalse(os.path.exists(cache._path("b")))
+        self.assertLessEqual(cache.total_bytes, cache.max_bytes)
+
+    def test_missing_data_file(self):
+        self.cache.put("positions", [1.0, 2.0])
+        os.remove(self.cache._path("positions"))
+
+        self.assertIsNone(self.cache.get("positions"))
+        self.assertNotIn("positions", ResultCache(self.tmp_dir.name))
+
+    def test_clear(self):
+        self.cache.put("positions", [1.0, 2.0])
+        self.cache.clear()
+        self.assertEqual(self.cache.total_bytes, 0)
+        self.assertIsNone(ResultCache(self.tmp_dir.name).get("positions"))
+
+    @unittest.skipIf(np is None, "numpy not installed")
+    def test_open_array_maps_the_file(self):
+        self.cache.put("positions", array("d", [1.0, 2.0, 3.0, 4.0]))
+        self.cache.put("partition", array("i", [3, 1]))
+
+        positions = self.cache.open_array("positions")
+        self.assertEqual(positions.reshape(-1, 2).tolist(), [[1.0, 2.0], [3.0, 4.0]])
+        self.assertFalse(positions.flags.writeable)
+        self.assertEqual(self.cache.open_array("partition").tolist(), [3, 1])
+        self.assertIsNone(self.cache.open_array("missing"))
+
+
+if __name__ == "__main__":
+    unittest.main()
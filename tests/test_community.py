@@ -0,0 +1,191 @@
+import random
+import unittest
+
+from community import (DynamicCommunities, ModularityTracker, csr_from_edges, edge_modularity, louvain, modularity,
+                       normalized_mutual_information)
+from generators import stochastic_block_model
+
+
+def planted_partition(groups, size, p_in, p_out, seed):
+    rng = random.Random(seed)
+    num_nodes = groups * size
+    edges = []
+    for i in range(num_nodes):
+        for j in range(i + 1, num_nodes):
+            p = p_in if i // size == j // size else p_out
+            if rng.random() < p:
+                edges.append((i, j))
+    return num_nodes, edges
+
+
+class TestCsr(unittest.TestCase):
+
+    def test_symmetric_rows_and_self_loops(self):
+        offsets, targets, weights = csr_from_edges(3, [(0, 1), (1, 2), (2, 2), (1, 0)])
+
+        self.assertEqual(offsets, [0, 1, 3, 5])
+        self.assertEqual(dict(zip(targets[0:1], weights[0:1])), {1: 2.0})  # parallel edges merged
+        self.assertEqual(dict(zip(targets[3:5], weights[3:5])), {1: 1.0, 2: 2.0})
+        self.assertEqual(sum(weights), 2 * 4)
+
+
+class TestModularity(unittest.TestCase):
+
+    def test_two_triangles(self):
+        # Two triangles joined by one edge: Q = 2 * (3/7 - (7/14)^2) = 5/14
+        edges = [(0, 1), (1, 2), (2, 0), (3, 4), (4, 5), (5, 3), (2, 3)]
+        csr = csr_from_edges(6, edges)
+
+        self.assertAlmostEqual(modularity(*csr, [0, 0, 0, 1, 1, 1]), 5 / 14)
+        self.assertAlmostEqual(modularity(*csr, [0] * 6), 0.0)
+
+    def test_edge_list_matches_csr(self):
+        num_nodes, edges = planted_partition(3, 10, 0.5, 0.1, seed=2)
+        rng = random.Random(1)
+        weights = [rng.uniform(0.5, 2) for _ in edges]
+        partition = [rng.randrange(4) for _ in range(num_nodes)]
+
+        self.assertAlmostEqual(edge_modularity(edges, partition, weights),
+                               modularity(*csr_from_edges(num_nodes, edges, weights), partition))
+
+    def test_edge_list_with_dict_partition(self):
+        edges = [("a", "b"), ("b", "c"), ("c", "a"), ("d", "e"), ("e", "f"), ("f", "d"), ("c", "d")]
+        partition = {"a": 1, "b": 1, "c": 1, "d": 2, "e": 2, "f": 2}
+
+        self.assertAlmostEqual(edge_modularity(edges, partition), 5 / 14)
+
+    def test_tracker_follows_moves(self):
+        num_nodes, edges = planted_partition(3, 10, 0.5, 0.1, seed=4)
+        edges.append((0, 0))
+        csr = csr_from_edges(num_nodes, edges)
+        tracker = ModularityTracker(*csr)
+        rng = random.Random(8)
+
+        for _ in range(100):
+            node = rng.randrange(num_nodes)
+            before = tracker.modularity
+            delta = tracker.move(node, rng.randrange(5))
+            self.assertAlmostEqual(tracker.modularity, before + delta)
+            self.assertAlmostEqual(tracker.modularity, modularity(*csr, tracker.partition))
+
+
+class TestLouvain(unittest.TestCase):
+
+    def test_two_triangles(self):
+        edges = [(0, 1), (1, 2), (2, 0), (3, 4), (4, 5), (5, 3), (2, 3)]
+        result = louvain(6, edges)
+
+        self.assertEqual(len(set(result.partition[:3])), 1)
+        self.assertEqual(len(set(result.partition[3:])), 1)
+        self.assertNotEqual(result.partition[0], result.partition[3])
+        self.assertAlmostEqual(result.modularity, 5 / 14)
+
+    def test_recovers_planted_partition(self):
+        num_nodes, edges = planted_partition(4, 25, 0.4, 0.01, seed=3)
+        result = louvain(num_nodes, edges, seed=1)
+
+        for group in range(4):
+            members = result.partition[group * 25:(group + 1) * 25]
+            self.assertEqual(len(set(members)), 1)
+        self.assertEqual(len(set(result.partition)), 4)
+
+    def test_levels_improve_modularity(self):
+        num_nodes, edges = planted_partition(6, 15, 0.3, 0.02, seed=5)
+        result = louvain(num_nodes, edges)
+
+        level_modularity = [q for _, q in result.levels]
+        self.assertEqual(level_modularity, sorted(level_modularity))
+        self.assertAlmostEqual(result.modularity, level_modularity[-1])
+        self.assertAlmostEqual(result.modularity, modularity(*csr_from_edges(num_nodes, edges), result.partition))
+
+    def test_seed_is_reproducible(self):
+        num_nodes, edges = planted_partition(3, 20, 0.2, 0.05, seed=9)
+
+        self.assertEqual(louvain(num_nodes, edges, seed=4).partition, louvain(num_nodes, edges, seed=4).partition)
+
+    def test_graph_without_edges(self):
+        result = louvain(3, [])
+
+        self.assertEqual(result.partition, [0, 1, 2])
+        self.assertEqual(result.levels, [])
+
+
+
+class TestPlantedPartition(unittest.TestCase):
+
+    def test_normalized_mutual_information(self):
+        self.assertAlmostEqual(normalized_mutual_information([0, 0, 1, 1], [5, 5, 2, 2]), 1.0)
+        self.assertAlmostEqual(normalized_mutual_information([0, 0, 1, 1], [0, 1, 0, 1]), 0.0)
+        self.assertAlmostEqual(normalized_mutual_information([0] * 4, [3] * 4), 1.0)
+        self.assertLess(normalized_mutual_information([0, 0, 0, 1, 1, 1], [0, 0, 1, 1, 2, 2]), 1.0)
+        with self.assertRaises(ValueError):
+            normalized_mutual_information([0], [0, 1])
+
+    def test_louvain_recovers_block_model(self):
+        sources, targets, blocks = stochastic_block_model([100] * 8, 0.15, 0.005, seed=7)
+        result = louvain(len(blocks), zip(sources, targets), seed=1)
+
+        self.assertGreater(normalized_mutual_information(result.partition, blocks), 0.95)
+
+
+class TestDynamicCommunities(unittest.TestCase):
+
+    def check_totals(self, communities):
+        """Incrementally kept modularity equals the one computed from scratch."""
+        nodes = sorted(communities.adjacency)
+        edges = [(a, b) for a in nodes for b in communities.adjacency[a] if a <= b]
+        weights = [communities.adjacency[a][b] / (2 if a == b else 1) for a, b in edges]
+        partition = {node: communities.partition[node] for node in nodes}
+        self.assertAlmostEqual(communities.modularity(), edge_modularity(edges, partition, weights))
+
+    def test_events_keep_modularity_up_to_date(self):
+        communities = DynamicCommunities(seed=0)
+        moved = communities.apply([("add", a, b) for a, b in [(0, 1), (1, 2), (2, 0), (3, 4), (4, 5), (5, 3),
+                                                              (2, 3), (0, 0)]])
+
+        self.assertTrue(moved)
+        self.assertEqual(communities.num_communities, 2)
+        self.assertEqual(len({communities.partition[node] for node in (0, 1, 2)}), 1)
+        self.check_totals(communities)
+
+        self.assertFalse(communities.remove_edge(0, 5))
+        communities.apply([("remove", 2, 3), ("remove", 0, 0), ("add", 6, 7)])
+        self.assertEqual(communities.num_communities, 3)
+        self.check_totals(communities)
+        with self.assertRaises(ValueError):
+            communities.apply([("move", 0, 1)])
+
+    def test_removals_split_communities(self):
+        communities = DynamicCommunities(seed=1)
+        edges = [(0, 1), (1, 2), (2, 0), (3, 4), (4, 5), (5, 3), (2, 3)]
+        communities.apply([("add", a, b) for a, b in edges])
+        # Put everything in one community, then cut the bridge
+        for node in range(1, 6):
+            if communities.partition[node] != communities.partition[0]:
+                communities._move(node, communities.partition[0])
+        self.assertEqual(communities.num_communities, 1)
+        communities.apply([("remove", 2, 3)])
+
+        self.assertEqual(communities.num_communities, 2)
+        self.assertNotEqual(communities.partition[0], communities.partition[5])
+        self.check_totals(communities)
+
+    def test_warm_start_stays_close_to_full_louvain(self):
+        sources, targets, blocks = stochastic_block_model([40] * 5, 0.3, 0.01, seed=4)
+        edges = list(zip(sources, targets))
+        random.Random(0).shuffle(edges)
+        communities = DynamicCommunities(seed=0)
+        for a, b in edges[:len(edges) // 2]:
+            communities.add_edge(a, b)
+        communities.recompute(seed=0)
+
+        communities.apply([("add", a, b) for a, b in edges[len(edges) // 2:]])
+        self.check_totals(communities)
+        partition = [communities.partition[node] for node in range(len(blocks))]
+        self.assertGreater(normalized_mutual_information(partition, blocks), 0.9)
+        incremental = communities.modularity()
+        self.assertGreater(incremental, communities.recompute(seed=0).modularity - 0.02)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import math
+import unittest
+from unittest import mock
+
+import generators
+from generators import barabasi_albert, erdos_renyi, random_geometric, stochastic_block_model
+
+
+def edge_set(sources, targets):
+    return {(min(s, t), max(s, t)) for s, t in zip(sources, targets)}
+
+
+def backends():
+    """Run the enclosed checks with numpy (when installed) and with the pure Python code."""
+    yield "default"
+    with mock.patch.object(generators, "np", None):
+        yield "python"
+
+
+class TestGenerators(unittest.TestCase):
+
+    def test_erdos_renyi_density(self):
+        n, p = 400, 0.05
+        expected = p * n * (n - 1) / 2
+        for backend in backends():
+            with self.subTest(backend):
+                sources, targets = erdos_renyi(n, p, seed=1)
+
+                self.assertEqual(len(edge_set(sources, targets)), len(sources))  # no duplicates
+                self.assertTrue(all(s < t < n for s, t in zip(sources, targets)))
+                self.assertLess(abs(len(sources) - expected), 0.1 * expected)
+
+    def test_erdos_renyi_extremes(self):
+        for backend in backends():
+            with self.subTest(backend):
+                self.assertEqual(len(erdos_renyi(20, 0, seed=1)[0]), 0)
+                self.assertEqual(edge_set(*erdos_renyi(20, 1, seed=1)),
+                                 {(i, j) for j in range(20) for i in range(j)})
+
+    def test_seeded(self):
+        for backend in backends():
+            with self.subTest(backend):
+                self.assertEqual(erdos_renyi(100, 0.1, seed=3), erdos_renyi(100, 0.1, seed=3))
+                self.assertEqual(stochastic_block_model([20, 30], 0.3, 0.1, seed=3),
+                                 stochastic_block_model([20, 30], 0.3, 0.1, seed=3))
+                self.assertEqual(random_geometric(100, 0.2, seed=3), random_geometric(100, 0.2, seed=3))
+        self.assertEqual(barabasi_albert(100, 3, seed=3), barabasi_albert(100, 3, seed=3))
+
+    def test_block_model(self):
+        for backend in backends():
+            with self.subTest(backend):
+                sources, targets, blocks = stochastic_block_model([30, 30, 40], 0.5, 0.01, seed=2)
+                inside = sum(blocks[s] == blocks[t] for s, t in zip(sources, targets))
+
+                self.assertEqual(list(blocks), [0] * 30 + [1] * 30 + [2] * 40)
+                self.assertEqual(len(edge_set(sources, targets)), len(sources))
+                self.assertGreater(inside, 0.9 * len(sources))
+
+    def test_random_geometric_matches_brute_force(self):
+        n, radius = 300, 0.1
+        for backend in backends():
+            with self.subTest(backend):
+                sources, targets, positions = random_geometric(n, radius, seed=2, width=1.0, height=2.0)
+                points = [(positions[2 * i], positions[2 * i + 1]) for i in range(n)]
+                expected = {(i, j) for i in range(n) for j in range(i + 1, n)
+                            if math.dist(points[i], points[j]) <= radius}
+
+                self.assertTrue(all(0 <= x < 1 and 0 <= y < 2 for x, y in points))
+                self.assertEqual(len(sources), len(expected))
+                self.assertEqual(edge_set(sources, targets), expected)
+
+    def test_barabasi_albert(self):
+        sources, targets = barabasi_albert(200, 3, seed=5)
+
+        self.assertEqual(len(sources), 3 * (200 - 3))
+        self.assertEqual(len(edge_set(sources, targets)), len(sources))
+        with self.assertRaises(ValueError):
+            barabasi_albert(3, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
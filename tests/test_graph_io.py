@@ -0,0 +1,121 @@
+import io
+import os
+import random
+import tempfile
+import unittest
+
+from graph_io import (convert_edge_list, iter_edge_chunks, load_binary_graph, load_graph, read_edge_arrays,
+                      sample_grid_positions, write_binary_graph)
+from graph_store import GraphStore, np
+
+
+class TestEdgeListParsing(unittest.TestCase):
+
+    def test_chunks_cover_every_edge(self):
+        text = "".join(f"{i} {i + 1}\n" for i in range(1000))
+        chunks = list(iter_edge_chunks(io.StringIO(text), chunk_bytes=256))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual([pair for chunk in chunks for pair in chunk], [(i, i + 1) for i in range(1000)])
+
+    def test_comments_blank_lines_and_extra_columns(self):
+        text = "# comment\n1 2\n\n2 3 0.5\n  3   1  \n"
+        node_ids, sources, targets = read_edge_arrays(io.StringIO(text))
+
+        self.assertEqual(node_ids, [1, 2, 3])
+        self.assertEqual(list(sources), [0, 1, 2])
+        self.assertEqual(list(targets), [1, 2, 0])
+
+    def test_lines_are_not_paired_across(self):
+        chunks = list(iter_edge_chunks(io.StringIO("1 2 3\n4\n5 6\n")))
+
+        self.assertEqual([pair for chunk in chunks for pair in chunk], [(1, 2), (5, 6)])
+
+    def test_progress_reports_edge_counts(self):
+        text = "".join(f"{i} {i + 1}\n" for i in range(100))
+        counts = []
+        read_edge_arrays(io.StringIO(text), chunk_bytes=64, progress=counts.append)
+
+        self.assertEqual(counts, sorted(counts))
+        self.assertEqual(counts[-1], 100)
+
+
+class TestBinaryGraph(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.text_path = os.path.join(tmp_dir.name, "edges.txt")
+        self.binary_path = os.path.join(tmp_dir.name, "edges.graph")
+        with open(self.text_path, "w") as file:
+            file.write("# ids are not contiguous\n10 20\n20 30\n30 10\n10 99999999999\n")
+
+    def test_roundtrip_matches_text_edge_list(self):
+        node_ids, store = convert_edge_list(self.text_path, self.binary_path)
+        loaded_ids, loaded = load_binary_graph(self.binary_path)
+
+        self.assertEqual(list(loaded_ids), [10, 20, 30, 99999999999])
+        self.assertEqual(list(loaded_ids), node_ids)
+        self.assertEqual(list(loaded.offsets), list(store.offsets))
+        self.assertEqual(list(loaded.edges()), list(store.edges()))
+        self.assertEqual(loaded.content_hash(), store.content_hash())
+        self.assertEqual(loaded.position_list(), [[0.0, 0.0]] * 4)
+
+    def test_views_are_read_only(self):
+        convert_edge_list(self.text_path, self.binary_path)
+        _, store = load_binary_graph(self.binary_path)
+
+        self.assertIsInstance(store.targets, memoryview)
+        with self.assertRaises(TypeError):
+            store.targets[0] = 1
+        store.set_position(0, 1.0, 2.0)  # positions are a normal in-memory array
+
+    def test_weights(self):
+        store = GraphStore.from_edges(3, [0, 1], [1, 2], weights=[0.5, 2.0])
+        write_binary_graph(self.binary_path, [7, 8, 9], store)
+        _, loaded = load_binary_graph(self.binary_path)
+
+        self.assertEqual(list(loaded.weights), [0.5, 2.0])
+
+    def test_load_graph_detects_format(self):
+        convert_edge_list(self.text_path, self.binary_path)
+        for path in (self.text_path, self.binary_path):
+            node_ids, store = load_graph(path)
+            self.assertEqual(list(node_ids), [10, 20, 30, 99999999999])
+            self.assertEqual(store.num_edges, 4)
+
+    def test_rejects_other_files(self):
+        with self.assertRaises(ValueError):
+            load_binary_graph(self.text_path)
+
+        convert_edge_list(self.text_path, self.binary_path)
+        with open(self.binary_path, "r+b") as file:
+            file.truncate(os.path.getsize(self.binary_path) - 4)
+        with self.assertRaises(ValueError):
+            load_binary_graph(self.binary_path)
+
+    @unittest.skipIf(np is None, "numpy not installed")
+    def test_numpy_views(self):
+        convert_edge_list(self.text_path, self.binary_path)
+        _, store = load_binary_graph(self.binary_path)
+
+        self.assertEqual(store.edge_array().tolist(), [[0, 1], [0, 3], [1, 2], [2, 0]])
+
+
+class TestSampleGridPositions(unittest.TestCase):
+
+    def test_distinct_cells_inside_canvas(self):
+        positions = sample_grid_positions(500, 100, 80, 2, rng=random.Random(3))
+
+        self.assertEqual(len(set(positions)), 500)
+        for x, y in positions:
+            self.assertTrue(0 <= x < 100 and 0 <= y < 80)
+            self.assertEqual((x % 2, y % 2), (0, 0))
+
+    def test_grid_too_small(self):
+        with self.assertRaises(ValueError):
+            sample_grid_positions(11, 10, 10, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+
+from algorithm import ArrayForceDirectGraph, ForceDirectGraph, np
+from community import louvain, louvain_store
+from graph_store import GraphStore
+
+
+class TestGraphStore(unittest.TestCase):
+
+    def setUp(self):
+        # Two triangles joined by the edge 2 -> 3, edges given out of order
+        self.sources = [3, 0, 1, 2, 4, 5, 2]
+        self.targets = [4, 1, 2, 0, 5, 3, 3]
+        self.positions = [(float(i), float(2 * i)) for i in range(6)]
+        self.store = GraphStore.from_edges(6, self.sources, self.targets, positions=self.positions)
+
+    def test_csr_layout(self):
+        self.assertEqual(list(self.store.offsets), [0, 1, 2, 4, 5, 6, 7])
+        self.assertEqual(list(self.store.neighbors(2)), [0, 3])
+        self.assertEqual(self.store.degree(2), 2)
+        self.assertEqual(sorted(self.store.edges()), sorted(zip(self.sources, self.targets)))
+
+    def test_content_hash(self):
+        same = GraphStore.from_edges(6, self.sources, self.targets)
+        other = GraphStore.from_edges(6, self.sources[:-1], self.targets[:-1])
+        weighted = GraphStore.from_edges(6, self.sources, self.targets, weights=[1] * 7)
+
+        # Positions are not part of the graph's identity
+        self.assertEqual(self.store.content_hash(), same.content_hash())
+        self.assertNotEqual(self.store.content_hash(), other.content_hash())
+        self.assertNotEqual(self.store.content_hash(), weighted.content_hash())
+
+    def test_positions(self):
+        self.assertEqual(self.store.get_position(5), (5.0, 10.0))
+        self.store.set_position(5, 1.5, 2.5)
+        self.assertEqual(self.store.position_list()[5], [1.5, 2.5])
+
+    def test_weights_follow_csr_order(self):
+        weights = [10, 1, 2, 3, 4, 5, 6]
+        store = GraphStore.from_edges(6, self.sources, self.targets, weights=weights)
+        by_edge = dict(zip(zip(self.sources, self.targets), weights))
+
+        for edge, weight in zip(store.edges(), store.weights):
+            self.assertEqual(by_edge[edge], weight)
+
+    def test_compact_memory(self):
+        # offsets + targets + positions, no Python object per edge
+        self.assertEqual(self.store.nbytes, 7 * 8 + 7 * 4 + 12 * 8)
+
+    def test_rejects_wrong_position_count(self):
+        with self.assertRaises(ValueError):
+            GraphStore.from_edges(6, self.sources, self.targets, positions=self.positions[:5])
+
+    def test_louvain_on_store(self):
+        expected = louvain(6, list(zip(self.sources, self.targets)))
+
+        self.assertAlmostEqual(louvain_store(self.store).modularity, expected.modularity)
+
+    def test_layout_writes_back_to_store(self):
+        layout = ForceDirectGraph.from_store(self.store, 3)
+        for positions in layout:
+            pass
+
+        self.assertEqual(self.store.position_list(), [positions[i] for i in range(6)])
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_array_layout_shares_store_memory(self):
+        expected = ForceDirectGraph.from_store(
+            GraphStore.from_edges(6, self.sources, self.targets, positions=self.positions), 3)
+        for positions in expected:
+            pass
+
+        layout = ArrayForceDirectGraph.from_store(self.store, 3)
+        for _ in layout:
+            pass
+
+        np.testing.assert_allclose(self.store.position_array(), [positions[i] for i in range(6)])
+
+
+if __name__ == "__main__":
+    unittest.main()
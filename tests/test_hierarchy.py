@@ -0,0 +1,115 @@
+import unittest
+
+from community import csr_from_edges, louvain
+from generators import stochastic_block_model
+from hierarchy import INPUT_LEVEL, CommunityHierarchy, HierarchyView
+
+
+def total_weight(view):
+    hierarchy = view.hierarchy
+    return sum(view.edges.values()) + sum(hierarchy.internal_weight(item) for item in view.visible)
+
+
+class TestCommunityHierarchy(unittest.TestCase):
+
+    def setUp(self):
+        # Two triangles 0-1-2 and 3-4-5 joined by 2-3, a self-loop on 0, and node 6 hanging off 5
+        edges = [(0, 1), (1, 2), (2, 0), (3, 4), (4, 5), (5, 3), (2, 3), (0, 0), (5, 6)]
+        self.csr = csr_from_edges(7, edges)
+        self.levels = [[0, 0, 0, 1, 1, 2, 2], [0, 0, 0, 1, 1, 1, 1]]
+        self.hierarchy = CommunityHierarchy(*self.csr, self.levels)
+
+    def test_levels(self):
+        hierarchy = self.hierarchy
+
+        self.assertEqual(hierarchy.top_level, 1)
+        self.assertEqual(hierarchy.sizes, [[3, 2, 2], [3, 4]])
+        self.assertEqual(hierarchy.internal_weights, [[4.0, 1.0, 1.0], [4.0, 4.0]])
+        self.assertEqual(hierarchy.edge_weights, [{(0, 1): 1.0, (1, 2): 2.0}, {(0, 1): 1.0}])
+        self.assertEqual(hierarchy.children, [[[0, 1, 2], [3, 4], [5, 6]], [[0], [1, 2]]])
+        self.assertEqual(hierarchy.members[1], [[0, 1, 2], [3, 4, 5, 6]])
+
+    def test_navigation(self):
+        hierarchy = self.hierarchy
+
+        self.assertEqual(hierarchy.parent((INPUT_LEVEL, 4)), (0, 1))
+        self.assertEqual(hierarchy.parent((0, 2)), (1, 1))
+        self.assertIsNone(hierarchy.parent((1, 0)))
+        self.assertEqual(hierarchy.item_children((1, 1)), [(0, 1), (0, 2)])
+        self.assertEqual(hierarchy.item_children((0, 2)), [(INPUT_LEVEL, 5), (INPUT_LEVEL, 6)])
+        self.assertEqual(hierarchy.item_children((INPUT_LEVEL, 5)), [])
+        self.assertEqual(hierarchy.internal_weight((INPUT_LEVEL, 0)), 1.0)
+        self.assertEqual(hierarchy.size((0, 0)), 3)
+
+    def test_rejects_levels_that_do_not_nest(self):
+        with self.assertRaises(ValueError):
+            CommunityHierarchy(*self.csr, [[0, 0, 0, 1, 1, 2, 2], [0, 0, 1, 1, 1, 1, 1]])
+        with self.assertRaises(ValueError):
+            CommunityHierarchy(*self.csr, [[0, 0, 0]])
+
+
+class TestHierarchyView(unittest.TestCase):
+
+    def setUp(self):
+        edges = [(0, 1), (1, 2), (2, 0), (3, 4), (4, 5), (5, 3), (2, 3), (0, 0), (5, 6)]
+        self.hierarchy = CommunityHierarchy(*csr_from_edges(7, edges),
+                                            [[0, 0, 0, 1, 1, 2, 2], [0, 0, 0, 1, 1, 1, 1]])
+        self.view = HierarchyView(self.hierarchy)
+
+    def test_starts_at_top_level(self):
+        self.assertEqual(self.view.visible, {(1, 0), (1, 1)})
+        self.assertEqual(self.view.edges, {((1, 0), (1, 1)): 1.0})
+
+    def test_expand_and_collapse(self):
+        view = self.view
+
+        removed, added = view.expand((1, 1))
+        self.assertEqual((removed, added), ([(1, 1)], [(0, 1), (0, 2)]))
+        self.assertEqual(view.edges, {((0, 1), (1, 0)): 1.0, ((0, 1), (0, 2)): 2.0})
+
+        view.expand((0, 2))
+        self.assertEqual(view.visible, {(1, 0), (0, 1), (INPUT_LEVEL, 5), (INPUT_LEVEL, 6)})
+        self.assertEqual(view.edges, {((0, 1), (1, 0)): 1.0, ((INPUT_LEVEL, 5), (0, 1)): 2.0,
+                                      ((INPUT_LEVEL, 5), (INPUT_LEVEL, 6)): 1.0})
+        self.assertEqual(view.expand((INPUT_LEVEL, 6)), ([], []))
+
+        # Collapsing a node of the expanded community brings back its top level parent in one step
+        removed, added = view.collapse((0, 1))
+        self.assertEqual(set(removed), {(0, 1), (INPUT_LEVEL, 5), (INPUT_LEVEL, 6)})
+        self.assertEqual(added, [(1, 1)])
+        self.assertEqual(view.edges, {((1, 0), (1, 1)): 1.0})
+        self.assertEqual(view.collapse((1, 1)), ([], []))
+
+    def test_expand_unknown_item(self):
+        with self.assertRaises(KeyError):
+            self.view.expand((0, 0))
+
+    def test_no_levels(self):
+        hierarchy = CommunityHierarchy(*csr_from_edges(3, [(0, 1), (1, 2)]), [])
+        view = HierarchyView(hierarchy)
+
+        self.assertEqual(hierarchy.top_level, INPUT_LEVEL)
+        self.assertEqual(view.edges, {((INPUT_LEVEL, 0), (INPUT_LEVEL, 1)): 1.0,
+                                      ((INPUT_LEVEL, 1), (INPUT_LEVEL, 2)): 1.0})
+
+    def test_weight_is_kept_on_louvain_levels(self):
+        sources, targets, _ = stochastic_block_model([25] * 6, 0.3, 0.02, seed=2)
+        edges = list(zip(sources, targets))
+        result = louvain(150, edges, seed=0)
+        hierarchy = CommunityHierarchy(*csr_from_edges(150, edges), [level for level, _ in result.levels])
+        view = HierarchyView(hierarchy)
+
+        self.assertEqual(total_weight(view), len(edges))
+        for item in sorted(view.visible):
+            view.expand(item)
+            self.assertEqual(total_weight(view), len(edges))
+        while hierarchy.top_level > 0 and any(level >= 0 for level, _ in view.visible):
+            view.expand(next(item for item in sorted(view.visible) if item[0] >= 0))
+        self.assertEqual(total_weight(view), len(edges))
+
+        view.collapse((INPUT_LEVEL, 0))
+        self.assertEqual(total_weight(view), len(edges))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import math
+import random
+import unittest
+
+from graph_store import GraphStore
+from incremental import IncrementalLayout, k_hop_nodes, undirected_adjacency
+from quadtree import QuadTree
+
+
+class TestKHopNodes(unittest.TestCase):
+
+    def test_path(self):
+        adjacency = undirected_adjacency([(i, i + 1) for i in range(6)])
+
+        self.assertEqual(k_hop_nodes(adjacency, [3], 0), {3})
+        self.assertEqual(k_hop_nodes(adjacency, [3], 2), {1, 2, 3, 4, 5})
+        self.assertEqual(k_hop_nodes(adjacency, [0, 6], 1), {0, 1, 5, 6})
+
+    def test_isolated_seed(self):
+        self.assertEqual(k_hop_nodes(undirected_adjacency([(0, 1)]), [7], 3), {7})
+
+
+class TestQuadTreeRepulsionAt(unittest.TestCase):
+
+    def test_matches_repulsion_of_tree_point(self):
+        rng = random.Random(3)
+        points = [(rng.uniform(0, 100), rng.uniform(0, 100)) for _ in range(50)]
+        tree = QuadTree(points)
+
+        self.assertEqual(tree.repulsion(7, 1000, 0.5), tree.repulsion_at(*points[7], 1000, 0.5, skip=7))
+
+    def test_outside_point_exact_with_zero_theta(self):
+        points = [(0.0, 0.0), (10.0, 0.0)]
+        fx, fy = QuadTree(points).repulsion_at(5.0, 5.0, 100, 0.0)
+
+        # Equal pushes from both points cancel along x and add up along y
+        distance = math.sqrt(50) + 0.1
+        self.assertAlmostEqual(fx, 0.0)
+        self.assertAlmostEqual(fy, 2 * 100 / distance ** 2 * 5 / distance)
+
+
+class TestIncrementalLayout(unittest.TestCase):
+
+    def setUp(self):
+        # Two 4-cycles joined by the edge 3-4, plus node 8 just attached to node 0
+        rng = random.Random(1)
+        edges = [(0, 1), (1, 2), (2, 3), (3, 0), (4, 5), (5, 6), (6, 7), (7, 4), (3, 4), (8, 0)]
+        self.positions = [(rng.uniform(0, 500), rng.uniform(0, 500)) for _ in range(9)]
+        self.store = GraphStore.from_edges(9, [a for a, _ in edges], [b for _, b in edges], positions=self.positions)
+
+    def test_only_neighbourhood_moves(self):
+        layout = IncrementalLayout.from_store(self.store, [8], hops=1, max_iterations=20)
+        self.assertEqual(layout.active, [0, 8])
+
+        for _ in layout:
+            pass
+
+        self.assertEqual(layout.current_iteration, 20)
+        positions = self.store.position_list()
+        for node in range(1, 8):
+            self.assertEqual(tuple(positions[node]), self.positions[node])
+        self.assertNotEqual(tuple(positions[8]), self.positions[8])
+
+    def test_new_node_settles_next_to_neighbour(self):
+        layout = IncrementalLayout.from_store(self.store, [8], hops=0, max_iterations=500, repulsion_const=100,
+                                              attraction_constant=0.1, temperature=20, tolerance=0.01)
+        for _ in layout:
+            pass
+
+        self.assertTrue(layout.converged)
+        x, y = self.store.position_list()[8]
+        x0, y0 = self.positions[0]
+        # Spring and repulsion balance close to the neighbour, far from where it started
+        self.assertLess(math.hypot(x - x0, y - y0), 60)
+
+    def test_barnes_hut_between_moving_nodes(self):
+        layout = IncrementalLayout.from_store(self.store, [0, 4], hops=2, max_iterations=5,
+                                              repulsion_method="barnes_hut")
+        self.assertEqual(len(layout.active), 9)
+
+        self.assertEqual(len(list(layout)), 5)
+
+    def test_no_changes(self):
+        layout = IncrementalLayout.from_store(self.store, [], max_iterations=10)
+
+        self.assertEqual(list(layout), [])
+        self.assertIsNone(layout.energy)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            IncrementalLayout({0: [0.0, 0.0]}, [], [0], repulsion_method="nope")
+        with self.assertRaises(ValueError):
+            IncrementalLayout({0: [0.0, 0.0]}, [], [0], hops=-1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import contextlib
+import csv
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import layout
+from graph_io import read_edge_list
+from graph_store import GraphStore
+
+
+class TestLayoutCli(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.edges_path = os.path.join(self.tmp_dir.name, "edges.txt")
+        with open(self.edges_path, "w") as file:
+            file.write("# square\n10 20\n20 30\n\n30 40\n40 10\n")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_read_edge_list(self):
+        node_ids, edges = read_edge_list(self.edges_path)
+
+        self.assertEqual(node_ids, [10, 20, 30, 40])
+        self.assertEqual(edges, [(0, 1), (1, 2), (2, 3), (3, 0)])
+
+    def test_writes_csv(self):
+        output = os.path.join(self.tmp_dir.name, "positions.csv")
+        layout.main([self.edges_path, "-o", output, "-n", "3", "--seed", "1", "--quiet"])
+
+        with open(output) as file:
+            rows = list(csv.reader(file))
+
+        self.assertEqual(rows[0], ["node", "x", "y"])
+        self.assertEqual([row[0] for row in rows[1:]], ["10", "20", "30", "40"])
+
+    def test_reports_time_per_iteration(self):
+        store = GraphStore.from_edges(4, [0, 1], [1, 2], positions=layout.random_positions(4, seed=1))
+        args = layout.parse_args([self.edges_path, "-o", "unused.csv", "-n", "4"])
+        timings = layout.run_layout(layout.build_layout(store, args))
+
+        self.assertEqual(len(timings), 4)
+
+    def test_rejects_workers_without_exact_numpy_repulsion(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            for options in (["--workers", "2"], ["--workers", "2", "--backend", "numpy"]):
+                with self.assertRaises(SystemExit):
+                    layout.parse_args([self.edges_path, "-o", "unused.csv", *options])
+
+        args = layout.parse_args([self.edges_path, "-o", "unused.csv", "--workers", "2", "--backend", "numpy",
+                                  "--method", "exact"])
+        self.assertEqual(args.workers, 2)
+
+    def test_does_not_import_tkinter(self):
+        # Run in a fresh interpreter, other tests may have imported tkinter already
+        code = "import sys, layout; print('tkinter' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+        self.assertEqual(result.stdout.strip(), "False")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import threading
+import unittest
+
+from algorithm import ForceDirectGraph
+from layout_worker import LayoutWorker
+
+
+class SlowLayout:
+    """Yields 0, 1, 2, ... and blocks before each step until allowed to continue."""
+
+    def __init__(self, steps):
+        self.steps = steps
+        self.allowed = threading.Semaphore(0)
+
+    def __iter__(self):
+        for step in range(self.steps):
+            self.allowed.acquire()
+            yield {0: [step, step]}
+
+
+class TestLayoutWorker(unittest.TestCase):
+
+    def test_runs_all_iterations(self):
+        positions = {1: [0, 0], 2: [1, 0], 3: [0, 1]}
+        worker = LayoutWorker(ForceDirectGraph(positions, [(1, 2)], 5))
+        worker.start()
+        worker.join(5)
+
+        iteration, snapshot = worker.latest()
+        self.assertEqual(iteration, 5)
+        self.assertEqual(snapshot, positions)
+        self.assertIsNot(snapshot, positions)  # a copy, not the live dict
+        self.assertTrue(worker.finished)
+
+    def test_keeps_only_newest_snapshot(self):
+        layout = SlowLayout(3)
+        worker = LayoutWorker(layout)
+        worker.start()
+        for _ in range(3):
+            layout.allowed.release()
+        worker.join(5)
+
+        self.assertEqual(worker.latest(), (3, {0: [2, 2]}))
+        self.assertIsNone(worker.latest())
+
+    def test_cancel_stops_early(self):
+        layout = SlowLayout(100)
+        worker = LayoutWorker(layout)
+        worker.pause()
+        worker.start()
+        layout.allowed.release()
+        worker.cancel()
+        for _ in range(100):
+            layout.allowed.release()
+        worker.join(5)
+
+        self.assertFalse(worker.is_alive())
+        self.assertEqual(worker.iterations_done, 1)
+
+    def test_stop_waits_for_the_step_in_progress(self):
+        layout = SlowLayout(100)
+        worker = LayoutWorker(layout)
+        worker.start()
+        # The worker is blocked inside the first step until the timer lets it finish
+        timer = threading.Timer(0.05, layout.allowed.release)
+        timer.start()
+        worker.stop()
+
+        self.assertFalse(worker.is_alive())
+        self.assertEqual(worker.iterations_done, 1)
+        timer.join()
+
+    def test_cancelled_layout_is_closed(self):
+        layout = SlowLayout(100)
+        layout.closed = 0
+
+        def close():
+            layout.closed += 1
+
+        layout.close = close
+        worker = LayoutWorker(layout)
+        worker.start()
+        layout.allowed.release()
+        worker.stop()
+
+        self.assertEqual(layout.closed, 1)
+
+    def test_error_is_kept(self):
+        def broken():
+            yield {}
+            raise RuntimeError("boom")
+
+        worker = LayoutWorker(broken())
+        worker.start()
+        worker.join(5)
+
+        self.assertIsInstance(worker.error, RuntimeError)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+from unittest import mock
+
+import lod
+from const import CONST
+from graph_store import GraphStore
+from lod import Viewport, density_raster, raster_ppm, visible_edges
+
+
+class TestViewport(unittest.TestCase):
+
+    def test_roundtrip(self):
+        viewport = Viewport(100, 80, scale=2.0, origin_x=10.0, origin_y=-5.0)
+        self.assertEqual(viewport.to_screen(10.0, -5.0), (0.0, 0.0))
+        self.assertEqual(viewport.to_world(*viewport.to_screen(33.0, 7.0)), (33.0, 7.0))
+
+    def test_zoom_keeps_point_under_cursor(self):
+        viewport = Viewport(100, 80)
+        before = viewport.to_world(30, 40)
+
+        self.assertEqual(viewport.zoom(2.0, 30, 40), 2.0)
+        self.assertEqual(viewport.to_world(30, 40), before)
+        self.assertEqual(viewport.world_bounds(), (15.0, 20.0, 65.0, 60.0))
+
+    def test_zoom_is_clamped(self):
+        viewport = Viewport(100, 80, scale=Viewport.MAX_SCALE / 1.5)
+        self.assertAlmostEqual(viewport.zoom(2.0, 0, 0), 1.5)
+        self.assertEqual(viewport.scale, Viewport.MAX_SCALE)
+
+    def test_pan_and_reset(self):
+        viewport = Viewport(100, 80, scale=2.0)
+        viewport.pan(10, -20)
+        self.assertEqual(viewport.to_screen(0, 0), (10.0, -20.0))
+
+        viewport.reset()
+        self.assertTrue(viewport.identity)
+
+
+class TestLevelOfDetail(unittest.TestCase):
+
+    def setUp(self):
+        # A horizontal, a vertical and an off-screen edge
+        positions = [(1, 1), (9, 1), (1, 9), (100, 100), (120, 100)]
+        self.store = GraphStore.from_edges(5, [0, 0, 3], [1, 2, 4], positions=positions)
+        self.viewport = Viewport(10, 10)
+
+    def backends(self):
+        yield "default"
+        with mock.patch.object(lod, "np", None):
+            yield "python"
+
+    def test_visible_edges(self):
+        for backend in self.backends():
+            with self.subTest(backend):
+                self.assertEqual(visible_edges(self.store, (0, 0, 10, 10)), [0, 1])
+                self.assertEqual(visible_edges(self.store, (110, 90, 200, 200)), [2])
+                self.assertEqual(visible_edges(self.store, (20, 20, 30, 30)), [])
+
+    def test_density_raster(self):
+        for backend in self.backends():
+            with self.subTest(backend):
+                columns, rows, counts = density_raster(self.store, self.viewport, cell=2)
+                grid = [list(counts[row * columns:(row + 1) * columns]) for row in range(rows)]
+
+                self.assertEqual((columns, rows), (5, 5))
+                # Both edges start in the top-left cell, the off-screen edge adds nothing
+                self.assertGreaterEqual(grid[0][0], 2)
+                self.assertTrue(all(count > 0 for count in grid[0]))
+                self.assertTrue(all(row[0] > 0 for row in grid))
+                self.assertTrue(all(count == 0 for row in grid[1:] for count in row[1:]))
+
+    def test_zoomed_raster_only_counts_visible_part(self):
+        self.viewport.zoom(4.0, 0, 0)
+        for backend in self.backends():
+            with self.subTest(backend):
+                columns, rows, counts = density_raster(self.store, self.viewport, cell=2)
+                grid = [list(counts[row * columns:(row + 1) * columns]) for row in range(rows)]
+                # The view now spans world (0, 0) - (2.5, 2.5), only the edge starts are in it
+                self.assertTrue(all(count > 0 for count in grid[2][2:]))
+                self.assertEqual(grid[0], [0] * columns)
+
+    def test_raster_ppm(self):
+        for backend in self.backends():
+            with self.subTest(backend):
+                image = raster_ppm(2, 1, [0, 5], "#000000", "#ff8000")
+                self.assertEqual(image, b"P6 2 1 255\n" + bytes([0, 0, 0, 255, 128, 0]))
+                self.assertEqual(raster_ppm(1, 1, [0], "#102030", "#ffffff"), b"P6 1 1 255\n\x10\x20\x30")
+
+    def test_raster_ppm_with_canvas_colors(self):
+        # CONST colors are '#rrggbb', Tk names are resolved by the canvas before they get here
+        for backend in self.backends():
+            with self.subTest(backend):
+                image = raster_ppm(2, 1, [0, 1], CONST.CANVAS_BACKGROUND_COLOR, CONST.EDGE_COLOR)
+                self.assertEqual(image, b"P6 2 1 255\n" + bytes([0x8f, 0x8f, 0x8f, 255, 255, 255]))
+        for name in ("white", "mauve"):
+            with self.assertRaises(ValueError):
+                raster_ppm(1, 1, [0], name, CONST.EDGE_COLOR)
+
+
+if __name__ == "__main__":
+    unittest.main()
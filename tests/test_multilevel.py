@@ -0,0 +1,104 @@
+import math
+import random
+import unittest
+
+from algorithm import ForceDirectGraph
+from const import CONST
+from generators import stochastic_block_model
+from graph_store import GraphStore
+from multilevel import MultilevelLayout, adjacency_from_edges, contract, heavy_edge_matching
+
+
+class TestCoarsening(unittest.TestCase):
+
+    def test_matching_pairs_neighbours(self):
+        # Path 0-1-2-3-4-5: every coarse node holds one or two adjacent nodes
+        adjacency = adjacency_from_edges(6, [(i, i + 1) for i in range(5)])
+        parent, count = heavy_edge_matching(adjacency, random.Random(1))
+
+        self.assertLess(count, 6)
+        for coarse_node in range(count):
+            members = [node for node in range(6) if parent[node] == coarse_node]
+            self.assertIn(len(members), (1, 2))
+            if len(members) == 2:
+                self.assertEqual(abs(members[0] - members[1]), 1)
+
+    def test_contract_sums_weights(self):
+        adjacency = adjacency_from_edges(4, [(0, 2), (1, 2), (1, 3), (0, 1)])
+        coarse = contract(adjacency, [0, 0, 1, 1], 2)
+
+        self.assertEqual(dict(coarse[0]), {1: 3.0})
+        self.assertEqual(dict(coarse[1]), {0: 3.0})
+
+
+class TestMultilevelLayout(unittest.TestCase):
+
+    def setUp(self):
+        sources, targets, self.blocks = stochastic_block_model([40] * 5, 0.3, 0.005, seed=4)
+        rng = random.Random(2)
+        positions = [(rng.uniform(0, 800), rng.uniform(0, 800)) for _ in range(200)]
+        self.store = GraphStore.from_edges(200, sources, targets, positions=positions)
+
+    def _run(self, coarsening):
+        layout = MultilevelLayout.from_store(self.store, coarsening=coarsening, min_nodes=10, seed=1,
+                                             repulsion_const=6000, attraction_constant=0.03, damping_const=1,
+                                             temperature=50, tolerance=0.5, coarsest_iterations=100,
+                                             level_iterations=15)
+        levels = list(layout)
+        return layout, levels
+
+    def test_runs_coarsest_first(self):
+        layout, levels = self._run("matching")
+        sizes = layout.level_sizes
+
+        self.assertEqual(sizes[0], 200)
+        self.assertEqual(sizes, sorted(sizes, reverse=True))
+        self.assertEqual(len(levels), len(sizes))
+        self.assertLess(layout.iterations_done, 100 + 15 * (len(sizes) - 1) + 1)
+
+    def test_blocks_are_separated(self):
+        for coarsening in ("matching", "community"):
+            self._run(coarsening)
+            positions = self.store.position_list()
+            same, other = [], []
+            for i in range(0, 200, 3):
+                for j in range(i + 1, 200, 7):
+                    distance = math.dist(positions[i], positions[j])
+                    (same if self.blocks[i] == self.blocks[j] else other).append(distance)
+
+            self.assertLess(sum(same) / len(same), 0.6 * sum(other) / len(other), coarsening)
+
+    def test_stays_in_starting_bounds(self):
+        before = self.store.position_list()
+        for coarsening in ("matching", "community"):
+            self._run(coarsening)
+            positions = self.store.position_list()
+
+            for axis in (0, 1):
+                low, high = min(p[axis] for p in before), max(p[axis] for p in before)
+                self.assertGreaterEqual(min(p[axis] for p in positions), low - 1e-6, coarsening)
+                self.assertLessEqual(max(p[axis] for p in positions), high + 1e-6, coarsening)
+
+    def test_less_work_than_flat_layout(self):
+        # Same parameters and iteration counts as the GUI uses
+        params = dict(repulsion_const=6000, attraction_constant=0.03, damping_const=1, temperature=50, cooling=0.9,
+                      tolerance=0.5, repulsion_method="barnes_hut")
+        layout = MultilevelLayout(self.store.position_list(), list(self.store.edges()), seed=1,
+                                  coarsest_iterations=CONST.FDG_ITERATIONS,
+                                  level_iterations=CONST.FDG_MULTILEVEL_LEVEL_ITERATIONS, **params)
+        for _ in layout:
+            pass
+        flat = ForceDirectGraph(dict(enumerate(self.store.position_list())), list(self.store.edges()),
+                                CONST.FDG_ITERATIONS, **params)
+        for _ in flat:
+            pass
+
+        self.assertLess(layout.node_updates, flat.current_iteration * self.store.num_nodes)
+
+    def test_unknown_coarsening(self):
+        with self.assertRaises(ValueError):
+            MultilevelLayout([(0, 0)], [], coarsening="random")
+
+
+if __name__ == "__main__":
+    unittest.main()
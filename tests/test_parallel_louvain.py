@@ -0,0 +1,99 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from community import csr_from_edges, louvain, normalized_mutual_information
+from generators import stochastic_block_model
+from graph_store import GraphStore
+from parallel_louvain import (SharedLouvainPool, louvain_sweep, louvain_sweep_store, main, partition_stability,
+                              summary)
+
+
+class TestLouvainSweep(unittest.TestCase):
+
+    def setUp(self):
+        sources, targets, self.blocks = stochastic_block_model([30] * 4, 0.4, 0.01, seed=3)
+        self.edges = list(zip(sources, targets))
+        self.num_nodes = len(self.blocks)
+
+    def test_runs_match_single_louvain(self):
+        result = louvain_sweep(self.num_nodes, self.edges, resolutions=(1.0, 2.0), seeds=range(3))
+
+        self.assertEqual([(run.resolution, run.seed) for run in result.runs],
+                         [(1.0, 0), (1.0, 1), (1.0, 2), (2.0, 0), (2.0, 1), (2.0, 2)])
+        for run in result.runs:
+            expected = louvain(self.num_nodes, self.edges, resolution=run.resolution, seed=run.seed)
+            self.assertEqual(list(run.partition), expected.partition)
+            self.assertAlmostEqual(run.modularity, expected.modularity)
+            self.assertEqual(run.num_communities, len(set(expected.partition)))
+
+        self.assertIs(result.best, max(result.runs, key=lambda run: run.score))
+        self.assertEqual(set(result.stability), {1.0, 2.0})
+        self.assertGreater(normalized_mutual_information(result.best.partition, self.blocks), 0.95)
+
+    def test_parallel_matches_serial(self):
+        store = GraphStore.from_edges(self.num_nodes, [a for a, _ in self.edges], [b for _, b in self.edges])
+        serial = louvain_sweep_store(store, resolutions=(0.5, 1.0), seeds=range(2))
+        parallel = louvain_sweep_store(store, resolutions=(0.5, 1.0), seeds=range(2), workers=2)
+
+        self.assertEqual(serial, parallel)
+
+    def test_pool_is_reusable(self):
+        csr = csr_from_edges(self.num_nodes, self.edges)
+        with SharedLouvainPool(2, *csr) as pool:
+            first = pool.map([(1.0, 5)])
+            second = pool.map([(1.0, 5), (1.0, 6)])
+
+        self.assertEqual(first[0], second[0])
+        self.assertEqual(len(second), 2)
+
+    def test_pool_takes_another_graph(self):
+        triangles = [(0, 1), (1, 2), (2, 0), (3, 4), (4, 5), (5, 3), (2, 3)]
+        with SharedLouvainPool(2) as pool:
+            with self.assertRaises(ValueError):
+                pool.map([(1.0, 0)])
+            first = louvain_sweep(self.num_nodes, self.edges, seeds=range(2), pool=pool)
+            second = louvain_sweep(6, triangles, seeds=range(2), pool=pool)
+
+        self.assertEqual(first, louvain_sweep(self.num_nodes, self.edges, seeds=range(2)))
+        self.assertEqual(list(second.best.partition), louvain(6, triangles, seed=second.best.seed).partition)
+
+    def test_summary_labels_both_modularities(self):
+        result = louvain_sweep(self.num_nodes, self.edges, resolutions=(2.0,), seeds=range(2))
+        best = summary(result).splitlines()[-1]
+
+        self.assertIn(f"modularity {result.best.modularity:.4f}", best)
+        self.assertIn(f"{result.best.score:.4f} at resolution 1", best)
+
+    def test_stability(self):
+        self.assertEqual(partition_stability([[0, 1, 1]]), 1.0)
+        self.assertEqual(partition_stability([[0, 0, 1, 1], [1, 1, 0, 0]]), 1.0)
+        self.assertLess(partition_stability([[0, 0, 1, 1], [0, 1, 0, 1], [0, 0, 1, 1]]), 1.0)
+
+    def test_needs_runs(self):
+        with self.assertRaises(ValueError):
+            louvain_sweep(self.num_nodes, self.edges, seeds=[])
+
+
+class TestSweepCli(unittest.TestCase):
+
+    def test_writes_best_partition(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            edges_path = os.path.join(tmp_dir, "edges.txt")
+            output = os.path.join(tmp_dir, "partition.csv")
+            with open(edges_path, "w") as file:
+                file.write("1 2\n2 3\n3 1\n4 5\n5 6\n6 4\n3 4\n")
+
+            main([edges_path, "-o", output, "--seeds", "2", "--resolutions", "0.5", "1"])
+            with open(output) as file:
+                rows = list(csv.reader(file))
+
+        self.assertEqual(rows[0], ["node", "community"])
+        communities = {node: community for node, community in rows[1:]}
+        self.assertEqual(communities["1"], communities["3"])
+        self.assertNotEqual(communities["1"], communities["5"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import json
+import os
+import tempfile
+import tracemalloc
+import unittest
+from unittest import mock
+
+import profiling
+from algorithm import ForceDirectGraph
+from community import louvain
+from generators import stochastic_block_model
+
+
+class TestProfiler(unittest.TestCase):
+
+    def tearDown(self):
+        profiling.disable()
+
+    def test_disabled_by_default(self):
+        self.assertFalse(profiling.active.enabled)
+        with profiling.active.phase("anything"):
+            profiling.active.count("anything")
+        self.assertIsNone(profiling.disable())
+
+    def test_phases_and_counters_accumulate(self):
+        profiler = profiling.Profiler()
+        for _ in range(3):
+            with profiler.phase("step"):
+                profiler.count("items", 2)
+
+        self.assertEqual(profiler.phases["step"]["calls"], 3)
+        self.assertGreaterEqual(profiler.phases["step"]["seconds"], profiler.phases["step"]["max_seconds"])
+        self.assertEqual(profiler.counters, {"items": 6})
+
+        profiler.reset()
+        self.assertEqual(profiler.phases, {})
+        self.assertEqual(profiler.counters, {})
+
+    def test_phase_is_recorded_when_it_raises(self):
+        profiler = profiling.Profiler()
+        with self.assertRaises(KeyError):
+            with profiler.phase("failing"):
+                raise KeyError("boom")
+        self.assertEqual(profiler.phases["failing"]["calls"], 1)
+
+    def test_observers(self):
+        events = []
+        profiler = profiling.Profiler()
+        profiler.add_observer(lambda kind, name, value: events.append((kind, name)))
+        with profiler.phase("step"):
+            profiler.count("items")
+
+        self.assertEqual(events, [("count", "items"), ("phase", "step")])
+
+    def test_json_export_and_report(self):
+        profiler = profiling.Profiler()
+        with profiler.phase("step"):
+            profiler.count("items", 5)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "profile.json")
+            profiler.write_json(path)
+            with open(path) as file:
+                data = json.load(file)
+
+        self.assertEqual(data["phases"]["step"]["calls"], 1)
+        self.assertEqual(data["counters"], {"items": 5})
+        self.assertIn("max_rss_bytes", data["memory"])
+        self.assertIn("step:", profiler.report())
+        self.assertIn("items: 5", profiler.report())
+
+    def test_enable_tracks_memory(self):
+        tracing = tracemalloc.is_tracing()
+        profiler = profiling.enable(track_memory=True)
+        self.assertIs(profiling.active, profiler)
+        data = [0] * 10000
+        self.assertGreater(profiler.peak_memory()["traced_peak_bytes"], 0)
+        del data
+
+        self.assertIs(profiling.disable(), profiler)
+        self.assertFalse(profiling.active.enabled)
+        self.assertEqual(tracemalloc.is_tracing(), tracing)
+
+    @unittest.skipIf(profiling.resource is None, "no resource module")
+    def test_max_rss_units(self):
+        usage = mock.Mock(ru_maxrss=2048)
+        profiler = profiling.Profiler()
+        with mock.patch.object(profiling.resource, "getrusage", return_value=usage):
+            with mock.patch.object(profiling.sys, "platform", "linux"):
+                self.assertEqual(profiler.peak_memory()["max_rss_bytes"], 2048 * 1024)
+            with mock.patch.object(profiling.sys, "platform", "darwin"):
+                self.assertEqual(profiler.peak_memory()["max_rss_bytes"], 2048)
+
+    def test_layout_and_louvain_phases(self):
+        profiler = profiling.enable()
+        positions = {0: [0.0, 0.0], 1: [10.0, 0.0], 2: [0.0, 10.0]}
+        for _ in ForceDirectGraph(positions, [(0, 1), (1, 2)], 5):
+            pass
+
+        sources, targets, _ = stochastic_block_model([20, 20], 0.5, 0.01, seed=1)
+        louvain(40, list(zip(sources, targets)), seed=0)
+
+        self.assertEqual(profiler.counters["layout.iterations"], 5)
+        self.assertEqual(profiler.phases["layout.repulsion"]["calls"], 5)
+        self.assertIn("layout.attraction", profiler.phases)
+        self.assertIn("louvain.local_moving", profiler.phases)
+        self.assertIn("louvain.modularity", profiler.phases)
+        self.assertGreaterEqual(profiler.counters["louvain.levels"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
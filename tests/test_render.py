@@ -0,0 +1,144 @@
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+from unittest import mock
+
+import render
+from const import CONST
+from graph_store import GraphStore
+from render import community_colors, encode_png, fit_bounds, parse_color, render as render_pixels, render_store
+
+
+def decode_png(data):
+    """``(width, height, pixels)`` of an 8 bit RGB PNG without filters, as encode_png writes them."""
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    position, chunks = 8, {}
+    while position < len(data):
+        length, = struct.unpack(">I", data[position:position + 4])
+        kind = data[position + 4:position + 8]
+        body = data[position + 8:position + 8 + length]
+        crc, = struct.unpack(">I", data[position + 8 + length:position + 12 + length])
+        assert crc == zlib.crc32(kind + body)
+        chunks[kind] = chunks.get(kind, b"") + body
+        position += 12 + length
+    width, height, depth, color_type = struct.unpack(">IIBB", chunks[b"IHDR"][:10])
+    assert (depth, color_type) == (8, 2)
+    raw = zlib.decompress(chunks[b"IDAT"])
+    stride = 3 * width + 1
+    assert all(raw[row * stride] == 0 for row in range(height))
+    return width, height, b"".join(raw[row * stride + 1:(row + 1) * stride] for row in range(height))
+
+
+def pixel(pixels, width, x, y):
+    return tuple(pixels[3 * (y * width + x):3 * (y * width + x) + 3])
+
+
+class TestPng(unittest.TestCase):
+
+    def test_roundtrip(self):
+        pixels = bytes(range(2 * 3 * 3))
+        width, height, decoded = decode_png(encode_png(pixels, 3, 2))
+
+        self.assertEqual((width, height, decoded), (3, 2, pixels))
+        with self.assertRaises(ValueError):
+            encode_png(pixels, 4, 2)
+
+
+class TestRender(unittest.TestCase):
+
+    def setUp(self):
+        # A horizontal and a diagonal edge between three nodes
+        self.positions = [(0.0, 0.0), (100.0, 0.0), (100.0, 100.0)]
+        self.edges = [(0, 1), (0, 2)]
+        self.options = dict(background="#000000", edge_color="#ffffff", edge_opacity=0.5, node_radius=0, margin=10)
+
+    def test_colors(self):
+        self.assertEqual(parse_color("#2e8de6"), (0x2e, 0x8d, 0xe6))
+        for color in ("white", "#fff", "2e8de6"):
+            with self.assertRaises(ValueError):
+                parse_color(color)
+        palette = CONST.COMMUNITY_COLORS
+        self.assertEqual(community_colors([0, 1, len(palette)]), [palette[0], palette[1], palette[0]])
+
+    def test_fit_keeps_aspect_ratio(self):
+        self.assertEqual(fit_bounds((0, 0, 100, 50), 220, 220, margin=10), (2.0, 10.0, 60.0))
+        self.assertEqual(fit_bounds(None, 10, 10), (1.0, 0.0, 0.0))
+        # A single point ends up in the middle
+        scale, offset_x, offset_y = fit_bounds((5, 5, 5, 5), 10, 10, margin=0)
+        self.assertEqual((5 * scale + offset_x, 5 * scale + offset_y), (5.0, 5.0))
+
+    def test_edges_are_antialiased(self):
+        pixels = render_pixels(self.positions, self.edges, 120, 120, **self.options)
+        self.assertEqual(len(pixels), 120 * 120 * 3)
+
+        # The horizontal edge runs along y = 10, the border between pixel rows 9 and 10: both get half of it
+        self.assertEqual(pixel(pixels, 120, 50, 5), (0, 0, 0))
+        self.assertEqual(pixel(pixels, 120, 50, 8), (0, 0, 0))
+        half = round(255 * (1 - 0.5 ** 0.5))
+        self.assertEqual(pixel(pixels, 120, 50, 9), (half,) * 3)
+        self.assertEqual(pixel(pixels, 120, 50, 10), (half,) * 3)
+        # The diagonal edge passes through pixel centers and is brightest there
+        self.assertGreater(pixel(pixels, 120, 60, 60)[0], pixel(pixels, 120, 60, 61)[0])
+        self.assertGreater(pixel(pixels, 120, 60, 61)[0], 0)
+        self.assertEqual(pixel(pixels, 120, 50, 80), (0, 0, 0))
+
+    def test_nodes_drawn_over_edges(self):
+        options = dict(self.options, node_radius=3)
+        pixels = render_pixels(self.positions, self.edges, 120, 120, colors=["#ff0000", "#00ff00", "#0000ff"],
+                               **options)
+
+        self.assertEqual(pixel(pixels, 120, 10, 10), (255, 0, 0))
+        self.assertEqual(pixel(pixels, 120, 110, 10), (0, 255, 0))
+        self.assertEqual(pixel(pixels, 120, 109, 109), (0, 0, 255))
+        with self.assertRaises(ValueError):
+            render_pixels(self.positions, self.edges, 120, 120, colors=["#ff0000"], **options)
+
+    def test_small_chunks_give_the_same_image(self):
+        whole = render_pixels(self.positions, self.edges, 120, 120, **self.options)
+        with mock.patch.object(render, "EDGE_CHUNK", 1), mock.patch.object(render, "BATCH_SAMPLES", 16):
+            chunked = render_pixels(self.positions, self.edges, 120, 120, **self.options)
+
+        self.assertLessEqual(max(abs(a - b) for a, b in zip(whole, chunked)), 1)
+
+    def test_python_fallback_matches_numpy(self):
+        options = dict(self.options, node_radius=2.5)
+        with_numpy = render_pixels(self.positions, self.edges, 60, 40, **options)
+        with mock.patch.object(render, "np", None):
+            without = render_pixels(self.positions, self.edges, 60, 40, **options)
+
+        self.assertLessEqual(max(abs(a - b) for a, b in zip(with_numpy, without)), 1)
+
+    def test_render_store(self):
+        store = GraphStore.from_edges(3, [0, 0], [1, 2], positions=self.positions)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "graph.png")
+            render_store(path, store, 80, 50, partition=[0, 0, 1])
+            with open(path, "rb") as file:
+                width, height, pixels = decode_png(file.read())
+
+        self.assertEqual((width, height, len(pixels)), (80, 50, 80 * 50 * 3))
+        self.assertIn(parse_color(CONST.COMMUNITY_COLORS[1]), {pixel(pixels, 80, x, y) for x in range(80)
+                                                               for y in range(50)})
+
+
+class TestRenderCli(unittest.TestCase):
+
+    def test_writes_png(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            edges = os.path.join(tmp_dir, "edges.txt")
+            positions = os.path.join(tmp_dir, "positions.csv")
+            output = os.path.join(tmp_dir, "graph.png")
+            with open(edges, "w") as file:
+                file.write("10 20\n20 30\n30 10\n")
+            with open(positions, "w") as file:
+                file.write("node,x,y\n30,0,50\n10,0,0\n20,50,0\n")
+
+            render.main([edges, positions, "-o", output, "--width", "64", "--height", "48", "--louvain"])
+            with open(output, "rb") as file:
+                self.assertEqual(decode_png(file.read())[:2], (64, 48))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import math
+import random
+import unittest
+
+from spatial_index import GridIndex
+
+
+class TestGridIndex(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(5)
+        self.points = {key: (rng.uniform(-50, 250), rng.uniform(0, 200)) for key in range(300)}
+        self.index = GridIndex(16)
+        for key, (x, y) in self.points.items():
+            self.index.insert(key, x, y)
+
+    def brute_nearest(self, x, y):
+        return min(self.points, key=lambda key: math.dist(self.points[key], (x, y)))
+
+    def test_nearest_matches_brute_force(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            x, y = rng.uniform(-100, 300), rng.uniform(-50, 250)
+            self.assertEqual(self.index.nearest(x, y), self.brute_nearest(x, y))
+
+    def test_nearest_respects_max_distance(self):
+        x, y = self.points[7]
+        self.assertEqual(self.index.nearest(x + 0.5, y, max_distance=1), 7)
+        self.assertIsNone(self.index.nearest(10_000, 10_000, max_distance=100))
+        self.assertIsNone(GridIndex(10).nearest(0, 0))
+
+    def test_box_and_radius_queries(self):
+        box = sorted(self.index.in_box(100, 150, 20, 40))
+        self.assertEqual(box, sorted(key for key, (x, y) in self.points.items()
+                                     if 20 <= x <= 100 and 40 <= y <= 150))
+        # A box much larger than the occupied area takes the other code path
+        self.assertEqual(len(self.index.in_box(-1e6, -1e6, 1e6, 1e6)), len(self.points))
+
+        near = sorted(self.index.within(100, 100, 30))
+        self.assertEqual(near, sorted(key for key, point in self.points.items() if math.dist(point, (100, 100)) <= 30))
+
+    def test_move_and_remove(self):
+        self.index.move(3, 1000.0, 1000.0)
+        self.assertEqual(self.index.nearest(999, 999), 3)
+        self.assertNotIn(3, self.index.in_box(*self.points[3], *self.points[3]))
+
+        self.index.remove(3)
+        self.assertNotIn(3, self.index)
+        self.assertEqual(len(self.index), len(self.points) - 1)
+        self.assertNotEqual(self.index.nearest(999, 999), 3)
+
+    def test_free_position(self):
+        index = GridIndex(4)
+        rng = random.Random(2)
+        placed = []
+        while True:
+            position = index.free_position(0, 0, 20, 20, 4, rng, attempts=5)
+            if position is None:
+                break
+            for other in placed:
+                self.assertGreater(math.dist(position, other), 4)
+            index.insert(len(placed), *position)
+            placed.append(position)
+
+        # The box fills up and the search ends instead of looping forever
+        self.assertGreater(len(placed), 10)
+        self.assertLess(len(placed), 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+from streaming import ADD, REMOVE, EventStream, follow_file, parse_event
+
+
+class TestParseEvent(unittest.TestCase):
+
+    def test_formats(self):
+        self.assertEqual(parse_event("+ 1 2"), (ADD, 1, 2))
+        self.assertEqual(parse_event("add 3 4\n"), (ADD, 3, 4))
+        self.assertEqual(parse_event("5 6 0.5"), (ADD, 5, 6))
+        self.assertEqual(parse_event("- 1 2"), (REMOVE, 1, 2))
+        self.assertEqual(parse_event("remove 1 2"), (REMOVE, 1, 2))
+        self.assertIsNone(parse_event("   \n"))
+        self.assertIsNone(parse_event("# comment"))
+
+    def test_rejects_garbage(self):
+        for line in ("+ 1", "x y", "- a 2"):
+            with self.assertRaises(ValueError):
+                parse_event(line)
+
+
+class TestFollowFile(unittest.TestCase):
+
+    def test_yields_complete_lines_as_they_are_written(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "events.txt")
+            stop = threading.Event()
+            lines = follow_file(path, stop, poll_interval=0.01)
+
+            with open(path, "w") as file:
+                file.write("+ 1 2\n- 1")
+                file.flush()
+                self.assertEqual(next(lines), "+ 1 2")
+                file.write(" 2\n")
+                file.flush()
+                self.assertEqual(next(lines), "- 1 2")
+            stop.set()
+            self.assertEqual(list(lines), [])
+
+
+class TestEventStream(unittest.TestCase):
+
+    def test_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "events.txt")
+            with open(path, "w") as file:
+                file.write("# events\n1 2\n- 1 2\nnot an event\n")
+
+            stream = EventStream.from_file(path, poll_interval=0.01)
+            stream.start()
+            events = stream.wait_for(2)
+            stream.stop()
+            stream.join(1)
+
+        self.assertEqual(events, [(ADD, 1, 2), (REMOVE, 1, 2)])
+        self.assertEqual(stream.errors, 1)
+        self.assertFalse(stream.is_alive())
+
+    def test_socket(self):
+        stream = EventStream.from_socket(port=0)
+        stream.start()
+        with socket.create_connection(stream.address, timeout=1) as client:
+            client.sendall(b"+ 1 2\n+ 2")
+            client.sendall(b" 3\n- 1 2")
+        events = stream.wait_for(3)
+        stream.stop()
+        stream.join(1)
+
+        self.assertEqual(events, [(ADD, 1, 2), (ADD, 2, 3), (REMOVE, 1, 2)])
+        self.assertIsNone(stream.error)
+
+    def test_full_queue_holds_the_reader(self):
+        lines = ["+ 0 {}".format(i) for i in range(10)]
+        stream = EventStream(lambda stop: iter(lines), max_pending=3)
+        stream.start()
+
+        events = []
+        while len(events) < 10 and (stream.is_alive() or not stream.events.empty()):
+            events += stream.drain(2)
+        stream.join(1)
+        events += stream.drain()
+
+        self.assertEqual(events, [(ADD, 0, i) for i in range(10)])
+
+
+if __name__ == "__main__":
+    unittest.main()